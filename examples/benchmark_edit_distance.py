@@ -0,0 +1,72 @@
+import sys
+import time
+import random
+from procon.objects.petri_net import align_utils
+
+# Compares the implementations of the edit distance without substitution of align_utils on synthetic variants: the
+# pairwise ones (scalar matrix, bit-parallel, anti-diagonals) on a sample of the variants, then the batch ones (one
+# query against all the variants, as done by the distance based fast paths).
+# usage: python benchmark_edit_distance.py [number of variants [mean length [number of labels [number of queries]]]]
+
+
+def synthetic_variants(n, mean_length, n_labels, seed=0):
+    # variants derived from a few base variants by small edits, like the variants of a log
+    rnd = random.Random(seed)
+    labels = ["activity %d" % i for i in range(n_labels)]
+    bases = [[rnd.choice(labels) for _ in range(max(1, int(rnd.gauss(mean_length, mean_length / 4))))]
+             for _ in range(20)]
+    variants = []
+    for _ in range(n):
+        variant = list(rnd.choice(bases))
+        for _ in range(rnd.randint(0, 4)):
+            position = rnd.randint(0, len(variant))
+            if rnd.random() < 0.5 and position < len(variant):
+                del variant[position]
+            else:
+                variant.insert(position, rnd.choice(labels))
+        variants.append(variant)
+    return variants
+
+
+def main():
+    n_variants = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    mean_length = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    n_labels = int(sys.argv[3]) if len(sys.argv) > 3 else 30
+    n_queries = int(sys.argv[4]) if len(sys.argv) > 4 else 10
+
+    variants = synthetic_variants(n_variants, mean_length, n_labels)
+    queries = variants[:n_queries]
+
+    sample = variants[:200]
+    expected = None
+    for name, distance in [("matrix", align_utils.levenshtein), ("bit-parallel", align_utils.levenshtein_bitparallel),
+                           ("anti-diagonal", align_utils.levenshtein_antidiagonal)]:
+        start = time.time()
+        distances = [int(distance(query, variant)) for query in queries for variant in sample]
+        elapsed = time.time() - start
+        expected = distances if expected is None else expected
+        assert distances == expected
+        print("pairwise %s: %.1f us per pair" % (name, 1e6 * elapsed / len(distances)))
+
+    start = time.time()
+    encoded, lengths, label_index = align_utils.encode_labels(variants)
+    print("encoding of %d variants: %.2fs" % (n_variants, time.time() - start))
+    start = time.time()
+    masks = align_utils.bitparallel_masks(encoded, lengths, len(label_index))
+    print("match masks: %.2fs" % (time.time() - start))
+    encoded_queries = [[label_index.get(label, -1) for label in query] for query in queries]
+
+    expected = None
+    for name, batch in [("LCS rows", lambda query: align_utils.levenshtein_batch(query, encoded, lengths)),
+                        ("bit-parallel", lambda query: align_utils.levenshtein_batch_bitparallel(query, masks,
+                                                                                                 lengths))]:
+        start = time.time()
+        distances = [batch(query).tolist() for query in encoded_queries]
+        elapsed = time.time() - start
+        expected = distances if expected is None else expected
+        assert distances == expected
+        print("batch %s: %.3fs per query against %d variants" % (name, elapsed / n_queries, n_variants))
+
+
+if __name__ == '__main__':
+    main()
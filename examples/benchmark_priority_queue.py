@@ -0,0 +1,138 @@
+import os
+import sys
+import math
+import time
+import heapq
+import random
+import procon
+from procon.algorithm import a_star
+from procon.conversion import converter
+from procon.objects.petri_net import align_utils
+from pm4py.objects.log.obj import Trace, Event
+from pm4py.statistics.traces.generic.pandas import case_statistics
+
+# Measures the open set of the A* alignment search, which is a binary heap (heapq): first against a monotone bucket
+# queue (array of buckets over the integer f values with a moving cursor, defined below for reference only) on a
+# synthetic workload shaped like the open set of a large model (millions of entries, costs 0/1/10000, fractional
+# heuristics), then end-to-end on the variants of an event log, where the time of the heap operations of the search is
+# compared with the time of the whole search.
+# usage: python benchmark_priority_queue.py [model.bpmn log.xes [number of queue operations]]
+
+
+class ReferenceBucketQueue:
+    # tuples (f, untrusted, h, node) bucketed by f rounded up, trusted tuples first within a bucket
+    def __init__(self):
+        self.buckets = []
+        self.base = None
+        self.cursor = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def push(self, item):
+        key = math.ceil(item[0] - 1e-6)
+        if self.base is None:
+            self.base = key
+        index = key - self.base
+        if index < 0:
+            self.buckets[0:0] = [None] * -index
+            self.cursor -= index
+            self.base = key
+            index = 0
+        if index >= len(self.buckets):
+            self.buckets.extend([None] * (index + 1 - len(self.buckets)))
+        bucket = self.buckets[index]
+        if bucket is None:
+            bucket = self.buckets[index] = ([], [])
+        bucket[1 if item[1] else 0].append(item)
+        self.cursor = min(self.cursor, index)
+        self.size += 1
+
+    def pop(self):
+        while True:
+            bucket = self.buckets[self.cursor]
+            if bucket is not None:
+                if bucket[0]:
+                    item = bucket[0].pop()
+                    break
+                if bucket[1]:
+                    item = bucket[1].pop()
+                    break
+                self.buckets[self.cursor] = None
+            self.cursor += 1
+        self.size -= 1
+        return item
+
+
+def synthetic_workload(n, seed=0):
+    rnd = random.Random(seed)
+    costs = [align_utils.STD_SYNC_COST, align_utils.STD_TAU_COST, align_utils.STD_MODEL_LOG_MOVE_COST]
+    items = []
+    g = 0
+    for node in range(n):
+        g += rnd.choice(costs) if rnd.random() < 0.01 else 0
+        h = rnd.randrange(0, 5) * align_utils.STD_MODEL_LOG_MOVE_COST + rnd.random()
+        items.append((g + h, rnd.randrange(2), h, node))
+    return items
+
+
+def run_heap(items):
+    open_set = []
+    for i, item in enumerate(items):
+        heapq.heappush(open_set, item)
+        if i % 3 == 0:
+            heapq.heappop(open_set)
+    while open_set:
+        heapq.heappop(open_set)
+
+
+def run_bucket(items):
+    open_set = ReferenceBucketQueue()
+    for i, item in enumerate(items):
+        open_set.push(item)
+        if i % 3 == 0:
+            open_set.pop()
+    while open_set:
+        open_set.pop()
+
+
+def align_variants(net, im, fm, variants):
+    parameters = {}
+    parameters[a_star.Parameters.SYNC_PRODUCT_TEMPLATE] = a_star.compile_template(net, im, fm, parameters=parameters)
+    queued = 0
+    visited = 0
+    start = time.time()
+    for variant in variants:
+        trace = Trace([Event({"concept:name": activity}) for activity in variant.split(",")])
+        alignment = a_star.apply(trace, net, im, fm, parameters=dict(parameters))
+        queued += alignment["queued_states"]
+        visited += alignment["visited_states"]
+    return time.time() - start, queued, visited
+
+
+def main():
+    bpmn_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join("test_data", "example.bpmn")
+    log_path = sys.argv[2] if len(sys.argv) > 2 else os.path.join("test_data", "example.xes")
+    operations = int(sys.argv[3]) if len(sys.argv) > 3 else 1000000
+
+    items = synthetic_workload(operations)
+    for name, run in [("heap", run_heap), ("bucket", run_bucket)]:
+        start = time.time()
+        run(items)
+        print("synthetic %d pushes, %s: %.2fs" % (operations, name, time.time() - start))
+
+    net, im, fm = converter.apply(procon.import_bpmn(bpmn_path), parameters={})
+    df = procon.import_event_log(log_path)
+    variants = sorted(set(case_statistics.get_variants_df(df)["variant"]))
+    elapsed, queued, visited = align_variants(net, im, fm, variants)
+    # the same number of pushes and pops on the heap, i.e. the share of the open set in the search
+    items = synthetic_workload(queued)
+    start = time.time()
+    run_heap(items)
+    print("%d variants: A* %.2fs, of which about %.3fs of heap operations (%d queued, %d visited states)" % (
+        len(variants), elapsed, time.time() - start, queued, visited))
+
+
+if __name__ == '__main__':
+    main()
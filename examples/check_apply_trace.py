@@ -0,0 +1,41 @@
+import os
+import sys
+import procon
+from procon.algorithm import alignments, a_star
+from procon.conversion import converter
+from procon.objects.petri_net import lp_heuristic
+from pm4py.objects.log.obj import Trace, Event
+from pm4py.statistics.traces.generic.pandas import case_statistics
+
+# Regression run of the plain public entry points: aligns the variants of an event log with alignments.apply_trace
+# without a compiled template (the incidence matrix is then built by PM4Py), with each LP backend, and compares the
+# costs with the ones obtained through the template used by compute_alignments.
+# usage: python check_apply_trace.py [model.bpmn log.xes [number of variants]]
+
+
+def main():
+    bpmn_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join("test_data", "example.bpmn")
+    log_path = sys.argv[2] if len(sys.argv) > 2 else os.path.join("test_data", "example.xes")
+    n_variants = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+    net, im, fm = converter.apply(procon.import_bpmn(bpmn_path))
+    df = procon.import_event_log(log_path)
+    variants = case_statistics.get_variants_df(df).index.tolist()[:n_variants]
+    traces = [Trace([Event({"concept:name": activity}) for activity in variant.split(",")]) for variant in variants]
+
+    template = a_star.compile_template(net, im, fm)
+    expected = [alignments.apply_trace(trace, net, im, fm, parameters={
+        a_star.Parameters.SYNC_PRODUCT_TEMPLATE: template})["cost"] for trace in traces]
+
+    failures = 0
+    for backend in lp_heuristic.Backends:
+        costs = [alignments.apply_trace(trace, net, im, fm, parameters={a_star.Parameters.LP_BACKEND: backend})["cost"]
+                 for trace in traces]
+        mismatches = sum(1 for cost, expected_cost in zip(costs, expected) if cost != expected_cost)
+        failures += mismatches
+        print("%s without template: %d variants, %d cost mismatches" % (backend.value, len(traces), mismatches))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1 +1,2 @@
-from procon.algorithm import conformance, alignments, alignments
\ No newline at end of file
+from procon.algorithm import conformance, alignments, alignments, automaton_dp, decomposition, language_alignment, \
+    alignment_cache
\ No newline at end of file
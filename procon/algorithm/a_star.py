@@ -39,11 +39,17 @@ import numpy as np
 
 from pm4py.objects.log import obj as log_implementation
 from procon.objects.petri_net import align_utils as utils
+from procon.objects.petri_net import automaton
+from procon.objects.petri_net import lp_heuristic
+from procon.objects.petri_net import properties
 from pm4py.objects.petri_net.utils.incidence_matrix import construct as inc_mat_construct
-from procon.objects.petri_net.synchronous_product import construct_cost_aware, construct, construct_estimation_net
+from procon.objects.petri_net.synchronous_product import construct_cost_aware, construct, construct_estimation_net, \
+    construct_template, construct_from_template
 from procon.objects.petri_net.utils import construct_trace_net_cost_aware, decorate_places_preset_trans, \
     decorate_transitions_prepostset, is_petri_net, is_reset_arc
-from procon.objects.petri_net.semantics import enabled_transitions
+from procon.objects.petri_net import semantics
+from procon.objects.petri_net.semantics import enabled_transitions_indexed, transitions_without_normal_preset, \
+    is_enabled_decorated
 from pm4py.util import exec_utils
 from pm4py.util.constants import PARAMETER_CONSTANT_ACTIVITY_KEY
 from pm4py.util.lp import solver as lp_solver
@@ -66,16 +72,43 @@ class Parameters(Enum):
     TRACE_NET_COST_AWARE_CONSTR_FUNCTION = "trace_net_cost_aware_constr_function"
     PARAM_MAX_ALIGN_TIME_TRACE = "max_align_time_trace"
     PARAM_MAX_ALIGN_TIME = "max_align_time"
+    PARAM_MAX_STATES_TRACE = "max_states_trace"
     PARAMETER_VARIANT_DELIMITER = "variant_delimiter"
     ACTIVITY_KEY = PARAMETER_CONSTANT_ACTIVITY_KEY
     VARIANTS_IDX = "variants_idx"
     RETURN_SYNC_COST_FUNCTION = "return_sync_cost_function"
+    SYNC_PRODUCT_TEMPLATE = "sync_product_template"
+    VECTOR_MARKINGS = "vector_markings"
+    VECTOR_MARKINGS_DTYPE = "vector_markings_dtype"
+    LP_BACKEND = "lp_backend"
+    SEARCH_VARIANT = "search_variant"
+    SUCCESSOR_CACHE_SIZE = "successor_cache_size"
+    BEAM_WIDTH = "beam_width"
+    BEAM_F_BAND = "beam_f_band"
+    HEURISTIC_CACHE_SIZE = "heuristic_cache_size"
+    AUTOMATON_MAX_STATES = "automaton_max_states"
+    CLOSURE_INDEX_SIZE = "closure_index_size"
+    REPLAY_MAX_STATES = "replay_max_states"
+
+
+class SearchVariants(Enum):
+    MARKING_EQUATION = "marking_equation"
+    # experimental, opt-in only: see apply_sync_prod_split_point
+    SPLIT_POINT = "split_point"
+    DIJKSTRA = "dijkstra"
+    BEAM = "beam"
+    AUTOMATON = "automaton"
 
 
 PARAM_TRACE_COST_FUNCTION = Parameters.PARAM_TRACE_COST_FUNCTION.value
 PARAM_MODEL_COST_FUNCTION = Parameters.PARAM_MODEL_COST_FUNCTION.value
 PARAM_SYNC_COST_FUNCTION = Parameters.PARAM_SYNC_COST_FUNCTION.value
 
+DEFAULT_BEAM_WIDTH = 50
+# alignments of fitting traces found by apply_replay
+REPLAY_SEARCH_VARIANT = "replay"
+DEFAULT_REPLAY_MAX_STATES = 10000
+
 
 def get_best_worst_cost(petri_net, initial_marking, final_marking, parameters=None):
     """
@@ -89,6 +122,10 @@ def get_best_worst_cost(petri_net, initial_marking, final_marking, parameters=No
         Initial marking
     final_marking
         Final marking
+    parameters
+        Parameters of the algorithm; if a template is passed as Parameters.SYNC_PRODUCT_TEMPLATE, the best worst cost
+        is cached on it. The search is exact (Dijkstra if requested, A* otherwise), the beam and the budgets are
+        ignored
 
     Returns
     -----------
@@ -97,13 +134,95 @@ def get_best_worst_cost(petri_net, initial_marking, final_marking, parameters=No
     """
     if parameters is None:
         parameters = {}
+    template = exec_utils.get_param_value(Parameters.SYNC_PRODUCT_TEMPLATE, parameters, None)
+    if template is not None and template.best_worst_cost is not None:
+        return template.best_worst_cost
+
+    # the best worst cost scales the fitness of every trace: it is always computed by an exact search, without the
+    # beam or the budgets of the caller
+    exact_parameters = dict(parameters)
+    for param in [Parameters.SEARCH_VARIANT, Parameters.BEAM_WIDTH, Parameters.BEAM_F_BAND,
+                  Parameters.PARAM_MAX_ALIGN_TIME_TRACE, Parameters.PARAM_MAX_STATES_TRACE]:
+        exact_parameters.pop(param, None)
+        exact_parameters.pop(param.value, None)
+    search_variant = exec_utils.get_param_value(Parameters.SEARCH_VARIANT, parameters, None)
+    exact_parameters[Parameters.SEARCH_VARIANT] = SearchVariants.DIJKSTRA if search_variant is not None and \
+        SearchVariants(search_variant) == SearchVariants.DIJKSTRA else SearchVariants.MARKING_EQUATION
+
     trace = log_implementation.Trace()
 
-    best_worst = apply(trace, petri_net, initial_marking, final_marking, parameters=parameters)
+    best_worst = apply(trace, petri_net, initial_marking, final_marking, parameters=exact_parameters)
+
+    if template is not None:
+        template.best_worst_cost = best_worst['cost']
 
     return best_worst['cost']
 
 
+def compile_template(petri_net, initial_marking, final_marking, parameters=None):
+    """
+    Compiles the model half of the synchronous product once, so that it can be reused for every trace aligned
+    against the given net (pass it as Parameters.SYNC_PRODUCT_TEMPLATE)
+
+    Parameters
+    -----------
+    petri_net
+        Petri net
+    initial_marking
+        Initial marking
+    final_marking
+        Final marking
+    parameters
+        Parameters of the algorithm (Parameters.PARAM_MODEL_COST_FUNCTION and Parameters.PARAM_SYNC_COST_FUNCTION
+        are considered, the standard costs are used otherwise; Parameters.SUCCESSOR_CACHE_SIZE bounds the cache of
+        the model-side successors shared by the variants, Parameters.HEURISTIC_CACHE_SIZE the cache of the
+        heuristic solutions shared by the variants, Parameters.CLOSURE_INDEX_SIZE the index of the tau-closures and
+        reachable labels of the model markings used to prune the model moves, 0 disables them)
+
+    Returns
+    -----------
+    template
+        Template of the synchronous product
+    """
+    if parameters is None:
+        parameters = {}
+
+    model_cost_function = exec_utils.get_param_value(Parameters.PARAM_MODEL_COST_FUNCTION, parameters, None)
+    sync_cost_function = exec_utils.get_param_value(Parameters.PARAM_SYNC_COST_FUNCTION, parameters, None)
+
+    if model_cost_function is None or sync_cost_function is None:
+        model_cost_function = dict()
+        sync_cost_function = dict()
+        for t in petri_net.transitions:
+            if t.label is not None:
+                model_cost_function[t] = utils.STD_MODEL_LOG_MOVE_COST
+                sync_cost_function[t] = utils.STD_SYNC_COST
+            else:
+                model_cost_function[t] = utils.STD_TAU_COST
+
+    successor_cache_size = exec_utils.get_param_value(Parameters.SUCCESSOR_CACHE_SIZE, parameters,
+                                                      utils.DEFAULT_SUCCESSOR_CACHE_SIZE)
+
+    heuristic_cache_size = exec_utils.get_param_value(Parameters.HEURISTIC_CACHE_SIZE, parameters,
+                                                      lp_heuristic.DEFAULT_HEURISTIC_CACHE_SIZE)
+
+    closure_index_size = exec_utils.get_param_value(Parameters.CLOSURE_INDEX_SIZE, parameters,
+                                                    utils.DEFAULT_CLOSURE_INDEX_SIZE)
+
+    template = construct_template(petri_net, initial_marking, final_marking, utils.SKIP, model_cost_function,
+                                  sync_cost_function)
+    if successor_cache_size > 0:
+        template.successor_cache = utils.ModelSuccessorCache(template.model_net, max_size=successor_cache_size)
+        if closure_index_size > 0:
+            template.successor_cache.closure_index = utils.TauClosureIndex(
+                template.successor_cache.successors, costs=template.costs, label_function=utils.model_move_label,
+                max_size=closure_index_size)
+    if heuristic_cache_size > 0:
+        template.heuristic_cache = lp_heuristic.HeuristicCache(*template.a_matrix.shape,
+                                                               max_size=heuristic_cache_size)
+    return template
+
+
 def apply(trace: Trace, petri_net: PetriNet, initial_marking: Marking, final_marking: Marking, parameters: Optional[Dict[Union[str, Parameters], Any]] = None) -> typing.AlignmentResult:
     """
     Performs the basic alignment search, given a trace and a net.
@@ -122,6 +241,7 @@ def apply(trace: Trace, petri_net: PetriNet, initial_marking: Marking, final_mar
         Parameters.PARAM_SYNC_COST_FUNCTION: :class:`dict` (parameter) mapping of each transition in the model to corresponding
         synchronous costs
         Parameters.ACTIVITY_KEY: :class:`str` (parameter) key to use to identify the activity described by the events
+        Parameters.SYNC_PRODUCT_TEMPLATE: template of the model half of the synchronous product (see compile_template)
 
     Returns
     -------
@@ -137,13 +257,17 @@ def apply(trace: Trace, petri_net: PetriNet, initial_marking: Marking, final_mar
                                                            None)
     trace_net_cost_aware_constr_function = exec_utils.get_param_value(Parameters.TRACE_NET_COST_AWARE_CONSTR_FUNCTION,
                                                                       parameters, construct_trace_net_cost_aware)
+    template = exec_utils.get_param_value(Parameters.SYNC_PRODUCT_TEMPLATE, parameters, None)
 
     if trace_cost_function is None:
         trace_cost_function = list(
             map(lambda e: utils.STD_MODEL_LOG_MOVE_COST, trace))
         parameters[Parameters.PARAM_TRACE_COST_FUNCTION] = trace_cost_function
 
-    if model_cost_function is None:
+    if model_cost_function is None and template is not None:
+        parameters[Parameters.PARAM_MODEL_COST_FUNCTION] = template.model_costs
+        parameters[Parameters.PARAM_SYNC_COST_FUNCTION] = template.sync_costs
+    elif model_cost_function is None:
         # reset variables value
         model_cost_function = dict()
         sync_cost_function = dict()
@@ -170,6 +294,121 @@ def apply(trace: Trace, petri_net: PetriNet, initial_marking: Marking, final_mar
     return alignment
 
 
+def apply_replay(trace, petri_net, initial_marking, final_marking, parameters=None):
+    """
+    Replays a trace on the net with the reset/inhibitor semantics: the events are fired in order, and between them
+    only silent transitions are searched (cheapest first). No synchronous product is constructed and no LP is
+    solved. If the final marking is reached, the alignment consists of sync and silent model moves; it is only
+    returned if it costs less than the cheapest log or visible model move of the active costs, and is then optimal.
+
+    Parameters
+    ----------
+    trace: :class:`list` input trace, assumed to be a list of events
+    petri_net: :class:`pm4py.objects.petri.net.PetriNet` the Petri net to use in the alignment
+    initial_marking: :class:`pm4py.objects.petri.net.Marking` initial marking in the Petri net
+    final_marking: :class:`pm4py.objects.petri.net.Marking` final marking in the Petri net
+    parameters: :class:`dict` (optional) dictionary containing one of the following:
+        Parameters.ACTIVITY_KEY: :class:`str` (parameter) key to use to identify the activity described by the events
+        Parameters.PARAM_MODEL_COST_FUNCTION and Parameters.PARAM_SYNC_COST_FUNCTION: costs of the model and sync
+        moves (standard costs if not provided, or the ones of Parameters.SYNC_PRODUCT_TEMPLATE)
+        Parameters.PARAM_TRACE_COST_FUNCTION: costs of the log moves of the events (standard costs if not provided)
+        Parameters.PARAM_ALIGNMENT_RESULT_IS_SYNC_PROD_AWARE: return the alignment as transition descriptions
+        Parameters.REPLAY_MAX_STATES: maximum number of (marking, position) pairs expanded (default: 10000)
+
+    Returns
+    -------
+    dictionary: `dict` with keys **alignment**, **cost**, **visited_states**, **queued_states**, **traversed_arcs**
+    and **lp_solved**; None if the trace does not fit the net (or the bound is exceeded)
+    """
+    if parameters is None:
+        parameters = {}
+
+    activity_key = exec_utils.get_param_value(Parameters.ACTIVITY_KEY, parameters, DEFAULT_NAME_KEY)
+    ret_tuple_as_trans_desc = exec_utils.get_param_value(Parameters.PARAM_ALIGNMENT_RESULT_IS_SYNC_PROD_AWARE,
+                                                         parameters, False)
+    model_cost_function = exec_utils.get_param_value(Parameters.PARAM_MODEL_COST_FUNCTION, parameters, None)
+    sync_cost_function = exec_utils.get_param_value(Parameters.PARAM_SYNC_COST_FUNCTION, parameters, None)
+    template = exec_utils.get_param_value(Parameters.SYNC_PRODUCT_TEMPLATE, parameters, None)
+    max_states = exec_utils.get_param_value(Parameters.REPLAY_MAX_STATES, parameters, DEFAULT_REPLAY_MAX_STATES)
+    trace_cost_function = exec_utils.get_param_value(Parameters.PARAM_TRACE_COST_FUNCTION, parameters, None)
+    if (model_cost_function is None or sync_cost_function is None) and template is not None:
+        model_cost_function, sync_cost_function = template.model_costs, template.sync_costs
+
+    activities = [event[activity_key] for event in trace]
+    n = len(activities)
+    # any alignment with a deviation costs at least the cheapest log or visible model move
+    deviation_cost = utils.STD_MODEL_LOG_MOVE_COST
+    if trace_cost_function is not None and n > 0:
+        deviation_cost = min(trace_cost_function[i] for i in range(n))
+    if model_cost_function is not None:
+        deviation_cost = min([deviation_cost] + [model_cost_function[t] for t in petri_net.transitions
+                                                 if t.label is not None and t in model_cost_function])
+    start = (initial_marking, 0)
+    best_g = {start: 0}
+    parents = {}
+    open_set = [(0, 0, start)]
+    counter = 1
+    closed = set()
+    visited = 0
+    queued = 0
+    traversed = 0
+    while open_set:
+        g, _, node = heapq.heappop(open_set)
+        if g >= deviation_cost:
+            # an alignment with deviations might be cheaper
+            return None
+        if node in closed:
+            continue
+        marking, position = node
+        if position == n and marking == final_marking:
+            return __reconstruct_replay_alignment(activities, parents, node, g, visited, queued, traversed,
+                                                  ret_tuple_as_trans_desc)
+        closed.add(node)
+        visited += 1
+        if visited > max_states:
+            return None
+        for t in semantics.enabled_transitions(petri_net, marking):
+            if t.label is None:
+                new_node = (semantics.execute(t, petri_net, marking), position)
+                cost = model_cost_function[t] if model_cost_function is not None else utils.STD_TAU_COST
+            elif position < n and t.label == activities[position]:
+                new_node = (semantics.execute(t, petri_net, marking), position + 1)
+                cost = sync_cost_function[t] if sync_cost_function is not None else utils.STD_SYNC_COST
+            else:
+                continue
+            traversed += 1
+            if new_node in closed:
+                continue
+            new_g = g + cost
+            if best_g.get(new_node, sys.maxsize) <= new_g:
+                continue
+            best_g[new_node] = new_g
+            parents[new_node] = (node, t)
+            queued += 1
+            heapq.heappush(open_set, (new_g, counter, new_node))
+            counter += 1
+    return None
+
+
+def __reconstruct_replay_alignment(activities, parents, node, cost, visited, queued, traversed,
+                                   ret_tuple_as_trans_desc):
+    skip = utils.SKIP
+    moves = []
+    while node in parents:
+        node, t = parents[node]
+        if t.label is None:
+            moves.append(((skip, t.name), (skip, None)))
+        else:
+            position = node[1]
+            # names of the transitions of the trace net, see construct_trace_net_cost_aware
+            moves.append((("t_" + activities[position] + "_" + str(position), t.name),
+                          (activities[position], t.label)))
+    moves.reverse()
+    alignment = moves if ret_tuple_as_trans_desc else [move[1] for move in moves]
+    return {'alignment': alignment, 'cost': cost, 'visited_states': visited, 'queued_states': queued,
+            'traversed_arcs': traversed, 'lp_solved': 0, 'search_variant': REPLAY_SEARCH_VARIANT}
+
+
 def apply_from_variant(variant, petri_net, initial_marking, final_marking, parameters=None):
     """
     Apply the alignments from the specification of a single variant
@@ -339,10 +578,27 @@ def apply_trace_net(petri_net, initial_marking, final_marking, trace_net, trace_
             synchronous costs
             Parameters.ACTIVITY_KEY: :class:`str` (parameter) key to use to identify the activity described by the events
             Parameters.PARAM_TRACE_NET_COSTS: :class:`dict` (parameter) mapping between transitions and costs
+            Parameters.SYNC_PRODUCT_TEMPLATE: template of the model half of the synchronous product, the model
+            markings of the template are used
+            Parameters.VECTOR_MARKINGS: :class:`bool` (parameter) search on markings encoded as compact vectors
+            Parameters.VECTOR_MARKINGS_DTYPE: numpy dtype of the vector encoding (default: int8)
+            Parameters.LP_BACKEND: backend solving the heuristic, a member of lp_heuristic.Backends or its value
+            (default: lp_heuristic.Backends.PM4PY)
+            Parameters.PARAM_MAX_STATES_TRACE: :class:`int` (parameter) maximum number of states expanded for the
+            alignment of the trace (not considered by SearchVariants.BEAM, whose states are bounded by the beam)
+            Parameters.SEARCH_VARIANT: search performed on the synchronous product, a member of SearchVariants or its
+            value (default: SearchVariants.MARKING_EQUATION)
+            Parameters.BEAM_WIDTH: :class:`int` states kept per depth by SearchVariants.BEAM (default: 50)
+            Parameters.BEAM_F_BAND: :class:`float` (optional) SearchVariants.BEAM only keeps the states whose f is at
+            most this much above the best f of the depth
+            Parameters.AUTOMATON_MAX_STATES: :class:`int` maximum number of states of the reachability graph explored
+            by SearchVariants.AUTOMATON; beyond it, the trace is aligned by SearchVariants.MARKING_EQUATION
+            (default: 10000)
 
         Returns
         -------
-        dictionary: `dict` with keys **alignment**, **cost**, **visited_states**, **queued_states** and **traversed_arcs**
+        dictionary: `dict` with keys **alignment**, **cost**, **visited_states**, **queued_states**, **traversed_arcs**
+        and **search_variant** (value of the search variant used); None if the time or state budget is exceeded
         """
     if parameters is None:
         parameters = {}
@@ -354,6 +610,27 @@ def apply_trace_net(petri_net, initial_marking, final_marking, trace_net, trace_
     model_cost_function = exec_utils.get_param_value(Parameters.PARAM_MODEL_COST_FUNCTION, parameters, None)
     sync_cost_function = exec_utils.get_param_value(Parameters.PARAM_SYNC_COST_FUNCTION, parameters, None)
     trace_net_costs = exec_utils.get_param_value(Parameters.PARAM_TRACE_NET_COSTS, parameters, None)
+    template = exec_utils.get_param_value(Parameters.SYNC_PRODUCT_TEMPLATE, parameters, None)
+    incidence_matrix = None
+    max_align_time_trace = exec_utils.get_param_value(Parameters.PARAM_MAX_ALIGN_TIME_TRACE, parameters,
+                                                      sys.maxsize)
+    max_states_trace = exec_utils.get_param_value(Parameters.PARAM_MAX_STATES_TRACE, parameters, sys.maxsize)
+    search_variant = SearchVariants(exec_utils.get_param_value(Parameters.SEARCH_VARIANT, parameters,
+                                                               SearchVariants.MARKING_EQUATION))
+    return_sync_cost = exec_utils.get_param_value(Parameters.RETURN_SYNC_COST_FUNCTION, parameters, False)
+
+    if search_variant == SearchVariants.AUTOMATON and not return_sync_cost:
+        model_automaton = get_automaton(petri_net, initial_marking, final_marking, parameters=parameters)
+        if model_automaton is not None:
+            alignment = apply_automaton(model_automaton, trace_net, trace_im, trace_net_costs=trace_net_costs,
+                                        ret_tuple_as_trans_desc=ret_tuple_as_trans_desc,
+                                        max_align_time_trace=max_align_time_trace,
+                                        max_states_trace=max_states_trace)
+            if alignment is not None:
+                alignment["search_variant"] = search_variant.value
+            return alignment
+        # the reachability graph exceeds the bound
+        search_variant = SearchVariants.MARKING_EQUATION
 
     if trace_cost_function is None or model_cost_function is None or sync_cost_function is None:
         sync_prod, sync_initial_marking, sync_final_marking = construct(trace_net, trace_im,
@@ -362,6 +639,9 @@ def apply_trace_net(petri_net, initial_marking, final_marking, trace_net, trace_
                                                                         final_marking,
                                                                         utils.SKIP)
         cost_function = utils.construct_standard_cost_function(sync_prod, utils.SKIP)
+    elif template is not None:
+        sync_prod, sync_initial_marking, sync_final_marking, cost_function, incidence_matrix = \
+            construct_from_template(template, trace_net, trace_im, trace_fm, trace_net_costs)
     else:
         revised_sync = dict()
         for t_trace in trace_net.transitions:
@@ -373,14 +653,58 @@ def apply_trace_net(petri_net, initial_marking, final_marking, trace_net, trace_
             trace_net, trace_im, trace_fm, petri_net, initial_marking, final_marking, utils.SKIP,
             trace_net_costs, model_cost_function, revised_sync)
 
-    max_align_time_trace = exec_utils.get_param_value(Parameters.PARAM_MAX_ALIGN_TIME_TRACE, parameters,
-                                                      sys.maxsize)
-
-    alignment = apply_sync_prod(sync_prod, sync_initial_marking, sync_final_marking, cost_function,
-                           utils.SKIP, ret_tuple_as_trans_desc=ret_tuple_as_trans_desc,
-                           max_align_time_trace=max_align_time_trace)
+    vector_markings = exec_utils.get_param_value(Parameters.VECTOR_MARKINGS, parameters, False)
+    vector_markings_dtype = exec_utils.get_param_value(Parameters.VECTOR_MARKINGS_DTYPE, parameters, np.int8)
+    lp_backend = exec_utils.get_param_value(Parameters.LP_BACKEND, parameters, lp_heuristic.DEFAULT_BACKEND)
+    # the model-side successors are only shared between synchronous products built from the same template
+    successor_cache = template.successor_cache if incidence_matrix is not None else None
+    if successor_cache is not None:
+        cache_hits, cache_misses = successor_cache.hits, successor_cache.misses
+        if successor_cache.closure_index is not None:
+            closure_pruned = successor_cache.closure_index.pruned
+    # so are the heuristic solutions (marking equation only)
+    heuristic_cache = template.heuristic_cache if incidence_matrix is not None else None
+    if heuristic_cache is not None:
+        heuristic_hits, heuristic_misses = heuristic_cache.hits, heuristic_cache.misses
+
+    if search_variant == SearchVariants.BEAM:
+        beam_width = exec_utils.get_param_value(Parameters.BEAM_WIDTH, parameters, DEFAULT_BEAM_WIDTH)
+        beam_f_band = exec_utils.get_param_value(Parameters.BEAM_F_BAND, parameters, None)
+        alignment = apply_sync_prod_beam(sync_prod, sync_initial_marking, sync_final_marking, cost_function,
+                                         utils.SKIP, beam_width=beam_width, beam_f_band=beam_f_band,
+                                         ret_tuple_as_trans_desc=ret_tuple_as_trans_desc,
+                                         max_align_time_trace=max_align_time_trace,
+                                         incidence_matrix=incidence_matrix, lp_backend=lp_backend,
+                                         successor_cache=successor_cache)
+    elif search_variant == SearchVariants.DIJKSTRA:
+        alignment = apply_sync_prod_dijkstra(sync_prod, sync_initial_marking, sync_final_marking, cost_function,
+                                             utils.SKIP, ret_tuple_as_trans_desc=ret_tuple_as_trans_desc,
+                                             max_align_time_trace=max_align_time_trace, max_states_trace=max_states_trace,
+                                             decorated=incidence_matrix is not None, successor_cache=successor_cache)
+    elif search_variant == SearchVariants.SPLIT_POINT:
+        alignment = apply_sync_prod_split_point(sync_prod, sync_initial_marking, sync_final_marking, cost_function,
+                                                utils.SKIP, ret_tuple_as_trans_desc=ret_tuple_as_trans_desc,
+                                                max_align_time_trace=max_align_time_trace,
+                                                max_states_trace=max_states_trace, incidence_matrix=incidence_matrix,
+                                                lp_backend=lp_backend)
+    else:
+        alignment = apply_sync_prod(sync_prod, sync_initial_marking, sync_final_marking, cost_function,
+                               utils.SKIP, ret_tuple_as_trans_desc=ret_tuple_as_trans_desc,
+                               max_align_time_trace=max_align_time_trace, max_states_trace=max_states_trace,
+                               incidence_matrix=incidence_matrix, vector_markings=vector_markings, vector_markings_dtype=vector_markings_dtype,
+                               lp_backend=lp_backend, successor_cache=successor_cache,
+                               heuristic_cache=heuristic_cache)
+    if alignment is not None:
+        alignment["search_variant"] = search_variant.value
+        if successor_cache is not None:
+            alignment["successor_cache_hits"] = successor_cache.hits - cache_hits
+            alignment["successor_cache_misses"] = successor_cache.misses - cache_misses
+            if successor_cache.closure_index is not None:
+                alignment["closure_pruned_states"] = successor_cache.closure_index.pruned - closure_pruned
+        if heuristic_cache is not None:
+            alignment["heuristic_cache_hits"] = heuristic_cache.hits - heuristic_hits
+            alignment["heuristic_cache_misses"] = heuristic_cache.misses - heuristic_misses
 
-    return_sync_cost = exec_utils.get_param_value(Parameters.RETURN_SYNC_COST_FUNCTION, parameters, False)
     if return_sync_cost:
         # needed for the decomposed alignments (switching them from state_equation_less_memory)
         return alignment, cost_function
@@ -389,7 +713,9 @@ def apply_trace_net(petri_net, initial_marking, final_marking, trace_net, trace_
 
 
 def apply_sync_prod(sync_prod, initial_marking, final_marking, cost_function, skip, ret_tuple_as_trans_desc=False,
-                    max_align_time_trace=sys.maxsize):
+                    max_align_time_trace=sys.maxsize, incidence_matrix=None, vector_markings=False,
+                    vector_markings_dtype=np.int8, lp_backend=lp_heuristic.DEFAULT_BACKEND, successor_cache=None,
+                    max_states_trace=sys.maxsize, heuristic_cache=None):
     """
     Performs the basic alignment search on top of the synchronous product net, given a cost function and skip-symbol
 
@@ -400,6 +726,17 @@ def apply_sync_prod(sync_prod, initial_marking, final_marking, cost_function, sk
     final_marking: :class:`pm4py.objects.petri.net.Marking` final marking in the synchronous product net
     cost_function: :class:`dict` cost function mapping transitions to the synchronous product net
     skip: :class:`Any` symbol to use for skips in the alignment
+    incidence_matrix: incidence matrix of the estimation net, if already known (synchronous products constructed
+    from a template); the transitions of the net are expected to be decorated in that case
+    vector_markings: :class:`bool` if True, the markings of the search space are encoded as compact vectors
+    (see :class:`procon.objects.petri_net.align_utils.CompactMarkingEncoding`)
+    vector_markings_dtype: numpy dtype of the vector encoding, must hold the maximum number of tokens of a place
+    lp_backend: backend solving the heuristic (see :class:`procon.objects.petri_net.lp_heuristic.Backends`)
+    successor_cache: :class:`procon.objects.petri_net.align_utils.ModelSuccessorCache` cache of the model-side
+    successors (only for synchronous products built from a template, not used with vector markings)
+    max_states_trace: maximum number of states expanded for the alignment of the trace
+    heuristic_cache: :class:`procon.objects.petri_net.lp_heuristic.HeuristicCache` cache of the heuristic solutions
+    (only for synchronous products built from a template)
 
     Returns
     -------
@@ -407,90 +744,677 @@ def apply_sync_prod(sync_prod, initial_marking, final_marking, cost_function, sk
     and **traversed_arcs**
     """
     return __search(sync_prod, initial_marking, final_marking, cost_function, skip,
-                    ret_tuple_as_trans_desc=ret_tuple_as_trans_desc, max_align_time_trace=max_align_time_trace)
+                    ret_tuple_as_trans_desc=ret_tuple_as_trans_desc, max_align_time_trace=max_align_time_trace,
+                    incidence_matrix=incidence_matrix, vector_markings=vector_markings,
+                    vector_markings_dtype=vector_markings_dtype, lp_backend=lp_backend,
+                    successor_cache=successor_cache, max_states_trace=max_states_trace,
+                    heuristic_cache=heuristic_cache)
 
 
-def __search(sync_net, ini, fin, cost_function, skip, ret_tuple_as_trans_desc=False,
-             max_align_time_trace=sys.maxsize):
+def apply_sync_prod_dijkstra(sync_prod, initial_marking, final_marking, cost_function, skip,
+                             ret_tuple_as_trans_desc=False, max_align_time_trace=sys.maxsize, decorated=False,
+                             successor_cache=None, max_states_trace=sys.maxsize):
+    """
+    Performs an uninformed (Dijkstra) alignment search on top of the synchronous product net, respecting its reset
+    and inhibitor arcs. No LP is set up or solved, which pays off for short traces and small models.
+
+    Parameters
+    ----------
+    sync_prod: :class:`pm4py.objects.petri.net.PetriNet` synchronous product net
+    initial_marking: :class:`pm4py.objects.petri.net.Marking` initial marking in the synchronous product net
+    final_marking: :class:`pm4py.objects.petri.net.Marking` final marking in the synchronous product net
+    cost_function: :class:`dict` cost function mapping transitions to the synchronous product net
+    skip: :class:`Any` symbol to use for skips in the alignment
+    ret_tuple_as_trans_desc: :class:`bool` whether to return the alignment as transition descriptions
+    max_align_time_trace: maximum time (in seconds) for the alignment of the trace
+    decorated: :class:`bool` whether the transitions and places of the net are already decorated (e.g. when
+    constructed from a template)
+    successor_cache: :class:`procon.objects.petri_net.align_utils.ModelSuccessorCache` cache of the model-side
+    successors (only for synchronous products built from a template)
+    max_states_trace: maximum number of states expanded for the alignment of the trace
+
+    Returns
+    -------
+    dictionary : :class:`dict` with keys **alignment**, **cost**, **visited_states**, **queued_states**,
+    **traversed_arcs** and **lp_solved**
+    """
+    return __search_dijkstra(sync_prod, initial_marking, final_marking, cost_function, skip,
+                             ret_tuple_as_trans_desc=ret_tuple_as_trans_desc,
+                             max_align_time_trace=max_align_time_trace, decorated=decorated,
+                             successor_cache=successor_cache, max_states_trace=max_states_trace)
+
+
+def __search_dijkstra(sync_net, ini, fin, cost_function, skip, ret_tuple_as_trans_desc=False,
+                      max_align_time_trace=sys.maxsize, decorated=False, successor_cache=None,
+                      max_states_trace=sys.maxsize):
     start_time = time.time()
-    estimation_net = None
 
-    decorate_transitions_prepostset(sync_net)
-    decorate_places_preset_trans(sync_net)
+    if not decorated:
+        decorate_transitions_prepostset(sync_net)
+        decorate_places_preset_trans(sync_net)
 
-    estimation_net, cost_function = (sync_net, cost_function) if is_petri_net(sync_net) else construct_estimation_net(sync_net, cost_function)
-    incidence_matrix = inc_mat_construct(estimation_net)
-    ini_vec, fin_vec, cost_vec = utils.__vectorize_initial_final_cost(incidence_matrix, ini, fin, cost_function)
+    trans_wo_normal_preset = transitions_without_normal_preset(sync_net)
+    open_set = [utils.DijkstraSearchTuple(0, ini, None, None, 0)]
+    closed = set()
+    # best known cost per marking: pushes reaching a queued marking at no lower cost are dropped
+    best_g = {ini: 0}
+    visited = 0
+    queued = 0
+    traversed = 0
+    pruned = 0
+
+    while not len(open_set) == 0:
+        if (time.time() - start_time) > max_align_time_trace:
+            return None
+
+        curr = heapq.heappop(open_set)
+        current_marking = curr.m
+        if current_marking in closed:
+            continue
+
+        if current_marking == fin:
+            alignment = utils.__reconstruct_alignment(curr, visited, queued, traversed,
+                                                      ret_tuple_as_trans_desc=ret_tuple_as_trans_desc, lp_solved=0)
+            alignment["pruned_states"] = pruned
+            return alignment
+
+        closed.add(current_marking)
+        visited += 1
+        if visited > max_states_trace:
+            return None
+
+        if successor_cache is not None:
+            # without heuristic, the model moves after which the next event cannot be synchronized any more are
+            # worth pruning (the marking equation heuristic already penalizes them)
+            successors = __cached_successors(current_marking, cost_function, successor_cache,
+                                             closure_index=successor_cache.closure_index)
+        else:
+            successors = __enabled_successors(current_marking, cost_function, skip, trans_wo_normal_preset)
 
+        for t, cost, new_marking in successors:
+            traversed += 1
+            if new_marking in closed:
+                continue
+            g = curr.g + cost
+            if best_g.get(new_marking, sys.maxsize) <= g:
+                pruned += 1
+                continue
+            best_g[new_marking] = g
+            queued += 1
+            heapq.heappush(open_set, utils.DijkstraSearchTuple(g, new_marking, curr, t, curr.l + 1))
+
+
+def get_automaton(petri_net, initial_marking, final_marking, parameters=None):
+    """
+    Gets the automaton (reachability graph) of the net used by SearchVariants.AUTOMATON. When a template is passed
+    as Parameters.SYNC_PRODUCT_TEMPLATE, the automaton is explored once with the costs of the template and cached
+    on it, otherwise it is explored on each call
+
+    Parameters
+    -----------
+    petri_net
+        Petri net
+    initial_marking
+        Initial marking
+    final_marking
+        Final marking
+    parameters
+        Parameters of the algorithm (Parameters.AUTOMATON_MAX_STATES, Parameters.SYNC_PRODUCT_TEMPLATE,
+        Parameters.PARAM_MODEL_COST_FUNCTION and Parameters.PARAM_SYNC_COST_FUNCTION)
+
+    Returns
+    -----------
+    model_automaton
+        :class:`procon.objects.petri_net.automaton.ModelAutomaton`, None if the reachability graph exceeds the bound
+    """
+    if parameters is None:
+        parameters = {}
+
+    template = exec_utils.get_param_value(Parameters.SYNC_PRODUCT_TEMPLATE, parameters, None)
+    if template is not None and template.automaton is not None:
+        return template.automaton if template.automaton is not False else None
+
+    max_states = exec_utils.get_param_value(Parameters.AUTOMATON_MAX_STATES, parameters,
+                                            automaton.DEFAULT_MAX_STATES)
+    if template is not None:
+        model_cost_function, sync_cost_function = template.model_costs, template.sync_costs
+    else:
+        model_cost_function = exec_utils.get_param_value(Parameters.PARAM_MODEL_COST_FUNCTION, parameters, None)
+        sync_cost_function = exec_utils.get_param_value(Parameters.PARAM_SYNC_COST_FUNCTION, parameters, None)
+    model_automaton = automaton.build(petri_net, initial_marking, final_marking,
+                                      model_cost_function=model_cost_function,
+                                      sync_cost_function=sync_cost_function, max_states=max_states)
+    if template is not None:
+        # False records that the exploration exceeded the bound
+        template.automaton = model_automaton if model_automaton is not None else False
+    return model_automaton
+
+
+def apply_automaton(model_automaton, trace_net, trace_im, trace_net_costs=None, ret_tuple_as_trans_desc=False,
+                    max_align_time_trace=sys.maxsize, max_states_trace=sys.maxsize):
+    """
+    Aligns a trace net against the automaton of a model: shortest path search over pairs (state of the automaton,
+    position in the trace), where model moves, sync moves and the end of the trace are taken from the tau-closure of
+    the state. No synchronous product is constructed and no LP is solved.
+
+    Parameters
+    ----------
+    model_automaton: :class:`procon.objects.petri_net.automaton.ModelAutomaton` automaton of the model
+    trace_net: :class:`pm4py.objects.petri.net.PetriNet` trace net (sequence of transitions)
+    trace_im: :class:`pm4py.objects.petri.net.Marking` initial marking of the trace net
+    trace_net_costs: :class:`dict` costs of the transitions of the trace net as log moves (standard costs if None)
+    ret_tuple_as_trans_desc: :class:`bool` whether to return the alignment as transition descriptions
+    max_align_time_trace: maximum time (in seconds) for the alignment of the trace
+    max_states_trace: maximum number of states expanded for the alignment of the trace
+
+    Returns
+    -------
+    dictionary : :class:`dict` with keys **alignment**, **cost**, **visited_states**, **queued_states**,
+    **traversed_arcs** and **lp_solved**; None if the time or state budget is exceeded
+    """
+    # the trace net is a sequence: follow it from its initial place
+    trace = []
+    place = next(iter(trace_im))
+    while len(place.out_arcs) > 0:
+        t = next(iter(place.out_arcs)).target
+        trace.append(t)
+        place = next(iter(t.out_arcs)).target
+    trace_costs = [trace_net_costs[t] if trace_net_costs is not None else utils.STD_MODEL_LOG_MOVE_COST
+                   for t in trace]
+    return __search_automaton(model_automaton, trace, trace_costs, ret_tuple_as_trans_desc=ret_tuple_as_trans_desc,
+                              max_align_time_trace=max_align_time_trace, max_states_trace=max_states_trace)
+
+
+def __search_automaton(model_automaton, trace, trace_costs, ret_tuple_as_trans_desc=False,
+                       max_align_time_trace=sys.maxsize, max_states_trace=sys.maxsize):
+    start_time = time.time()
+
+    n = len(trace)
+    trace_labels = [model_automaton.label_index.get(t.label, automaton.TAU - 1) for t in trace]
+    edge_labels = model_automaton.edge_labels
+    targets = model_automaton.targets
+    model_costs = model_automaton.model_costs
+    sync_costs = model_automaton.sync_costs
+    final = model_automaton.final
+
+    # nodes are (state, position), the goal is (None, n); a move is (kind, edge or position, silent edges before it)
+    start = (model_automaton.initial, 0)
+    best_g = {start: 0}
+    parents = {}
+    open_set = [(0, 0, start)]
+    counter = 1
     closed = set()
+    visited = 0
+    queued = 0
+    traversed = 0
+
+    while open_set:
+        if (time.time() - start_time) > max_align_time_trace:
+            return None
+
+        g, _, node = heapq.heappop(open_set)
+        if node in closed:
+            continue
+        if node[0] is None:
+            return __reconstruct_automaton_alignment(model_automaton, trace, parents, node, g, visited, queued,
+                                                     traversed, ret_tuple_as_trans_desc)
+        closed.add(node)
+        visited += 1
+        if visited > max_states_trace:
+            return None
 
-    a_matrix = np.asmatrix(incidence_matrix.a_matrix).astype(np.float64)
+        state, position = node
+        successors = []
+        if position < n:
+            successors.append(((state, position + 1), trace_costs[position], ("log", position, ())))
+        for closure_state, tau_cost, tau_edges in model_automaton.tau_closure(state):
+            if position == n and final[closure_state]:
+                successors.append(((None, n), tau_cost, ("end", None, tau_edges)))
+            for e in model_automaton.edges(closure_state):
+                label = edge_labels[e]
+                if label == automaton.TAU:
+                    continue
+                target = int(targets[e])
+                successors.append(((target, position), tau_cost + int(model_costs[e]), ("model", e, tau_edges)))
+                if position < n and label == trace_labels[position] and sync_costs[e] >= 0:
+                    successors.append(((target, position + 1), tau_cost + int(sync_costs[e]),
+                                       ("sync", e, tau_edges)))
+
+        for new_node, cost, move in successors:
+            traversed += 1
+            if new_node in closed:
+                continue
+            new_g = g + cost
+            if best_g.get(new_node, sys.maxsize) <= new_g:
+                continue
+            best_g[new_node] = new_g
+            parents[new_node] = (node, move)
+            queued += 1
+            heapq.heappush(open_set, (new_g, counter, new_node))
+            counter += 1
+
+
+def __reconstruct_automaton_alignment(model_automaton, trace, parents, node, cost, visited, queued, traversed,
+                                      ret_tuple_as_trans_desc):
+    skip = utils.SKIP
+    steps = []
+    while node in parents:
+        node, (kind, index, tau_edges) = parents[node]
+        position = node[1]
+        moves = []
+        for e in tau_edges:
+            t = model_automaton.transitions[model_automaton.edge_transitions[e]]
+            moves.append(((skip, t.name), (skip, t.label)))
+        if kind == "log":
+            moves.append(((trace[index].name, skip), (trace[index].label, skip)))
+        elif kind == "model":
+            t = model_automaton.transitions[model_automaton.edge_transitions[index]]
+            moves.append(((skip, t.name), (skip, t.label)))
+        elif kind == "sync":
+            t = model_automaton.transitions[model_automaton.edge_transitions[index]]
+            moves.append(((trace[position].name, t.name), (trace[position].label, t.label)))
+        steps.append(moves)
+    alignment = [move if ret_tuple_as_trans_desc else move[1] for moves in reversed(steps) for move in moves]
+    return {'alignment': alignment, 'cost': cost, 'visited_states': visited, 'queued_states': queued,
+            'traversed_arcs': traversed, 'lp_solved': 0}
+
+
+def apply_sync_prod_beam(sync_prod, initial_marking, final_marking, cost_function, skip,
+                         beam_width=DEFAULT_BEAM_WIDTH, beam_f_band=None, ret_tuple_as_trans_desc=False,
+                         max_align_time_trace=sys.maxsize, incidence_matrix=None,
+                         lp_backend=lp_heuristic.DEFAULT_BACKEND, successor_cache=None):
+    """
+    Performs an approximate alignment search (beam search) on top of the synchronous product net: the states are
+    expanded depth by depth and only the best beam_width states of each depth (by f = g + h, optionally only those
+    within beam_f_band of the best one) are kept. The returned alignment is valid but not necessarily optimal; the
+    heuristic of the initial marking is reported as a lower bound of the optimal cost.
+
+    Parameters
+    ----------
+    sync_prod: :class:`pm4py.objects.petri.net.PetriNet` synchronous product net
+    initial_marking: :class:`pm4py.objects.petri.net.Marking` initial marking in the synchronous product net
+    final_marking: :class:`pm4py.objects.petri.net.Marking` final marking in the synchronous product net
+    cost_function: :class:`dict` cost function mapping transitions to the synchronous product net
+    skip: :class:`Any` symbol to use for skips in the alignment
+    beam_width: :class:`int` number of states kept per depth
+    beam_f_band: :class:`float` (optional) maximum distance of the f of a kept state from the best f of its depth
+    ret_tuple_as_trans_desc: :class:`bool` whether to return the alignment as transition descriptions
+    max_align_time_trace: maximum time (in seconds) for the alignment of the trace
+    incidence_matrix: incidence matrix of the estimation net of the synchronous product (e.g. when constructed
+    from a template); the transitions of the net are expected to be decorated in that case
+    lp_backend: backend solving the heuristic (see :class:`procon.objects.petri_net.lp_heuristic.Backends`)
+    successor_cache: :class:`procon.objects.petri_net.align_utils.ModelSuccessorCache` cache of the model-side
+    successors (only for synchronous products built from a template)
+
+    Returns
+    -------
+    dictionary : :class:`dict` with keys **alignment**, **cost**, **visited_states**, **queued_states**,
+    **traversed_arcs**, **lp_solved**, **lower_bound** (heuristic of the initial marking) and **optimality_gap**
+    (cost - lower_bound); None if no state of the beam reaches the final marking
+    """
+    return __search_beam(sync_prod, initial_marking, final_marking, cost_function, skip, beam_width=beam_width,
+                         beam_f_band=beam_f_band, ret_tuple_as_trans_desc=ret_tuple_as_trans_desc,
+                         max_align_time_trace=max_align_time_trace, incidence_matrix=incidence_matrix,
+                         lp_backend=lp_backend, successor_cache=successor_cache)
 
-    g_matrix = -np.eye(len(estimation_net.transitions))
-    h_cvx = np.matrix(np.zeros(len(estimation_net.transitions))).transpose()
-    cost_vec = [x * 1.0 for x in cost_vec]
 
-    use_cvxopt = False
-    if lp_solver.DEFAULT_LP_SOLVER_VARIANT == lp_solver.CVXOPT_SOLVER_CUSTOM_ALIGN or lp_solver.DEFAULT_LP_SOLVER_VARIANT == lp_solver.CVXOPT_SOLVER_CUSTOM_ALIGN_ILP:
-        use_cvxopt = True
+def __search_beam(sync_net, ini, fin, cost_function, skip, beam_width=DEFAULT_BEAM_WIDTH, beam_f_band=None,
+                  ret_tuple_as_trans_desc=False, max_align_time_trace=sys.maxsize, incidence_matrix=None,
+                  lp_backend=lp_heuristic.DEFAULT_BACKEND, successor_cache=None):
+    start_time = time.time()
+
+    if incidence_matrix is None:
+        decorate_transitions_prepostset(sync_net)
+        decorate_places_preset_trans(sync_net)
 
-    if use_cvxopt:
-        # not available in the latest version of PM4Py
-        from cvxopt import matrix
+        estimation_net, cost_function = (sync_net, cost_function) if is_petri_net(sync_net) else construct_estimation_net(sync_net, cost_function)
+        incidence_matrix = inc_mat_construct(estimation_net)
+    ini_vec, fin_vec, cost_vec = utils.__vectorize_initial_final_cost(incidence_matrix, ini, fin, cost_function)
 
-        a_matrix = matrix(a_matrix)
-        g_matrix = matrix(g_matrix)
-        h_cvx = matrix(h_cvx)
-        cost_vec = matrix(cost_vec)
+    solver = lp_heuristic.get_solver(incidence_matrix.a_matrix, cost_vec, fin_vec, backend=lp_backend)
+    h, x = solver.solve(incidence_matrix.encode_marking(ini))
+    lower_bound = h
+    trans_wo_normal_preset = transitions_without_normal_preset(sync_net)
 
-    h, x = utils.__compute_exact_heuristic_new_version(estimation_net, a_matrix, h_cvx, g_matrix, cost_vec, incidence_matrix,
-                                                    ini,
-                                                    fin_vec, lp_solver.DEFAULT_LP_SOLVER_VARIANT,
-                                                    use_cvxopt=use_cvxopt)
-    ini_state = utils.SearchTuple(0 + h, 0, h, ini, None, None, x, True)
-    open_set = [ini_state]
+    beam = [utils.SearchTuple(0 + h, 0, h, ini, None, None, x, True)]
+    # a marking is expanded again when reached at a deeper depth with a lower cost
+    expanded_g = {}
+    best = None
+    visited = 0
+    queued = 0
+    traversed = 0
+
+    while not len(beam) == 0:
+        if (time.time() - start_time) > max_align_time_trace:
+            return None
+
+        candidates = {}
+        for curr in beam:
+            if curr.m == fin:
+                if best is None or curr.g < best.g:
+                    best = curr
+                continue
+            if best is not None and curr.f >= best.g:
+                continue
+            expanded_g[curr.m] = curr.g
+            visited += 1
+
+            if successor_cache is not None:
+                successors = __cached_successors(curr.m, cost_function, successor_cache)
+            else:
+                successors = __enabled_successors(curr.m, cost_function, skip, trans_wo_normal_preset)
+            for t, cost, new_marking in successors:
+                traversed += 1
+                g = curr.g + cost
+                if new_marking in expanded_g and expanded_g[new_marking] <= g:
+                    continue
+                if new_marking in candidates and candidates[new_marking].g <= g:
+                    continue
+                queued += 1
+                h, x = utils.__derive_heuristic(incidence_matrix, cost_vec, curr.x, t, curr.h)
+                candidates[new_marking] = utils.SearchTuple(g + h, g, h, new_marking, curr, t, x,
+                                                            utils.__trust_solution(x))
+
+        # only the candidates that would enter the beam get their heuristic computed exactly
+        open_set = list(candidates.values())
+        heapq.heapify(open_set)
+        beam = []
+        while open_set and len(beam) < beam_width:
+            curr = heapq.heappop(open_set)
+            if not curr.trust:
+                h, x = solver.solve(incidence_matrix.encode_marking(curr.m))
+                heapq.heappush(open_set, utils.SearchTuple(curr.g + h, curr.g, h, curr.m, curr.p, curr.t, x, True))
+                continue
+            if curr.h > lp_solver.MAX_ALLOWED_HEURISTICS:
+                continue
+            if beam_f_band is not None and beam and curr.f > beam[0].f + beam_f_band:
+                break
+            beam.append(curr)
+
+    if best is None:
+        return None
+    alignment = utils.__reconstruct_alignment(best, visited, queued, traversed,
+                                              ret_tuple_as_trans_desc=ret_tuple_as_trans_desc,
+                                              lp_solved=solver.solved)
+    alignment["lower_bound"] = lower_bound
+    alignment["optimality_gap"] = best.g - lower_bound
+    return alignment
+
+
+def apply_sync_prod_split_point(sync_prod, initial_marking, final_marking, cost_function, skip,
+                                ret_tuple_as_trans_desc=False, max_align_time_trace=sys.maxsize, incidence_matrix=None,
+                                lp_backend=lp_heuristic.DEFAULT_BACKEND, max_states_trace=sys.maxsize):
+    """
+    Performs the alignment search on top of the synchronous product net using the extended marking equation
+    heuristic with incrementally added split points (split-point alignments). Whenever the search pops a state
+    whose heuristic could not be derived exactly, the trace is split before the first event not explained so far
+    and the search restarts with the tighter heuristic; once that event is already a split point, the LP of the
+    state is solved instead. Markings reached again at a lower cost are expanded again, since the heuristic is not
+    consistent (the remaining split points shrink along the trace).
+
+    Experimental: never chosen automatically. On the bundled example log it returns optimal costs on all variants,
+    but it is two to three times slower than apply_sync_prod with a template (the LP of each set of split points is
+    rebuilt per trace, restarts discard the search, and the successor and heuristic caches of the template are not
+    used).
+
+    Parameters
+    ----------
+    sync_prod: :class:`pm4py.objects.petri.net.PetriNet` synchronous product net
+    initial_marking: :class:`pm4py.objects.petri.net.Marking` initial marking in the synchronous product net
+    final_marking: :class:`pm4py.objects.petri.net.Marking` final marking in the synchronous product net
+    cost_function: :class:`dict` cost function mapping transitions to the synchronous product net
+    skip: :class:`Any` symbol to use for skips in the alignment
+    ret_tuple_as_trans_desc: :class:`bool` whether to return the alignment as transition descriptions
+    max_align_time_trace: maximum time (in seconds) for the alignment of the trace
+    incidence_matrix: incidence matrix of the estimation net of the synchronous product (e.g. when constructed
+    from a template); the transitions of the net are expected to be decorated in that case
+    lp_backend: backend solving the heuristic (see :class:`procon.objects.petri_net.lp_heuristic.Backends`)
+    max_states_trace: maximum number of states expanded for the alignment of the trace
+
+    Returns
+    -------
+    dictionary : :class:`dict` with keys **alignment**, **cost**, **visited_states**, **queued_states**,
+    **traversed_arcs**, **lp_solved** and **split_points**
+    """
+    return __search_split_point(sync_prod, initial_marking, final_marking, cost_function, skip,
+                                ret_tuple_as_trans_desc=ret_tuple_as_trans_desc,
+                                max_align_time_trace=max_align_time_trace, incidence_matrix=incidence_matrix,
+                                lp_backend=lp_backend, max_states_trace=max_states_trace)
+
+
+def __search_split_point(sync_net, ini, fin, cost_function, skip, ret_tuple_as_trans_desc=False,
+                         max_align_time_trace=sys.maxsize, incidence_matrix=None,
+                         lp_backend=lp_heuristic.DEFAULT_BACKEND, max_states_trace=sys.maxsize):
+    start_time = time.time()
+
+    if incidence_matrix is None:
+        decorate_transitions_prepostset(sync_net)
+        decorate_places_preset_trans(sync_net)
+
+        estimation_net, cost_function = (sync_net, cost_function) if is_petri_net(sync_net) else construct_estimation_net(sync_net, cost_function)
+        incidence_matrix = inc_mat_construct(estimation_net)
+    ini_vec, fin_vec, cost_vec = utils.__vectorize_initial_final_cost(incidence_matrix, ini, fin, cost_function)
+
+    # position in the trace of the places of the trace net (the initial place carries no index)
+    trace_positions = {p: p.properties.get(properties.TRACE_NET_PLACE_INDEX, 0) for p in sync_net.places
+                       if isinstance(p.name, tuple) and p.name[1] == skip}
+    # columns of the log and sync moves of each event
+    event_columns = {}
+    for t, col in incidence_matrix.transitions.items():
+        if properties.TRACE_NET_TRANS_INDEX in t.properties:
+            event_columns.setdefault(t.properties[properties.TRACE_NET_TRANS_INDEX], []).append(col)
+    trace_length = len(event_columns)
+
+    solver = lp_heuristic.ExtendedMarkingEquationSolver(incidence_matrix.a_matrix, cost_vec, fin_vec, event_columns,
+                                                        backend=lp_backend)
+    trans_wo_normal_preset = transitions_without_normal_preset(sync_net)
+    split_points = []
+    visited = 0
+    queued = 0
+    traversed = 0
+
+    while True:
+        h, x = solver.solve(incidence_matrix.encode_marking(ini), tuple(split_points))
+        open_set = [utils.SearchTuple(0 + h, 0, h, ini, None, None, x, True)]
+        # cost with which each marking was expanded: the remaining split points shrink along the trace, so the
+        # heuristic is not consistent and a marking reached again at a lower cost is expanded again
+        closed = {}
+        max_events = 0
+        restart = False
+
+        while not len(open_set) == 0:
+            if (time.time() - start_time) > max_align_time_trace:
+                return None
+
+            curr = heapq.heappop(open_set)
+            current_marking = curr.m
+            if current_marking in closed and closed[current_marking] <= curr.g:
+                continue
+            position = __trace_position(current_marking, trace_positions)
+            max_events = max(max_events, position)
+
+            if not curr.trust:
+                if max_events < trace_length and max_events not in split_points:
+                    # the heuristic did not foresee the deviation at the first event not explained so far
+                    split_points.append(max_events)
+                    split_points.sort()
+                    restart = True
+                    break
+                h, x = solver.solve(incidence_matrix.encode_marking(current_marking),
+                                    __remaining_split_points(split_points, position))
+                heapq.heappush(open_set, utils.SearchTuple(curr.g + h, curr.g, h, current_marking, curr.p, curr.t, x,
+                                                           True))
+                continue
+
+            # max allowed heuristics value (27/10/2019, due to the numerical instability of some of our solvers)
+            if curr.h > lp_solver.MAX_ALLOWED_HEURISTICS:
+                continue
+
+            if current_marking == fin:
+                alignment = utils.__reconstruct_alignment(curr, visited, queued, traversed,
+                                                          ret_tuple_as_trans_desc=ret_tuple_as_trans_desc,
+                                                          lp_solved=solver.solved)
+                alignment["split_points"] = len(split_points)
+                return alignment
+
+            closed[current_marking] = curr.g
+            visited += 1
+            if visited > max_states_trace:
+                return None
+            remaining_split_points = __remaining_split_points(split_points, position)
+
+            enabled_trans = enabled_transitions_indexed(current_marking, trans_wo_normal_preset)
+            trans_to_visit_with_cost = [(t, cost_function[t]) for t in enabled_trans if not (
+                    t is not None and utils.__is_log_move(t, skip) and utils.__is_model_move(t, skip))]
+
+            for t, cost in trans_to_visit_with_cost:
+                traversed += 1
+                new_marking = utils.add_markings(current_marking, t.add_marking)
+                if new_marking in closed and closed[new_marking] <= curr.g + cost:
+                    continue
+                queued += 1
+                advances = properties.TRACE_NET_TRANS_INDEX in t.properties
+                h, x = __derive_split_point_heuristic(curr.x, curr.h, incidence_matrix.transitions[t], cost,
+                                                      advances and position in remaining_split_points)
+                tp = utils.SearchTuple(curr.g + cost + h, curr.g + cost, h, new_marking, curr, t, x, x is not None)
+                heapq.heappush(open_set, tp)
+
+        if not restart:
+            return None
+
+
+def __trace_position(marking, trace_positions):
+    for p in marking:
+        if p in trace_positions:
+            return trace_positions[p]
+    return 0
+
+
+def __remaining_split_points(split_points, position):
+    return tuple(e for e in split_points if e >= position)
+
+
+def __derive_split_point_heuristic(x, h, col, cost, explains_split_point):
+    # the solution of the parent stays feasible for the child if the fired transition is taken from the first
+    # block, or, when it explains the first split point, from the y block of that split point (the x blocks around
+    # it are merged); otherwise the heuristic is only a lower bound and the LP has to be solved when popped
+    h = max(0, h - cost)
+    if explains_split_point:
+        if x[1, col] < 1 - 0.001:
+            return h, None
+        x_prime = np.vstack([x[0] + x[2], x[3:]])
+    else:
+        if x[0, col] < 1 - 0.001:
+            return h, None
+        x_prime = x.copy()
+        x_prime[0, col] -= 1
+    return h, x_prime
+
+
+def __enabled_successors(marking, cost_function, skip, trans_wo_normal_preset):
+    enabled_trans = enabled_transitions_indexed(marking, trans_wo_normal_preset)
+    return [(t, cost_function[t], utils.add_markings(marking, t.add_marking)) for t in enabled_trans if not (
+            t is not None and utils.__is_log_move(t, skip) and utils.__is_model_move(t, skip))]
+
+
+def __cached_successors(marking, cost_function, successor_cache, closure_index=None):
+    # model moves come from the cache, log and sync moves all consume from the (single) marked trace place
+    model_marking, trace_marking = successor_cache.split(marking)
+    trace_successors = []
+    for p in trace_marking:
+        for t in p.ass_trans:
+            if is_enabled_decorated(t, marking):
+                trace_successors.append((t, cost_function[t], utils.add_markings(marking, t.add_marking)))
+    if closure_index is not None:
+        # the next event can no longer be synchronized: some optimal alignment takes its log move right away, the
+        # model moves are pruned
+        for t, cost, new_marking in trace_successors:
+            if t.label[1] == utils.SKIP and not closure_index.can_reach(model_marking, t.label[0]):
+                closure_index.pruned += 1
+                return [(t, cost, new_marking)]
+    successors = [(t, cost_function[t], utils.add_markings(model_successor, trace_marking))
+                  for t, model_successor in successor_cache.successors(model_marking)]
+    return successors + trace_successors
+
+
+def __encode_marking(incidence_matrix, encoding, marking):
+    return incidence_matrix.encode_marking(marking) if encoding is None else encoding.vector(marking)
+
+
+def __search(sync_net, ini, fin, cost_function, skip, ret_tuple_as_trans_desc=False,
+             max_align_time_trace=sys.maxsize, incidence_matrix=None, vector_markings=False,
+             vector_markings_dtype=np.int8, lp_backend=lp_heuristic.DEFAULT_BACKEND, successor_cache=None,
+             max_states_trace=sys.maxsize, heuristic_cache=None):
+    start_time = time.time()
+
+    if incidence_matrix is None:
+        decorate_transitions_prepostset(sync_net)
+        decorate_places_preset_trans(sync_net)
+
+        estimation_net, cost_function = (sync_net, cost_function) if is_petri_net(sync_net) else construct_estimation_net(sync_net, cost_function)
+        incidence_matrix = inc_mat_construct(estimation_net)
+    ini_vec, fin_vec, cost_vec = utils.__vectorize_initial_final_cost(incidence_matrix, ini, fin, cost_function)
+
+    encoding = None
+    if vector_markings:
+        encoding = utils.CompactMarkingEncoding(sync_net, incidence_matrix.places, dtype=vector_markings_dtype)
+        encoding_costs = [cost_function[t] for t in encoding.transitions]
+        ini = encoding.encode(ini)
+        fin = encoding.encode(fin)
+
+    closed = set()
+
+    # the incidence matrix and the costs are fixed for the whole search, only the marking changes between LP calls
+    solver = lp_heuristic.get_solver(incidence_matrix.a_matrix, cost_vec, fin_vec, backend=lp_backend)
+    if heuristic_cache is not None:
+        solver = heuristic_cache.view(solver, incidence_matrix, cost_function, skip)
+
+    # nodes live in a struct-of-arrays store, the open set holds (f, untrusted, h, node) tuples: on equal f,
+    # trusted nodes come first, then the ones with the lower heuristic
+    store = utils.SearchNodeStore(incidence_matrix)
+    h, x = solver.solve(__encode_marking(incidence_matrix, encoding, ini))
+    ini_node = store.add(0, h, ini, trust=True, x=x)
+    open_set = [(0 + h, 0, h, ini_node)]
     heapq.heapify(open_set)
+    # best known cost per marking: pushes reaching a queued marking at no lower cost are dropped
+    best_g = {ini: 0}
     visited = 0
     queued = 0
     traversed = 0
-    lp_solved = 1
+    pruned = 0
 
-    trans_empty_preset = set(t for t in sync_net.transitions if len(t.in_arcs) == 0)
+    trans_wo_normal_preset = transitions_without_normal_preset(sync_net)
 
     while not len(open_set) == 0:
         if (time.time() - start_time) > max_align_time_trace:
             return None
 
-        curr = heapq.heappop(open_set)
+        f, _, h, node = heapq.heappop(open_set)
 
-        current_marking = curr.m
+        current_marking = store.markings[node]
 
-        while not curr.trust:
+        while not store.trust[node]:
             if (time.time() - start_time) > max_align_time_trace:
                 return None
 
             already_closed = current_marking in closed
             if already_closed:
-                curr = heapq.heappop(open_set)
-                current_marking = curr.m
+                f, _, h, node = heapq.heappop(open_set)
+                current_marking = store.markings[node]
                 continue
-                
-            h, x = utils.__compute_exact_heuristic_new_version(estimation_net, a_matrix, h_cvx, g_matrix, cost_vec,
-                                                            incidence_matrix, curr.m,
-                                                            fin_vec, lp_solver.DEFAULT_LP_SOLVER_VARIANT,
-                                                            use_cvxopt=use_cvxopt)
-            lp_solved += 1
+
+            h, x = solver.solve(__encode_marking(incidence_matrix, encoding, current_marking))
 
             # 11/10/19: shall not a state for which we compute the exact heuristics be
             # by nature a trusted solution?
-            tp = utils.SearchTuple(curr.g + h, curr.g, h, curr.m, curr.p, curr.t, x, True)
+            store.update(node, h, x)
             # 11/10/2019 (optimization ZA) heappushpop is slightly more efficient than pushing
             # and popping separately
-            curr = heapq.heappushpop(open_set, tp)
-            current_marking = curr.m
+            f, _, h, node = heapq.heappushpop(open_set, (store.g[node] + h, 0, h, node))
+            current_marking = store.markings[node]
 
         # max allowed heuristics value (27/10/2019, due to the numerical instability of some of our solvers)
-        if curr.h > lp_solver.MAX_ALLOWED_HEURISTICS:
+        if h > lp_solver.MAX_ALLOWED_HEURISTICS:
             continue
 
         # 12/10/2019: do it again, since the marking could be changed
@@ -502,29 +1426,44 @@ def __search(sync_net, ini, fin, cost_function, skip, ret_tuple_as_trans_desc=Fa
         # (underestimation of the remaining cost) is 0. Low-hanging fruits
         # if curr.h < 0.01:
         if current_marking == fin:
-            return utils.__reconstruct_alignment(curr, visited, queued, traversed,
-                                                    ret_tuple_as_trans_desc=ret_tuple_as_trans_desc,
-                                                    lp_solved=lp_solved)
+            alignment = utils.__reconstruct_alignment_from_store(store, node, visited, queued, traversed,
+                                                                 ret_tuple_as_trans_desc=ret_tuple_as_trans_desc,
+                                                                 lp_solved=solver.solved)
+            alignment["pruned_states"] = pruned
+            return alignment
 
         closed.add(current_marking)
         visited += 1
+        if visited > max_states_trace:
+            return None
 
-        enabled_trans = trans_empty_preset.union(enabled_transitions(sync_net, current_marking))
-
-        trans_to_visit_with_cost = [(t, cost_function[t]) for t in enabled_trans if not (
-                t is not None and utils.__is_log_move(t, skip) and utils.__is_model_move(t, skip))]
-
-        for t, cost in trans_to_visit_with_cost:
+        if encoding is not None:
+            enabled_indices = encoding.enabled_transitions(current_marking)
+            successors = zip([encoding.transitions[i] for i in enabled_indices],
+                             [encoding_costs[i] for i in enabled_indices],
+                             encoding.fire(current_marking, enabled_indices))
+        elif successor_cache is not None:
+            successors = __cached_successors(current_marking, cost_function, successor_cache)
+        else:
+            successors = __enabled_successors(current_marking, cost_function, skip, trans_wo_normal_preset)
+
+        x = store.expand(node)
+        curr_g = store.g[node]
+        for t, cost, new_marking in successors:
             traversed += 1
-            new_marking = utils.add_markings(current_marking, t.add_marking)
             if new_marking in closed:
                 continue
-            g = curr.g + cost
+            g = curr_g + cost
+            if best_g.get(new_marking, sys.maxsize) <= g:
+                pruned += 1
+                continue
+            best_g[new_marking] = g
 
             queued += 1
-            h, x = utils.__derive_heuristic(incidence_matrix, cost_vec, curr.x, t, curr.h)
-            trustable = utils.__trust_solution(x)
-            new_f = g + h
-
-            tp = utils.SearchTuple(new_f, g, h, new_marking, curr, t, x, trustable)
-            heapq.heappush(open_set, tp)
+            # the solution of the successor is the one of the node with one firing of t less: it stays a solution
+            # (trusted) as long as the firing count of t does not become negative
+            col = incidence_matrix.transitions[t]
+            new_h = max(0, h - cost_vec[col])
+            trustable = x[col] >= 1 - 0.001
+            new_node = store.add(g, new_h, new_marking, node, col, trustable)
+            heapq.heappush(open_set, (g + new_h, 0 if trustable else 1, new_h, new_node))
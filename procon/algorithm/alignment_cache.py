@@ -0,0 +1,135 @@
+'''
+    The following code owned by procon and its author (More Info: https://github.com/require-gio/procon).
+
+    Procon is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    Procon is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with Procon.  If not, see <https://www.gnu.org/licenses/>.
+'''
+import hashlib
+import json
+import pickle
+import sqlite3
+from enum import Enum
+
+from procon.objects.petri_net.utils import is_inhibitor_arc, is_reset_arc
+
+# number of variants per SQL statement (bound on the host parameters of SQLite)
+BATCH_SIZE = 500
+# version of the stored alignments, part of the key: to be increased whenever a change of the alignment engines or of
+# the format of the alignments may change what is stored; entries of other versions are deleted when a cache is opened
+ALGORITHM_VERSION = 1
+
+
+def net_fingerprint(net, initial_marking, final_marking):
+    """
+    Structural hash of a (reset/inhibitor) net with its markings: places, transitions with their labels, arcs with
+    their weights and types. Does not depend on the order of the elements in the net.
+
+    Parameters
+    -------------
+    net
+        Petri net
+    initial_marking
+        Initial marking
+    final_marking
+        Final marking
+
+    Returns
+    -------------
+    fingerprint
+        Hexadecimal SHA-256 digest
+    """
+    description = {
+        "places": sorted(str(p.name) for p in net.places),
+        "transitions": sorted([str(t.name), str(t.label)] for t in net.transitions),
+        "arcs": sorted([str(a.source.name), str(a.target.name), a.weight,
+                        "reset" if is_reset_arc(a) else "inhibitor" if is_inhibitor_arc(a) else "normal"]
+                       for a in net.arcs),
+        "initial_marking": sorted([str(p.name), n] for p, n in initial_marking.items()),
+        "final_marking": sorted([str(p.name), n] for p, n in final_marking.items())}
+    return hashlib.sha256(json.dumps(description).encode("utf-8")).hexdigest()
+
+
+def parameters_fingerprint(parameters, ignored=()):
+    """
+    Hash of the alignment parameters whose values are plain data (the ones holding objects, e.g. templates, are
+    derived from the model and left out, as well as the ignored keys)
+
+    Parameters
+    -------------
+    parameters
+        Alignment parameters
+    ignored
+        Keys (or their values for Enum keys) to leave out
+
+    Returns
+    -------------
+    fingerprint
+        Hexadecimal SHA-256 digest
+    """
+    description = {}
+    for key, value in parameters.items():
+        key = key.value if isinstance(key, Enum) else key
+        if key in ignored:
+            continue
+        value = value.value if isinstance(value, Enum) else value
+        if value is None or isinstance(value, (str, int, float, bool)):
+            description[str(key)] = value
+    return hashlib.sha256(json.dumps(description, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class AlignmentCache(object):
+    """
+    Persistent cache of alignments in an SQLite file: the alignments of the variants are stored under a key
+    combining ALGORITHM_VERSION and the fingerprints of the net and of the alignment parameters, so that the file can
+    be shared by several models and configurations. The alignments stored by other versions are deleted on opening.
+    """
+
+    def __init__(self, path, net, initial_marking, final_marking, parameters, ignored=()):
+        version = "v%d:" % ALGORITHM_VERSION
+        self.key = version + net_fingerprint(net, initial_marking, final_marking) + ":" + parameters_fingerprint(
+            parameters, ignored=ignored)
+        self.hits = 0
+        self.__connection = sqlite3.connect(path)
+        with self.__connection:
+            self.__connection.execute("CREATE TABLE IF NOT EXISTS alignments (model TEXT NOT NULL, "
+                                      "variant TEXT NOT NULL, alignment BLOB NOT NULL, PRIMARY KEY (model, variant))")
+            self.__connection.execute("DELETE FROM alignments WHERE substr(model, 1, ?) != ?",
+                                      (len(version), version))
+
+    def get(self, variants):
+        """
+        Returns the cached alignments of the given variants (encoded as strings) as a dict variant -> alignment
+        """
+        variants = list(variants)
+        found = {}
+        for start in range(0, len(variants), BATCH_SIZE):
+            batch = variants[start:start + BATCH_SIZE]
+            rows = self.__connection.execute(
+                "SELECT variant, alignment FROM alignments WHERE model = ? AND variant IN (%s)" % ",".join(
+                    "?" * len(batch)), [self.key] + batch)
+            for variant, alignment in rows:
+                found[variant] = pickle.loads(alignment)
+        self.hits += len(found)
+        return found
+
+    def put(self, alignments):
+        """
+        Stores alignments given as (variant, alignment) pairs
+        """
+        with self.__connection:
+            self.__connection.executemany(
+                "INSERT OR REPLACE INTO alignments (model, variant, alignment) VALUES (?, ?, ?)",
+                [(self.key, variant, pickle.dumps(alignment)) for variant, alignment in alignments])
+
+    def close(self):
+        self.__connection.close()
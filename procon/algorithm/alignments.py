@@ -53,6 +53,8 @@ class Parameters(Enum):
     CORES = 'cores'
     BEST_WORST_COST_INTERNAL = "best_worst_cost_internal"
     FITNESS_ROUND_DIGITS = "fitness_round_digits"
+    SYNC_PRODUCT_TEMPLATE = "sync_product_template"
+    REPLAY_FAST_PATH = "replay_fast_path"
 
 
 def apply_trace(trace, petri_net, initial_marking, final_marking, parameters=None):
@@ -79,6 +81,13 @@ def apply_trace(trace, petri_net, initial_marking, final_marking, parameters=Non
             mapping of each transition in the model to corresponding model cost
             Parameters.PARAM_TRACE_COST_FUNCTION ->
             mapping of each index of the trace to a positive cost value
+            Parameters.BEST_WORST_COST_INTERNAL ->
+            best worst cost of the model, if already known
+            Parameters.SYNC_PRODUCT_TEMPLATE ->
+            template of the model half of the synchronous product (caches the best worst cost)
+            Parameters.REPLAY_FAST_PATH ->
+            if True, the trace is first replayed on the net (a_star.apply_replay); the search is only performed if
+            it does not fit
     Returns
     -----------
     alignment
@@ -86,16 +95,28 @@ def apply_trace(trace, petri_net, initial_marking, final_marking, parameters=Non
         **traversed_arcs**
         The alignment is a sequence of labels of the form (a,t), (a,>>), or (>>,t)
         representing synchronous/log/model-moves.
+        None if the time or state budget of the trace is exceeded
     """
     if parameters is None:
         parameters = copy({PARAMETER_CONSTANT_ACTIVITY_KEY: DEFAULT_NAME_KEY})
 
     parameters = copy(parameters)
-    best_worst_cost = exec_utils.get_param_value(Parameters.BEST_WORST_COST_INTERNAL, parameters,
-                                                 __get_best_worst_cost(petri_net, initial_marking, final_marking, parameters))
-
-    ali = a_star.apply(trace, petri_net, initial_marking, final_marking,
-                                                 parameters=parameters)
+    # the best worst cost only depends on the model: avoid the search on the empty trace when it is already known
+    best_worst_cost = exec_utils.get_param_value(Parameters.BEST_WORST_COST_INTERNAL, parameters, None)
+    if best_worst_cost is None:
+        best_worst_cost = __get_best_worst_cost(petri_net, initial_marking, final_marking, parameters)
+
+    ali = None
+    if exec_utils.get_param_value(Parameters.REPLAY_FAST_PATH, parameters, False):
+        ali = a_star.apply_replay(trace, petri_net, initial_marking, final_marking, parameters=parameters)
+        if ali is not None and exec_utils.get_param_value(Parameters.PARAM_TRACE_COST_FUNCTION, parameters,
+                                                          None) is None:
+            parameters[Parameters.PARAM_TRACE_COST_FUNCTION] = [align_utils.STD_MODEL_LOG_MOVE_COST] * len(trace)
+    if ali is None:
+        ali = a_star.apply(trace, petri_net, initial_marking, final_marking,
+                                                     parameters=parameters)
+    if ali is None:
+        return None
 
     trace_cost_function = exec_utils.get_param_value(Parameters.PARAM_TRACE_COST_FUNCTION, parameters, [])
     # Instead of using the length of the trace, use the sum of the trace cost function
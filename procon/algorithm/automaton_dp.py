@@ -0,0 +1,321 @@
+'''
+    The following code owned by procon and its author (More Info: https://github.com/require-gio/procon).
+
+    Procon is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    Procon is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with Procon.  If not, see <https://www.gnu.org/licenses/>.
+'''
+from enum import Enum
+
+import numpy as np
+from pm4py.util import exec_utils
+from pm4py.util.constants import PARAMETER_CONSTANT_ACTIVITY_KEY
+from pm4py.util.xes_constants import DEFAULT_NAME_KEY
+
+from procon.objects.petri_net import align_utils as utils
+from procon.objects.petri_net import automaton
+
+DEFAULT_BATCH_SIZE = 64
+# entry markers of the backtracking arrays
+ENTERED_BY_LOG_MOVE = -1
+INITIAL = -2
+NOT_REACHED = -3
+
+
+class Parameters(Enum):
+    ACTIVITY_KEY = PARAMETER_CONSTANT_ACTIVITY_KEY
+    PARAM_ALIGNMENT_RESULT_IS_SYNC_PROD_AWARE = 'ret_tuple_as_trans_desc'
+    BATCH_SIZE = "batch_size"
+    PREFIX_TRIE = "prefix_trie"
+
+
+class _Kernel(object):
+    """
+    Edge arrays of an automaton prepared for the DP: sources of the edges, and the edges ordered by target so that
+    the minimum over the incoming edges of each state is a single np.minimum.reduceat
+    """
+
+    def __init__(self, model_automaton):
+        self.n_states = model_automaton.n_states
+        self.sources = np.repeat(np.arange(self.n_states), np.diff(model_automaton.offsets))
+        self.final = model_automaton.final
+        self.by_target = np.argsort(model_automaton.targets, kind="stable")
+        self.sources_sorted = self.sources[self.by_target]
+        self.targets_sorted = model_automaton.targets[self.by_target]
+        self.model_costs = model_automaton.model_costs[self.by_target].astype(np.float64)
+        self.sync_costs = model_automaton.sync_costs[self.by_target].astype(np.float64)
+        self.labels = model_automaton.edge_labels[self.by_target]
+        if len(self.by_target) > 0:
+            self.group_starts = np.flatnonzero(np.r_[True, self.targets_sorted[1:] != self.targets_sorted[:-1]])
+        else:
+            self.group_starts = np.zeros(0, dtype=np.int64)
+        self.group_targets = self.targets_sorted[self.group_starts]
+        self.edge_groups = np.searchsorted(self.group_targets, self.targets_sorted)
+
+    def improve(self, source_dist, dist, record, costs):
+        """
+        One min-plus step: improves dist (traces x states) by the edges (costs per trace and edge in the order of
+        by_target, inf for unusable edges) taken from source_dist, recording the improving edges
+
+        Returns
+        -------------
+        improved
+            True if a distance was improved
+        """
+        if len(self.by_target) == 0:
+            return False
+        candidates = source_dist[:, self.sources_sorted] + costs
+        best = np.minimum.reduceat(candidates, self.group_starts, axis=1)
+        improved = best < dist[:, self.group_targets]
+        if not improved.any():
+            return False
+        rows, groups = np.nonzero(improved)
+        dist[rows, self.group_targets[groups]] = best[rows, groups]
+        # one of the edges reaching the new value (several may, any of them is optimal)
+        winners = (candidates == dist[:, self.targets_sorted]) & improved[:, self.edge_groups]
+        rows, cols = np.nonzero(winners)
+        record[rows, self.targets_sorted[cols]] = self.by_target[cols]
+        return True
+
+    def relax(self, dist, record, costs):
+        """
+        Improves dist by the edges until convergence (costs are positive within a position)
+
+        Returns
+        -------------
+        rounds
+            Number of min-plus steps performed
+        """
+        rounds = 1
+        while self.improve(dist, dist, record, costs):
+            rounds += 1
+        return rounds
+
+
+def apply_variants(model_automaton, traces, parameters=None):
+    """
+    Aligns many traces against the automaton of a model with a min-plus dynamic program over trace positions x
+    states, computed with array operations over batches of traces. Within a position, the costs are relaxed along the
+    model moves (silent transitions included) until convergence; from a position to the next one, a state is entered
+    by a log move or by a sync move. Optimal moves are recovered by backtracking.
+
+    Parameters
+    -------------
+    model_automaton
+        :class:`procon.objects.petri_net.automaton.ModelAutomaton` automaton of the model
+    traces
+        list of traces (:class:`pm4py.objects.log.obj.Trace`)
+    parameters
+        Parameters.ACTIVITY_KEY -> attribute of the events containing the activity
+        Parameters.PARAM_ALIGNMENT_RESULT_IS_SYNC_PROD_AWARE -> return the alignment as transition descriptions
+        Parameters.BATCH_SIZE -> number of traces (prefixes with Parameters.PREFIX_TRIE) aligned together
+        (default: 64)
+        Parameters.PREFIX_TRIE -> if True, the traces are arranged in a trie and the DP row of each prefix is
+        computed once for all the traces sharing it (level by level); the backtracking arrays are then kept for all
+        the nodes of the trie (default: False)
+
+    Returns
+    -------------
+    alignments
+        list of alignments in the order of the traces, :class:`dict` with keys **alignment**, **cost**,
+        **visited_states**, **queued_states**, **traversed_arcs**, **lp_solved**, **fitness** and **bwc**;
+        None for traces that cannot be aligned (the final marking is not reachable)
+    """
+    if parameters is None:
+        parameters = {}
+
+    activity_key = exec_utils.get_param_value(Parameters.ACTIVITY_KEY, parameters, DEFAULT_NAME_KEY)
+    ret_tuple_as_trans_desc = exec_utils.get_param_value(Parameters.PARAM_ALIGNMENT_RESULT_IS_SYNC_PROD_AWARE,
+                                                         parameters, False)
+    batch_size = exec_utils.get_param_value(Parameters.BATCH_SIZE, parameters, DEFAULT_BATCH_SIZE)
+    prefix_trie = exec_utils.get_param_value(Parameters.PREFIX_TRIE, parameters, False)
+
+    kernel = _Kernel(model_automaton)
+    variants = [[event[activity_key] for event in trace] for trace in traces]
+    if prefix_trie:
+        return __align_trie(model_automaton, kernel, variants, batch_size, ret_tuple_as_trans_desc)
+    # batches of traces of similar length
+    order = sorted(range(len(variants)), key=lambda i: len(variants[i]))
+    results = [None] * len(variants)
+    for start in range(0, len(order), batch_size):
+        batch = order[start:start + batch_size]
+        for i, alignment in zip(batch, __align_batch(model_automaton, kernel, [variants[i] for i in batch],
+                                                     ret_tuple_as_trans_desc)):
+            results[i] = alignment
+    return results
+
+
+def __initial_row(model_automaton, kernel, via, entry):
+    # DP row of the empty prefix (via: 1 x states, entry: states)
+    dist = np.full((1, kernel.n_states), np.inf)
+    dist[0, model_automaton.initial] = 0
+    entry[model_automaton.initial] = INITIAL
+    rounds = kernel.relax(dist, via, np.broadcast_to(kernel.model_costs, (1, len(kernel.by_target))))
+    return dist, rounds
+
+
+def __step(model_automaton, kernel, dist, events, via, entry):
+    """
+    DP rows after one more event per row: a state enters the next position by a log move (same state) or by a sync
+    move labelled with the event, then the row is relaxed along the model moves
+    """
+    labels = np.array([model_automaton.label_index.get(a, automaton.TAU - 1) for a in events], dtype=np.int64)
+    new_dist = dist + utils.STD_MODEL_LOG_MOVE_COST
+    entry[np.isfinite(new_dist)] = ENTERED_BY_LOG_MOVE
+    sync_costs = np.where((kernel.sync_costs[None, :] >= 0) & (kernel.labels[None, :] == labels[:, None]),
+                          kernel.sync_costs[None, :], np.inf)
+    kernel.improve(dist, new_dist, entry, sync_costs)
+    rounds = 1 + kernel.relax(new_dist, via, np.broadcast_to(kernel.model_costs, (len(events), len(kernel.by_target))))
+    return new_dist, rounds
+
+
+def __result(model_automaton, kernel, final_row, layers, variant, best_worst_cost, rounds, ret_tuple_as_trans_desc):
+    final_dist = np.where(kernel.final, final_row, np.inf)
+    state = int(np.argmin(final_dist))
+    cost = final_dist[state]
+    if not np.isfinite(cost):
+        return None
+    moves = __backtrack(model_automaton, kernel, layers, variant, state, ret_tuple_as_trans_desc)
+    cost = int(cost) if float(cost).is_integer() else float(cost)
+    bwc = len(variant) * utils.STD_MODEL_LOG_MOVE_COST + best_worst_cost
+    fitness = 1 - (cost // utils.STD_MODEL_LOG_MOVE_COST) / (
+            bwc // utils.STD_MODEL_LOG_MOVE_COST) if bwc > 0 else 0
+    return {'alignment': moves, 'cost': cost, 'visited_states': (len(variant) + 1) * kernel.n_states,
+            'queued_states': 0, 'traversed_arcs': rounds * len(kernel.by_target), 'lp_solved': 0,
+            'fitness': fitness, 'bwc': bwc}
+
+
+def __align_batch(model_automaton, kernel, variants, ret_tuple_as_trans_desc):
+    n_variants = len(variants)
+    n_states = kernel.n_states
+    lengths = np.array([len(variant) for variant in variants])
+    max_length = int(lengths.max())
+
+    # backtracking: edge of the model move reaching a state within a position, or how the state entered the position
+    via = np.full((max_length + 1, n_variants, n_states), NOT_REACHED, dtype=np.int32)
+    entry = np.full((max_length + 1, n_variants, n_states), NOT_REACHED, dtype=np.int32)
+    dist, rounds = __initial_row(model_automaton, kernel, via[0, :1], entry[0, 0])
+    via[0] = via[0, 0]
+    entry[0] = entry[0, 0]
+    # cost of aligning the empty trace, i.e. of the cheapest run of the model
+    best_worst_cost = dist[0, kernel.final].min() if kernel.final.any() else np.inf
+    dist = np.repeat(dist, n_variants, axis=0)
+
+    finals = [None] * n_variants
+    for v in np.flatnonzero(lengths == 0):
+        finals[v] = dist[v].copy()
+    for position in range(max_length):
+        # positions beyond the end of a variant match nothing
+        events = [variant[position] if position < len(variant) else None for variant in variants]
+        dist, step_rounds = __step(model_automaton, kernel, dist, events, via[position + 1], entry[position + 1])
+        rounds += step_rounds
+        for v in np.flatnonzero(lengths == position + 1):
+            finals[v] = dist[v].copy()
+
+    return [__result(model_automaton, kernel, finals[v], [(via[p, v], entry[p, v]) for p in range(len(variant) + 1)],
+                     variant, best_worst_cost, rounds, ret_tuple_as_trans_desc) for v, variant in enumerate(variants)]
+
+
+def __align_trie(model_automaton, kernel, variants, batch_size, ret_tuple_as_trans_desc):
+    # trie of the variants, node 0 is the empty prefix
+    parents = [-1]
+    events = [None]
+    depths = [0]
+    children = [{}]
+    ends = []
+    for variant in variants:
+        node = 0
+        for a in variant:
+            child = children[node].get(a)
+            if child is None:
+                child = len(parents)
+                children[node][a] = child
+                parents.append(node)
+                events.append(a)
+                depths.append(depths[node] + 1)
+                children.append({})
+            node = child
+        ends.append(node)
+    n_nodes = len(parents)
+    end_nodes = set(ends)
+
+    # backtracking arrays of every node of the trie (see __align_batch)
+    via = np.full((n_nodes, kernel.n_states), NOT_REACHED, dtype=np.int32)
+    entry = np.full((n_nodes, kernel.n_states), NOT_REACHED, dtype=np.int32)
+    level_dist, rounds = __initial_row(model_automaton, kernel, via[:1], entry[0])
+    best_worst_cost = level_dist[0, kernel.final].min() if kernel.final.any() else np.inf
+    finals = {0: level_dist[0]}
+    level = [0]
+    max_depth = max(depths)
+    nodes_by_depth = [[] for _ in range(max_depth + 1)]
+    for node in range(1, n_nodes):
+        nodes_by_depth[depths[node]].append(node)
+
+    # the rows of a level are computed from the rows of the previous level, once per prefix
+    for depth in range(1, max_depth + 1):
+        row_of = {node: i for i, node in enumerate(level)}
+        nodes = nodes_by_depth[depth]
+        dist = np.empty((len(nodes), kernel.n_states))
+        for start in range(0, len(nodes), batch_size):
+            batch = nodes[start:start + batch_size]
+            batch_via = np.full((len(batch), kernel.n_states), NOT_REACHED, dtype=np.int32)
+            batch_entry = np.full((len(batch), kernel.n_states), NOT_REACHED, dtype=np.int32)
+            batch_dist, step_rounds = __step(model_automaton, kernel,
+                                             level_dist[[row_of[parents[node]] for node in batch]],
+                                             [events[node] for node in batch], batch_via, batch_entry)
+            rounds += step_rounds
+            via[batch] = batch_via
+            entry[batch] = batch_entry
+            dist[start:start + len(batch)] = batch_dist
+        for i, node in enumerate(nodes):
+            if node in end_nodes:
+                finals[node] = dist[i].copy()
+        level, level_dist = nodes, dist
+
+    results = []
+    for variant, end in zip(variants, ends):
+        path = [end]
+        while parents[path[-1]] >= 0:
+            path.append(parents[path[-1]])
+        path.reverse()
+        results.append(__result(model_automaton, kernel, finals[end], [(via[node], entry[node]) for node in path],
+                                variant, best_worst_cost, rounds, ret_tuple_as_trans_desc))
+    return results
+
+
+def __backtrack(model_automaton, kernel, layers, variant, state, ret_tuple_as_trans_desc):
+    # layers: backtracking arrays (via, entry) of the positions 0..len(variant) of the variant
+    skip = utils.SKIP
+    moves = []
+    position = len(variant)
+    while True:
+        via, entry = layers[position]
+        e = via[state]
+        if e >= 0:
+            t = model_automaton.transitions[model_automaton.edge_transitions[e]]
+            moves.append(((skip, t.name), (skip, t.label)))
+            state = kernel.sources[e]
+            continue
+        e = entry[state]
+        if e == INITIAL:
+            break
+        position -= 1
+        # names of the transitions of the trace net, see utils.construct_trace_net_cost_aware
+        trace_name = 't_' + variant[position] + '_' + str(position)
+        if e == ENTERED_BY_LOG_MOVE:
+            moves.append(((trace_name, skip), (variant[position], skip)))
+        else:
+            t = model_automaton.transitions[model_automaton.edge_transitions[e]]
+            moves.append(((trace_name, t.name), (variant[position], t.label)))
+            state = kernel.sources[e]
+    moves.reverse()
+    return moves if ret_tuple_as_trans_desc else [move[1] for move in moves]
@@ -17,7 +17,7 @@
 from procon.conversion import converter
 from procon.conversion.converter import INCLUDE_EVENTS
 from procon.objects.bpmn import importer as bpmn_importer
-from procon.algorithm import alignments
+from procon.algorithm import alignments, a_star, automaton_dp, decomposition, language_alignment, alignment_cache
 from procon.objects.petri_net.utils import is_petri_net
 from pm4py.objects.petri_net.utils import check_soundness
 from pm4py.algo.filtering.pandas.attributes import attributes_filter
@@ -28,10 +28,12 @@ from pm4py.util import constants as pm4_constants
 from pm4py.objects.conversion.log import converter as log_converter
 from pm4py.algo.filtering.common.filtering_constants import CASE_CONCEPT_NAME
 from pm4py.objects.log.util import xes
+from procon.objects.petri_net import align_utils
 from pm4py.statistics.traces.generic.pandas import case_statistics
 from pm4py import format_dataframe
 
 from pm4py.util import constants
+from pm4py.util import exec_utils
 from pm4py.objects.log.obj import Trace, Event
 
 from collections import Counter, defaultdict
@@ -40,6 +42,8 @@ import re
 import random
 import os
 import psutil
+import sys
+import time
 from tqdm import tqdm
 
 import xml.etree.ElementTree as ET
@@ -48,20 +52,429 @@ from lxml import etree
 from xml.dom import minidom
 import numpy as np
 import pandas as pd
+# registers the CVXOpt/GLPK solvers as default LP solver of PM4Py (once per process, not per chunk)
+import pm4pycvxopt
 
 CHUNK_SIZE = 10
 CORES_PARAM = "cores"
+VECTOR_MARKINGS_PARAM = "vector_markings"
+LP_BACKEND_PARAM = "lp_backend"
+SEARCH_VARIANT_PARAM = "search_variant"
+SUCCESSOR_CACHE_SIZE_PARAM = "successor_cache_size"
+HEURISTIC_CACHE_SIZE_PARAM = "heuristic_cache_size"
+# search_variant="automaton": bound on the states of the reachability graph, larger models are aligned by A*
+AUTOMATON_MAX_STATES_PARAM = "automaton_max_states"
+# approximate alignments (search_variant="beam"): states kept per depth and optional f-band of the beam
+BEAM_WIDTH_PARAM = "beam_width"
+BEAM_F_BAND_PARAM = "beam_f_band"
+# with the automatic choice, variants up to this length against models up to this size are aligned by Dijkstra
+AUTO_SEARCH_VARIANT = "auto"
+AUTO_SEARCH_VARIANT_PARAM = "auto_search_variant"
+DIJKSTRA_MAX_TRACE_LENGTH_PARAM = "dijkstra_max_trace_length"
+DIJKSTRA_MAX_MODEL_TRANSITIONS_PARAM = "dijkstra_max_model_transitions"
+DEFAULT_DIJKSTRA_MAX_TRACE_LENGTH = 10
+DEFAULT_DIJKSTRA_MAX_MODEL_TRANSITIONS = 15
+# the variants of a chunk are aligned together by the min-plus DP over the automaton of the model (automaton_dp),
+# traces it cannot align are aligned one by one
+AUTOMATON_DP_SEARCH_VARIANT = "automaton_dp"
+AUTOMATON_DP_PARAM = "automaton_dp"
+# with the DP, the variants of a chunk share the rows of their common prefixes (the variants are chunked in
+# lexicographic order so that shared prefixes end up in the same chunk)
+PREFIX_TRIE_PARAM = "prefix_trie"
+# acyclic models: the language of the model is enumerated once and each variant is aligned by its edit distance to
+# all the model variants (language_alignment); models with loops or with more variants than LANGUAGE_MAX_VARIANTS
+# are aligned with the automatic choice of the engine
+LANGUAGE_SEARCH_VARIANT = "language"
+LANGUAGE_PARAM = "language"
+LANGUAGE_MAX_VARIANTS_PARAM = "language_max_variants"
+# budgets: per variant (seconds, expanded states) and for the whole computation (seconds); variants exceeding them
+# fall back to a beam search alignment of the given width, or to the trivial alignment if the beam fails
+MAX_ALIGN_TIME_TRACE_PARAM = "max_align_time_trace"
+MAX_STATES_TRACE_PARAM = "max_states_trace"
+MAX_ALIGN_TIME_PARAM = "max_align_time"
+ALIGN_DEADLINE_PARAM = "align_deadline"
+FALLBACK_BEAM_WIDTH_PARAM = "fallback_beam_width"
+DEFAULT_FALLBACK_BEAM_WIDTH = 5
+FALLBACK_REASON_BUDGET = "budget"
+FALLBACK_REASON_DEADLINE = "deadline"
+# variants are first replayed on the net (silent transitions only between the events): fitting variants get their
+# alignment without search (search_variant "replay", counted in the progress bar); on by default
+REPLAY_FAST_PATH_PARAM = "replay_fast_path"
+# path of an SQLite file caching the alignments of the variants across runs (see alignment_cache): only the variants
+# not aligned before against the same net with the same parameters are aligned; approximate alignments are not cached
+ALIGNMENT_CACHE_PARAM = "alignment_cache"
+# every alignment records the length of its variant, the wall time spent on it and the worker that aligned it under
+# the key "variant_stats" (see variant_stats and slowest_variants); off by default
+VARIANT_STATS_PARAM = "variant_stats"
+# the variants are first aligned per fragment of the net cut along its BPMN subprocesses (see decomposition), the
+# distinct projections of each fragment in parallel; variants whose fragment alignments cannot be recombined are
+# aligned against the whole net
+DECOMPOSED_PARAM = "decomposed"
+
+# model installed in each worker process by install_model, the chunks only carry the variants
+__worker_model = {}
+
+def variant_trace(variant):
+    """
+    Trace of a variant of the variants dataframe (activities separated by commas)
+    """
+    # TODO: this approach is instable when there are activities containing a comma in their names
+    return Trace([Event({"concept:name": activity}) for activity in variant.split(",")])
+
+def install_model(net, initial_marking, final_marking, parameters, net_decomposition=None):
+    """
+    Initializer of the worker processes: installs the net, its compiled template and the alignment parameters once
+    per process, so that the chunks submitted to the worker only carry variants (see align_variants)
+
+    Parameters
+    -------------
+    net
+        reset net of the model
+    initial_marking
+        initial marking of the net
+    final_marking
+        final marking of the net
+    parameters
+        alignment parameters
+    net_decomposition
+        decomposition of the net (see decomposition.decompose), if the variants are aligned per fragment
+    """
+    parameters = dict(parameters)
+    # the model half of the synchronous product is compiled once per worker and shared by all chunks, together with
+    # its caches (successors, heuristic, automaton); so are the ones of the fragments of the decomposition
+    fragment_templates = [decomposition.compile_template(fragment, parameters=parameters)
+                          for fragment in net_decomposition.fragments] if net_decomposition is not None else None
+    parameters[a_star.Parameters.SYNC_PRODUCT_TEMPLATE] = a_star.compile_template(net, initial_marking, final_marking,
+                                                                                   parameters=parameters)
+    __worker_model.clear()
+    __worker_model.update({"net": net, "initial_marking": initial_marking, "final_marking": final_marking,
+                           "parameters": parameters, "decomposition": net_decomposition,
+                           "fragment_templates": fragment_templates})
+
+def align_variants(variants):
+    """
+    Aligns variants against the model installed in the worker by install_model
+
+    Parameters
+    -------------
+    variants
+        variants (activities separated by commas)
+
+    Returns
+    ------------
+    alignments
+        list of (variant, alignment), see compute_alignment
+    """
+    return compute_alignment([(variant, variant_trace(variant)) for variant in variants], __worker_model["net"],
+                             __worker_model["initial_marking"], __worker_model["final_marking"],
+                             __worker_model["parameters"])
+
+def align_fragment_variants(index, projections):
+    """
+    Aligns projections of the variants against a fragment of the decomposition installed in the worker by
+    install_model
+
+    Parameters
+    -------------
+    index
+        index of the fragment in the decomposition
+    projections
+        tuples of activities
+
+    Returns
+    ------------
+    fragment_alignments
+        list of (projection, alignment), see compute_fragment_alignments
+    """
+    return compute_fragment_alignments(__worker_model["decomposition"].fragments[index], projections,
+                                       __worker_model["parameters"],
+                                       template=__worker_model["fragment_templates"][index])
 
 def compute_alignment(log, net, initial_marking, final_marking, parameters):
-    import pm4pycvxopt
     variant_keys = [item[0] for item in log]
     log = [item[1] for item in log]
+    # the model half of the synchronous product is compiled once and shared by all traces (workers get it from
+    # install_model)
+    parameters = dict(parameters)
+    if a_star.Parameters.SYNC_PRODUCT_TEMPLATE not in parameters:
+        parameters[a_star.Parameters.SYNC_PRODUCT_TEMPLATE] = a_star.compile_template(net, initial_marking,
+                                                                                       final_marking,
+                                                                                       parameters=parameters)
+    auto_search_variant = parameters.get(AUTO_SEARCH_VARIANT_PARAM, False)
+    deadline = parameters.get(ALIGN_DEADLINE_PARAM, None)
+    max_align_time_trace = parameters.get(a_star.Parameters.PARAM_MAX_ALIGN_TIME_TRACE, sys.maxsize)
+    with_stats = parameters.get(VARIANT_STATS_PARAM, False)
+    batch_start = time.time()
+    batch_alignments = [None] * len(log)
+    if parameters.get(LANGUAGE_PARAM, None) is not None:
+        batch_alignments = language_alignment.apply_variants(parameters[LANGUAGE_PARAM], log)
+        for alignment in batch_alignments:
+            alignment["search_variant"] = LANGUAGE_SEARCH_VARIANT
+    elif parameters.get(AUTOMATON_DP_PARAM, False):
+        model_automaton = a_star.get_automaton(net, initial_marking, final_marking, parameters=parameters)
+        if model_automaton is not None:
+            batch_alignments = automaton_dp.apply_variants(
+                model_automaton, log,
+                parameters={automaton_dp.Parameters.PREFIX_TRIE: parameters.get(PREFIX_TRIE_PARAM, False)})
+            for alignment in batch_alignments:
+                if alignment is not None:
+                    alignment["search_variant"] = AUTOMATON_DP_SEARCH_VARIANT
+    # the variants aligned together share the time of the batch
+    batch_time = (time.time() - batch_start) / max(1, sum(1 for alignment in batch_alignments if alignment is not None))
     aligned_traces = []
-    for trace in log:
-        aligned_traces.append(alignments.apply_trace(trace, net, initial_marking, final_marking, parameters=parameters))
+    # cheapest run of the model, computed once per chunk for the trivial alignments
+    model_run = {}
+    for key, trace, alignment in zip(variant_keys, log, batch_alignments):
+        if alignment is not None:
+            if with_stats:
+                record_variant_stats(alignment, key, trace, batch_time)
+            aligned_traces.append(alignment)
+            continue
+        start = time.time()
+        if auto_search_variant:
+            parameters[a_star.Parameters.SEARCH_VARIANT] = choose_search_variant(trace, net, parameters)
+        alignment = None
+        reason = FALLBACK_REASON_DEADLINE
+        remaining_time = deadline - time.time() if deadline is not None else sys.maxsize
+        if remaining_time > 0:
+            parameters[a_star.Parameters.PARAM_MAX_ALIGN_TIME_TRACE] = min(max_align_time_trace, remaining_time)
+            alignment = alignments.apply_trace(trace, net, initial_marking, final_marking, parameters=parameters)
+            reason = FALLBACK_REASON_BUDGET
+        if alignment is None:
+            # past the deadline, the variants directly get the trivial alignment
+            remaining_time = deadline - time.time() if deadline is not None else sys.maxsize
+            alignment = approximate_alignment(trace, net, initial_marking, final_marking, parameters,
+                                              max_time=remaining_time, model_run=model_run)
+            alignment["fallback"] = reason
+            alignment["variant"] = key
+        if with_stats:
+            record_variant_stats(alignment, key, trace, time.time() - start)
+        aligned_traces.append(alignment)
     res = list(zip(variant_keys, aligned_traces))
     return res
 
+def record_variant_stats(alignment, key, trace, elapsed, worker=None):
+    """
+    Records the statistics of the alignment of a variant under the key **variant_stats** of the alignment
+
+    Parameters
+    -------------
+    alignment
+        alignment of the variant
+    key
+        variant
+    trace
+        trace of the variant
+    elapsed
+        wall time spent on the alignment (seconds)
+    worker
+        name of the worker, the id of the current process if None
+    """
+    alignment["variant_stats"] = {"variant": key, "length": len(trace), "time": elapsed,
+                                  "worker": worker if worker is not None else os.getpid()}
+
+def compute_fragment_alignments(fragment, projections, parameters, template=None):
+    """
+    Aligns projections of the variants against a fragment of the decomposed net
+
+    Parameters
+    -------------
+    fragment
+        fragment of the decomposition (see decomposition.decompose)
+    projections
+        tuples of activities
+    parameters
+        alignment parameters
+    template
+        template of the fragment (see decomposition.compile_template), compiled on each call if None
+
+    Returns
+    ------------
+    fragment_alignments
+        list of (projection, alignment), the alignment is None if it exceeded the budgets
+    """
+    parameters = dict(parameters)
+    if parameters.get(AUTO_SEARCH_VARIANT_PARAM, False):
+        longest = Trace([Event({"concept:name": activity}) for activity in max(projections, key=len)])
+        parameters[a_star.Parameters.SEARCH_VARIANT] = choose_search_variant(longest, fragment.net, parameters)
+    return list(zip(projections, decomposition.align_projections(fragment, projections, parameters=parameters,
+                                                                 template=template)))
+
+def choose_search_variant(trace, net, parameters):
+    """
+    Chooses the search engine for a variant: short variants against small models are aligned by Dijkstra, which
+    does not pay for the LP setup, all other variants by A*
+
+    Parameters
+    -------------
+    trace
+        variant to align
+    net
+        reset net of the model
+    parameters
+        alignment parameters, possibly containing the thresholds of the choice
+
+    Returns
+    ------------
+    search_variant
+        search variant to use (a_star.SearchVariants)
+    """
+    max_trace_length = parameters.get(DIJKSTRA_MAX_TRACE_LENGTH_PARAM, DEFAULT_DIJKSTRA_MAX_TRACE_LENGTH)
+    max_model_transitions = parameters.get(DIJKSTRA_MAX_MODEL_TRANSITIONS_PARAM,
+                                           DEFAULT_DIJKSTRA_MAX_MODEL_TRANSITIONS)
+    if len(trace) <= max_trace_length and len(net.transitions) <= max_model_transitions:
+        return a_star.SearchVariants.DIJKSTRA
+    return a_star.SearchVariants.MARKING_EQUATION
+
+def approximate_alignment(trace, net, initial_marking, final_marking, parameters, max_time=sys.maxsize,
+                          model_run=None):
+    """
+    Aligns a variant that exceeded its budget: by a beam search of width FALLBACK_BEAM_WIDTH_PARAM or, if the beam
+    does not reach the final marking within max_time, by the trivial alignment (log moves on all events followed by
+    the cheapest run of the model)
+
+    Parameters
+    -------------
+    trace
+        variant to align
+    net
+        reset net of the model
+    initial_marking
+        initial marking of the net
+    final_marking
+        final marking of the net
+    parameters
+        alignment parameters of the worker
+    max_time
+        time left for the beam search (seconds); the trivial alignment is returned right away if it is not positive
+    model_run
+        dictionary memoizing the cheapest run of the model between calls (filled on the first trivial alignment)
+
+    Returns
+    ------------
+    alignment
+        approximate alignment of the variant, in the format of alignments.apply_trace
+    """
+    # the beam is bounded by its width and by the time left, the budgets of the variant do not apply to it
+    fallback_parameters = dict(parameters)
+    fallback_parameters.pop(a_star.Parameters.PARAM_MAX_ALIGN_TIME_TRACE, None)
+    fallback_parameters.pop(a_star.Parameters.PARAM_MAX_STATES_TRACE, None)
+    if max_time > 0:
+        beam_parameters = dict(fallback_parameters)
+        beam_parameters[a_star.Parameters.SEARCH_VARIANT] = a_star.SearchVariants.BEAM
+        beam_parameters[a_star.Parameters.BEAM_WIDTH] = parameters.get(FALLBACK_BEAM_WIDTH_PARAM,
+                                                                       DEFAULT_FALLBACK_BEAM_WIDTH)
+        if max_time < sys.maxsize:
+            beam_parameters[a_star.Parameters.PARAM_MAX_ALIGN_TIME_TRACE] = max_time
+        alignment = alignments.apply_trace(trace, net, initial_marking, final_marking, parameters=beam_parameters)
+        if alignment is not None:
+            return alignment
+
+    # the cheapest run of the model is the alignment of the empty trace
+    if model_run is None:
+        model_run = {}
+    if "alignment" not in model_run:
+        model_run.update(alignments.apply_trace(Trace(), net, initial_marking, final_marking,
+                                                parameters=fallback_parameters))
+    activity_key = exec_utils.get_param_value(a_star.Parameters.ACTIVITY_KEY, parameters, xes.DEFAULT_NAME_KEY)
+    alignment = dict(model_run)
+    alignment["alignment"] = [(event[activity_key], ">>") for event in trace] + model_run["alignment"]
+    alignment["cost"] = model_run["cost"] + len(trace) * align_utils.STD_MODEL_LOG_MOVE_COST
+    alignment["bwc"] = alignment["cost"]
+    alignment["fitness"] = 0
+    alignment["search_variant"] = "trivial"
+    return alignment
+
+def fallback_report(aligned_traces):
+    """
+    Lists the variants whose alignment fell back to an approximate one because of the budgets
+
+    Parameters
+    -------------
+    aligned_traces
+        alignments as returned by compute_alignments
+
+    Returns
+    ------------
+    report
+        pandas dataframe indexed by variant with the number of cases, the reason of the fallback ("budget" or
+        "deadline"), the cost and the search variant of the approximate alignment
+    """
+    # compute_alignments repeats the same alignment object for all cases of a variant
+    cases = Counter()
+    fallbacks = {}
+    for alignment in aligned_traces:
+        if alignment is not None and "fallback" in alignment:
+            cases[id(alignment)] += 1
+            fallbacks[id(alignment)] = alignment
+    columns = ["Variant", "Cases", "Reason", "Cost", "Search Variant"]
+    result = pd.DataFrame([[alignment["variant"], cases[ident], alignment["fallback"], alignment["cost"],
+                            alignment.get("search_variant")] for ident, alignment in fallbacks.items()],
+                          columns=columns)
+    result.index = result["Variant"]
+    result.drop("Variant", axis=1, inplace=True)
+    result.sort_values(by="Cases", ascending=False, inplace=True)
+    return result
+
+def variant_stats(aligned_traces):
+    """
+    Lists the search statistics of the variants aligned with the parameter VARIANT_STATS_PARAM
+
+    Parameters
+    -------------
+    aligned_traces
+        alignments as returned by compute_alignments
+
+    Returns
+    ------------
+    stats
+        pandas dataframe indexed by variant with the length and the number of cases of the variant, the wall time
+        spent on it (seconds), the LP solves, visited and queued states of the search, the cost and search variant
+        of the alignment and the worker that aligned it ("cache" for alignments read from the alignment cache,
+        "main" for alignments recombined from fragments, whose time only covers the recombination); sorted by
+        decreasing time
+    """
+    # compute_alignments repeats the same alignment object for all cases of a variant
+    cases = Counter()
+    aligned = {}
+    for alignment in aligned_traces:
+        if alignment is not None and "variant_stats" in alignment:
+            cases[id(alignment)] += 1
+            aligned[id(alignment)] = alignment
+    columns = ["Variant", "Length", "Cases", "Time", "LP Solves", "Visited States", "Queued States", "Cost",
+               "Search Variant", "Worker"]
+    result = pd.DataFrame([[alignment["variant_stats"]["variant"], alignment["variant_stats"]["length"],
+                            cases[ident], alignment["variant_stats"]["time"], alignment.get("lp_solved", 0),
+                            alignment.get("visited_states", 0), alignment.get("queued_states", 0), alignment["cost"],
+                            alignment.get("search_variant"), alignment["variant_stats"]["worker"]]
+                           for ident, alignment in aligned.items()], columns=columns)
+    result.index = result["Variant"]
+    result.drop("Variant", axis=1, inplace=True)
+    result.sort_values(by="Time", ascending=False, inplace=True)
+    return result
+
+def slowest_variants(aligned_traces, n=10, weighted=False):
+    """
+    Lists the variants whose alignment took the most time
+
+    Parameters
+    -------------
+    aligned_traces
+        alignments as returned by compute_alignments with the parameter VARIANT_STATS_PARAM
+    n
+        number of variants
+    weighted
+        if True, the variants are ranked by their time multiplied by their number of cases
+
+    Returns
+    ------------
+    slowest
+        the n first rows of variant_stats, with the additional column "Total Time" (time multiplied by cases)
+    """
+    stats = variant_stats(aligned_traces)
+    stats["Total Time"] = stats["Time"] * stats["Cases"]
+    return stats.sort_values(by="Total Time" if weighted else "Time", ascending=False).head(n)
+
 def chunks(lst, n, randomize=False):
     """Yield successive n-sized chunks from lst."""
     if randomize:
@@ -79,6 +492,8 @@ def move_stats(alignments):
     missStats = Counter()
     logPositions = defaultdict(Counter)
     for alignment in alignments:
+        if alignment is None:
+            continue
         for moveTuple in alignment['alignment']:
             if moveTuple[0] == ">>":
                 modelStats[moveTuple[1]] += 1
@@ -115,7 +530,9 @@ def compute_alignments(df, bpmn_graph, parameters=None):
     Returns
     ------------
     alignments
-        alignments between bpmn model and event data
+        alignments between bpmn model and event data; alignments of variants exceeding the budgets are approximate
+        and carry the keys **fallback** and **variant** (see fallback_report); with VARIANT_STATS_PARAM, all
+        alignments carry the key **variant_stats** (see variant_stats)
     """
     if parameters is None:
         parameters = {}
@@ -142,33 +559,151 @@ def compute_alignments(df, bpmn_graph, parameters=None):
                                                       case_statistics.Parameters.ACTIVITY_KEY: activity_key})
     variants_df['index1'] = variants_df.index
     variants_dict = variants_df.groupby("variant")["index1"].count().to_dict()
-    # TODO: this approach is instable when there are activities containing a comma in their names
-    variants = [(variant, Trace([Event({"concept:name": activity}) for activity in variant.split(",")])) for variant in variants_dict.keys()]
+    variants = [(variant, variant_trace(variant)) for variant in variants_dict.keys()]
     # TODO: the align params needs to be uncommented in order to have a perfect match between bpmn model tasks and log activities
     # however, this is only required when there are tasks with the same label involved. in that case, instead of elemtn names
     # element ids must me used and ideally, the petri net transitions are named accordingly
     align_parameters = {}
     # align_parameters["ret_tuple_as_trans_desc"] = True
+    align_parameters[a_star.Parameters.VECTOR_MARKINGS] = parameters[
+        VECTOR_MARKINGS_PARAM] if VECTOR_MARKINGS_PARAM in parameters else False
+    if LP_BACKEND_PARAM in parameters:
+        align_parameters[a_star.Parameters.LP_BACKEND] = parameters[LP_BACKEND_PARAM]
+    if SUCCESSOR_CACHE_SIZE_PARAM in parameters:
+        align_parameters[a_star.Parameters.SUCCESSOR_CACHE_SIZE] = parameters[SUCCESSOR_CACHE_SIZE_PARAM]
+    if HEURISTIC_CACHE_SIZE_PARAM in parameters:
+        align_parameters[a_star.Parameters.HEURISTIC_CACHE_SIZE] = parameters[HEURISTIC_CACHE_SIZE_PARAM]
+    if AUTOMATON_MAX_STATES_PARAM in parameters:
+        align_parameters[a_star.Parameters.AUTOMATON_MAX_STATES] = parameters[AUTOMATON_MAX_STATES_PARAM]
+    if BEAM_WIDTH_PARAM in parameters:
+        align_parameters[a_star.Parameters.BEAM_WIDTH] = parameters[BEAM_WIDTH_PARAM]
+    if BEAM_F_BAND_PARAM in parameters:
+        align_parameters[a_star.Parameters.BEAM_F_BAND] = parameters[BEAM_F_BAND_PARAM]
+    # the search engine is either fixed for all variants or chosen per variant by the workers (default)
+    search_variant = parameters[SEARCH_VARIANT_PARAM] if SEARCH_VARIANT_PARAM in parameters else AUTO_SEARCH_VARIANT
+    if search_variant == LANGUAGE_SEARCH_VARIANT:
+        # the language is enumerated once and shipped to the workers with the net
+        language_parameters = {}
+        if LANGUAGE_MAX_VARIANTS_PARAM in parameters:
+            language_parameters[language_alignment.Parameters.MAX_VARIANTS] = parameters[LANGUAGE_MAX_VARIANTS_PARAM]
+        model_language = language_alignment.build(reset_net, initial_marking, final_marking,
+                                                  parameters=language_parameters)
+        if model_language is not None:
+            align_parameters[LANGUAGE_PARAM] = model_language
+        else:
+            search_variant = AUTO_SEARCH_VARIANT
+    if search_variant == AUTOMATON_DP_SEARCH_VARIANT:
+        align_parameters[AUTOMATON_DP_PARAM] = True
+        if parameters.get(PREFIX_TRIE_PARAM, False):
+            align_parameters[PREFIX_TRIE_PARAM] = True
+            variants.sort(key=lambda variant: [event["concept:name"] for event in variant[1]])
+    elif search_variant == AUTO_SEARCH_VARIANT:
+        align_parameters[AUTO_SEARCH_VARIANT_PARAM] = True
+        for param in [DIJKSTRA_MAX_TRACE_LENGTH_PARAM, DIJKSTRA_MAX_MODEL_TRANSITIONS_PARAM]:
+            if param in parameters:
+                align_parameters[param] = parameters[param]
+    elif search_variant != LANGUAGE_SEARCH_VARIANT:
+        align_parameters[a_star.Parameters.SEARCH_VARIANT] = search_variant
+    if MAX_ALIGN_TIME_TRACE_PARAM in parameters:
+        align_parameters[a_star.Parameters.PARAM_MAX_ALIGN_TIME_TRACE] = parameters[MAX_ALIGN_TIME_TRACE_PARAM]
+    if MAX_STATES_TRACE_PARAM in parameters:
+        align_parameters[a_star.Parameters.PARAM_MAX_STATES_TRACE] = parameters[MAX_STATES_TRACE_PARAM]
+    if FALLBACK_BEAM_WIDTH_PARAM in parameters:
+        align_parameters[FALLBACK_BEAM_WIDTH_PARAM] = parameters[FALLBACK_BEAM_WIDTH_PARAM]
+    align_parameters[alignments.Parameters.REPLAY_FAST_PATH] = parameters.get(REPLAY_FAST_PATH_PARAM, True)
+    with_stats = parameters.get(VARIANT_STATS_PARAM, False)
+    if with_stats:
+        align_parameters[VARIANT_STATS_PARAM] = True
+    # the best worst cost only depends on the model, it is computed once and shipped to the workers with the net
+    template = a_star.compile_template(reset_net, initial_marking, final_marking, parameters=align_parameters)
+    align_parameters[alignments.Parameters.BEST_WORST_COST_INTERNAL] = a_star.get_best_worst_cost(
+        reset_net, initial_marking, final_marking, parameters={a_star.Parameters.SYNC_PRODUCT_TEMPLATE: template})
+
+    cached_alignments = {}
+    persistent_cache = None
+    if parameters.get(ALIGNMENT_CACHE_PARAM, None) is not None:
+        # the parameters that do not change the alignments are not part of the key (the budgets only decide which
+        # variants fall back, and fallback alignments are never stored)
+        persistent_cache = alignment_cache.AlignmentCache(
+            parameters[ALIGNMENT_CACHE_PARAM], reset_net, initial_marking, final_marking, align_parameters,
+            ignored=[a_star.Parameters.VECTOR_MARKINGS.value, a_star.Parameters.LP_BACKEND.value,
+                     a_star.Parameters.SUCCESSOR_CACHE_SIZE.value, a_star.Parameters.HEURISTIC_CACHE_SIZE.value,
+                     alignments.Parameters.REPLAY_FAST_PATH.value, VARIANT_STATS_PARAM,
+                     a_star.Parameters.PARAM_MAX_ALIGN_TIME_TRACE.value, a_star.Parameters.PARAM_MAX_STATES_TRACE.value,
+                     FALLBACK_BEAM_WIDTH_PARAM])
+        cached_alignments = persistent_cache.get(variants_dict.keys())
+        if with_stats:
+            for key, alignment in cached_alignments.items():
+                record_variant_stats(alignment, key, key.split(","), 0.0, worker="cache")
+    total_variants = len(variants)
+    variants = [variant for variant in variants if variant[0] not in cached_alignments]
 
-    sub_logs = list(chunks(variants, CHUNK_SIZE, False))
+    net_decomposition = None
+    if parameters.get(DECOMPOSED_PARAM, False):
+        net_decomposition = decomposition.decompose(reset_net, initial_marking, final_marking)
     # gets the amount of real physical cores, so no artificial hyperthreading cores are counted
     num_cores = parameters[CORES_PARAM] if CORES_PARAM in parameters else max(1, psutil.cpu_count(logical=False) - 1)
 
-    proceed = tqdm(desc='Alignments', unit='', total=len(variants))
-    with ProcessPoolExecutor(max_workers=num_cores) as executor:
-        df_data = []
+    # the global budget starts with the scheduling of the variants
+    if MAX_ALIGN_TIME_PARAM in parameters:
+        align_parameters[ALIGN_DEADLINE_PARAM] = time.time() + parameters[MAX_ALIGN_TIME_PARAM]
+
+    proceed = tqdm(desc='Alignments', unit='', total=total_variants)
+    proceed.update(len(cached_alignments))
+    # the net (and its decomposition) is shipped once to each worker, the chunks only carry the variants
+    with ProcessPoolExecutor(max_workers=num_cores, initializer=install_model,
+                             initargs=(reset_net, initial_marking, final_marking, align_parameters,
+                                       net_decomposition)) as executor:
+        decomposed_alignments = {}
+        if net_decomposition is not None:
+            projections = {key: net_decomposition.project([event["concept:name"] for event in trace])
+                           for key, trace in variants}
+            futures = []
+            for i in range(len(net_decomposition.fragments)):
+                fragment_projections = sorted(set(projection[i] for projection in projections.values()))
+                for chunk in chunks(fragment_projections, CHUNK_SIZE, False):
+                    futures.append((i, executor.submit(align_fragment_variants, i, chunk)))
+            fragment_alignments = [{} for _ in net_decomposition.fragments]
+            for i, future in futures:
+                fragment_alignments[i].update(future.result())
+            recombine_parameters = {decomposition.Parameters.BEST_WORST_COST_INTERNAL: align_parameters[
+                alignments.Parameters.BEST_WORST_COST_INTERNAL]}
+            for key, trace in variants:
+                start = time.time()
+                alignment = decomposition.recombine(
+                    trace, net_decomposition, [fragment_alignments[i][projection] for i, projection in
+                                               enumerate(projections[key])],
+                    reset_net, initial_marking, final_marking, parameters=recombine_parameters)
+                if alignment is not None:
+                    if with_stats:
+                        record_variant_stats(alignment, key, trace, time.time() - start, worker="main")
+                    decomposed_alignments[key] = alignment
+            proceed.update(len(decomposed_alignments))
+        sub_logs = list(chunks([key for key, trace in variants if key not in decomposed_alignments], CHUNK_SIZE, False))
+        df_data = [list(decomposed_alignments.items())]
         futures = []
         for j, sub_log in enumerate(sub_logs):
-            futures.append(executor.submit(compute_alignment, sub_log, reset_net, initial_marking, final_marking, align_parameters))
+            futures.append(executor.submit(align_variants, sub_log))
+        replayed = 0
         for i, future in enumerate(as_completed(futures)):
+            replayed += sum(1 for key, alignment in future.result()
+                            if alignment.get("search_variant") == a_star.REPLAY_SEARCH_VARIANT)
+            proceed.set_postfix(replayed=replayed, refresh=False)
             proceed.update(len(future.result()))
             df_data.append(future.result())
     proceed.close()
+    if persistent_cache is not None:
+        # the statistics describe this run only
+        persistent_cache.put((key, {name: value for name, value in alignment.items() if name != "variant_stats"})
+                             for alignmentList in df_data for key, alignment in alignmentList
+                             if "fallback" not in alignment)
+        persistent_cache.close()
+        df_data.append(list(cached_alignments.items()))
    
     # put alignments into a list
-    alignments = [alignment for alignmentList in df_data for key, alignment in alignmentList for _ in range(variants_dict[key])]
+    aligned_traces = [alignment for alignmentList in df_data for key, alignment in alignmentList for _ in range(variants_dict[key])]
    
-    return alignments
+    return aligned_traces
 
 
 def derive_statistics(alignments, df, bpmn_graph, parameters=None):
@@ -0,0 +1,483 @@
+'''
+    The following code owned by procon and its author (More Info: https://github.com/require-gio/procon).
+
+    Procon is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    Procon is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with Procon.  If not, see <https://www.gnu.org/licenses/>.
+'''
+from collections import deque
+from copy import copy
+from enum import Enum
+
+from pm4py.objects.log.obj import Trace, Event
+from pm4py.util import exec_utils
+from pm4py.util.constants import PARAMETER_CONSTANT_ACTIVITY_KEY
+from pm4py.util.xes_constants import DEFAULT_NAME_KEY
+
+from procon.algorithm import a_star
+from procon.objects.petri_net import align_utils as utils
+from procon.objects.petri_net import semantics
+from procon.objects.petri_net.obj import PetriNet, Marking
+from procon.objects.petri_net.properties import SUBPROCESS, SUBPROCESS_PARENTS
+from procon.objects.petri_net.utils import add_arc_from_to, add_inhibitor_arc_from_to, add_reset_arc_from_to, \
+    is_inhibitor_arc, is_reset_arc
+
+DECOMPOSED_SEARCH_VARIANT = "decomposed"
+# role of a transition for the subprocess of a fragment: it enters, leaves or aborts (only resets) the subprocess
+ENTRY = "entry"
+EXIT = "exit"
+ABORT = "abort"
+
+
+class Parameters(Enum):
+    ACTIVITY_KEY = PARAMETER_CONSTANT_ACTIVITY_KEY
+    PARAM_ALIGNMENT_RESULT_IS_SYNC_PROD_AWARE = 'ret_tuple_as_trans_desc'
+    BEST_WORST_COST_INTERNAL = "best_worst_cost_internal"
+
+
+class Fragment(object):
+    """
+    Part of a decomposed net: the places of one subprocess (None for the main process) and a copy of every
+    transition connected to them, restricted to these places. The transitions owned by another fragment are silent
+    and free in the copy. A place busy@@@<subprocess> is marked while a subprocess runs, in its fragment and in the
+    fragments it borders: the transitions entering the subprocess require it to be unmarked and mark it, the ones
+    leaving or aborting it unmark it (and empty the subprocess).
+    """
+
+    def __init__(self, subprocess, net, initial_marking, final_marking, places, model_cost_function,
+                 sync_cost_function):
+        self.subprocess = subprocess
+        self.net = net
+        self.initial_marking = initial_marking
+        self.final_marking = final_marking
+        self.places = places
+        self.model_cost_function = model_cost_function
+        self.sync_cost_function = sync_cost_function
+        self.labels = set(t.label for t in net.transitions if t.label is not None)
+
+
+class Decomposition(object):
+    """
+    Fragments of a net cut at its subprocess borders; the first fragment is the one of the main process. Every
+    transition is owned by one fragment (home) and copied into all fragments it is connected to (members); every
+    label belongs to a single fragment.
+    """
+
+    def __init__(self, fragments, home, members):
+        self.fragments = fragments
+        self.home = home
+        self.members = members
+        self.label_fragment = {label: i for i, fragment in enumerate(fragments) for label in fragment.labels}
+
+    def project(self, activities):
+        """
+        Projects a sequence of activities on the fragments (activities unknown to the model go to the main process)
+
+        Parameters
+        ------------
+        activities
+            Activities of the trace
+
+        Returns
+        ------------
+        projections
+            Tuple with the tuple of activities of each fragment
+        """
+        projections = [[] for _ in self.fragments]
+        for activity in activities:
+            projections[self.label_fragment.get(activity, 0)].append(activity)
+        return tuple(tuple(projection) for projection in projections)
+
+
+def decompose(net, initial_marking, final_marking):
+    """
+    Cuts a net converted from BPMN at its subprocess borders (the places are grouped by their SUBPROCESS property).
+
+    The sum of the optimal costs of the fragments is a lower bound of the optimal alignment cost of the net,
+    assuming that a subprocess is not entered again before it is left or aborted and that it is empty once left
+    (as in the safe nets of block-structured models); an alignment recombined from the optimal fragment alignments
+    is therefore optimal.
+
+    Parameters
+    ------------
+    net
+        Reset/inhibitor net (from converter.apply)
+    initial_marking
+        Initial marking
+    final_marking
+        Final marking
+
+    Returns
+    ------------
+    decomposition
+        Decomposition of the net, None if the net has no subprocess or cannot be cut (a label occurring in two
+        fragments, a transition producing tokens in a fragment without consuming any, ...)
+    """
+    keys = sorted(set(p.properties.get(SUBPROCESS) for p in net.places) - {None})
+    if not keys or len(set(t.name for t in net.transitions)) < len(net.transitions):
+        return None
+    keys = [None] + keys
+    index = {key: i for i, key in enumerate(keys)}
+    group = {p: index[p.properties.get(SUBPROCESS)] for p in net.places}
+    transitions = sorted(net.transitions, key=lambda t: str(t.name))
+    # fragments of each subprocess and of the subprocesses it contains
+    parents = net.properties.get(SUBPROCESS_PARENTS, {})
+    subtree = [set() for _ in keys]
+    for key in keys[1:]:
+        ancestor = key
+        while ancestor is not None:
+            if ancestor in index:
+                subtree[index[ancestor]].add(index[key])
+            ancestor = parents.get(ancestor)
+
+    home = {}
+    members = {}
+    roles = {}
+    label_fragment = {}
+    for t in transitions:
+        arcs = {}
+        for a in t.in_arcs:
+            inputs, outputs, resets = arcs.get(group[a.source], (False, False, False))
+            arcs[group[a.source]] = (inputs or not (is_reset_arc(a) or is_inhibitor_arc(a)), outputs,
+                                     resets or is_reset_arc(a))
+        for a in t.out_arcs:
+            inputs, outputs, resets = arcs.get(group[a.target], (False, False, False))
+            arcs[group[a.target]] = (inputs, True, resets)
+        own = index.get(t.properties.get(SUBPROCESS))
+        if own not in arcs:
+            own = min(arcs) if arcs else 0
+        home[t.name] = own
+        members[t.name] = sorted(set(arcs) | {own})
+        if t.label is not None and label_fragment.setdefault(t.label, own) != own:
+            return None
+        # the role of a transition for a subprocess it connects to the outside of the subprocess
+        for i, (inputs, outputs, resets) in arcs.items():
+            if i > 0 and any(j not in subtree[i] for j in members[t.name]):
+                role = ENTRY if outputs and not inputs else EXIT if inputs and not outputs else \
+                    ABORT if resets and not inputs else None
+                if role is not None:
+                    roles[(t.name, i)] = role
+
+    # the parent view of a subprocess needs both the transitions entering and leaving it
+    busy = {}
+    for t in transitions:
+        for j in members[t.name]:
+            if roles.get((t.name, j)) in (ENTRY, EXIT):
+                for i in members[t.name]:
+                    if i not in subtree[j]:
+                        busy.setdefault((i, j), set()).add(roles[(t.name, j)])
+    if any(found != {ENTRY, EXIT} for found in busy.values()):
+        return None
+
+    fragments = []
+    for i, key in enumerate(keys):
+        fragment_net = PetriNet(net.name if key is None else "%s@@@%s" % (net.name, key))
+        place_map = {}
+        for p in sorted(net.places, key=lambda p: str(p.name)):
+            if group[p] == i:
+                place_map[p] = PetriNet.Place(p.name, properties=dict(p.properties))
+                fragment_net.places.add(place_map[p])
+        fragment_im = Marking({place_map[p]: n for p, n in initial_marking.items() if p in place_map})
+        fragment_fm = Marking({place_map[p]: n for p, n in final_marking.items() if p in place_map})
+        # the subprocess of the fragment and the subprocesses it borders are running while marked
+        busy_places = {}
+        for j in ([i] if key is not None else []) + [j for (k, j) in sorted(busy) if k == i]:
+            busy_places[j] = PetriNet.Place("busy@@@" + keys[j])
+            fragment_net.places.add(busy_places[j])
+
+        model_cost_function = {}
+        sync_cost_function = {}
+        for t in transitions:
+            if i not in members[t.name]:
+                continue
+            owned = home[t.name] == i
+            u = PetriNet.Transition(t.name, t.label if owned else None, properties=dict(t.properties))
+            fragment_net.transitions.add(u)
+            for a in t.in_arcs:
+                if a.source in place_map:
+                    if is_reset_arc(a):
+                        add_reset_arc_from_to(place_map[a.source], u, fragment_net)
+                    elif is_inhibitor_arc(a):
+                        add_inhibitor_arc_from_to(place_map[a.source], u, fragment_net)
+                    else:
+                        add_arc_from_to(place_map[a.source], u, fragment_net, weight=a.weight)
+            for a in t.out_arcs:
+                if a.target in place_map:
+                    add_arc_from_to(u, place_map[a.target], fragment_net, weight=a.weight)
+            if roles.get((t.name, i)) in (EXIT, ABORT):
+                # the subprocess is left empty
+                connected = set(a.source for a in u.in_arcs)
+                for p in place_map.values():
+                    if p not in connected:
+                        add_reset_arc_from_to(p, u, fragment_net)
+            for j, busy_place in busy_places.items():
+                role = roles.get((t.name, j))
+                if role == ENTRY:
+                    add_inhibitor_arc_from_to(busy_place, u, fragment_net)
+                    add_arc_from_to(u, busy_place, fragment_net)
+                elif role == EXIT:
+                    add_arc_from_to(busy_place, u, fragment_net)
+                elif role == ABORT:
+                    add_reset_arc_from_to(busy_place, u, fragment_net)
+            # a transition producing tokens without consuming any makes the fragment unbounded
+            if u.out_arcs and roles.get((t.name, i)) is None and \
+                    not any(not (is_reset_arc(a) or is_inhibitor_arc(a)) for a in u.in_arcs):
+                return None
+            if not owned:
+                model_cost_function[u] = 0
+            elif u.label is not None:
+                model_cost_function[u] = utils.STD_MODEL_LOG_MOVE_COST
+                sync_cost_function[u] = utils.STD_SYNC_COST
+            else:
+                model_cost_function[u] = utils.STD_TAU_COST
+        fragments.append(Fragment(key, fragment_net, fragment_im, fragment_fm, set(p.name for p in place_map),
+                                  model_cost_function, sync_cost_function))
+    return Decomposition(fragments, home, members)
+
+
+def compile_template(fragment, parameters=None):
+    """
+    Compiles the template of the synchronous product of a fragment (with the costs of the fragment), to be passed
+    to align_projections for all the projections aligned against the fragment
+
+    Parameters
+    ------------
+    fragment
+        Fragment of a decomposition
+    parameters
+        Parameters of the alignments
+
+    Returns
+    ------------
+    template
+        Template of the model half of the synchronous product of the fragment (see a_star.compile_template)
+    """
+    return a_star.compile_template(fragment.net, fragment.initial_marking, fragment.final_marking,
+                                   parameters=__fragment_parameters(fragment, parameters))
+
+
+def align_projections(fragment, projections, parameters=None, template=None):
+    """
+    Aligns projections of traces against a fragment (the parameters are the ones of a_star.apply, the fragment
+    brings its own costs)
+
+    Parameters
+    ------------
+    fragment
+        Fragment of a decomposition
+    projections
+        Tuples of activities
+    parameters
+        Parameters of the alignments
+    template
+        Template of the fragment (see compile_template), compiled on each call if None
+
+    Returns
+    ------------
+    alignments
+        Alignments of the projections in the format of a_star.apply with transition descriptions, None for the
+        projections exceeding the budgets
+    """
+    if parameters is None:
+        parameters = {}
+
+    activity_key = exec_utils.get_param_value(Parameters.ACTIVITY_KEY, parameters, DEFAULT_NAME_KEY)
+    parameters = __fragment_parameters(fragment, parameters)
+    parameters[a_star.Parameters.SYNC_PRODUCT_TEMPLATE] = template if template is not None else \
+        a_star.compile_template(fragment.net, fragment.initial_marking, fragment.final_marking, parameters=parameters)
+    return [a_star.apply(Trace([Event({activity_key: activity}) for activity in projection]), fragment.net,
+                         fragment.initial_marking, fragment.final_marking, parameters=copy(parameters))
+            for projection in projections]
+
+
+def __fragment_parameters(fragment, parameters):
+    # the fragment brings its own costs; a template of the whole net must not be reused for the fragment
+    parameters = copy(parameters) if parameters is not None else {}
+    parameters.pop(a_star.Parameters.SYNC_PRODUCT_TEMPLATE, None)
+    parameters.pop(a_star.Parameters.SYNC_PRODUCT_TEMPLATE.value, None)
+    parameters[a_star.Parameters.PARAM_MODEL_COST_FUNCTION] = fragment.model_cost_function
+    parameters[a_star.Parameters.PARAM_SYNC_COST_FUNCTION] = fragment.sync_cost_function
+    parameters[a_star.Parameters.PARAM_ALIGNMENT_RESULT_IS_SYNC_PROD_AWARE] = True
+    return parameters
+
+
+def recombine(trace, decomposition, fragment_alignments, net, initial_marking, final_marking, parameters=None):
+    """
+    Recombines the alignments of the projections of a trace into an alignment of the trace: the moves of the
+    fragments are interleaved following the trace, the copies of a transition in several fragments are fired
+    together, and the result is replayed on the net
+
+    Parameters
+    ------------
+    trace
+        Trace
+    decomposition
+        Decomposition of the net
+    fragment_alignments
+        Alignment of the projection of the trace on each fragment (see align_projections)
+    net
+        Net
+    initial_marking
+        Initial marking
+    final_marking
+        Final marking
+    parameters
+        Parameters (Parameters.BEST_WORST_COST_INTERNAL is the best worst cost of the net)
+
+    Returns
+    ------------
+    alignment
+        Alignment of the trace in the format of alignments.apply_trace, None if the fragment alignments cannot be
+        interleaved into a run of the net reaching the final marking
+    """
+    if parameters is None:
+        parameters = {}
+    if any(alignment is None for alignment in fragment_alignments):
+        return None
+
+    activity_key = exec_utils.get_param_value(Parameters.ACTIVITY_KEY, parameters, DEFAULT_NAME_KEY)
+    ret_tuple_as_trans_desc = exec_utils.get_param_value(Parameters.PARAM_ALIGNMENT_RESULT_IS_SYNC_PROD_AWARE,
+                                                         parameters, False)
+    best_worst_cost = exec_utils.get_param_value(Parameters.BEST_WORST_COST_INTERNAL, parameters, None)
+    if best_worst_cost is None:
+        best_worst_cost = a_star.get_best_worst_cost(net, initial_marking, final_marking, parameters={
+            a_star.Parameters.SYNC_PRODUCT_TEMPLATE: a_star.compile_template(net, initial_marking, final_marking)})
+
+    activities = [event[activity_key] for event in trace]
+    transitions = {t.name: t for t in net.transitions}
+    fragment_places = [set(p for p in net.places if p.name in fragment.places)
+                       for fragment in decomposition.fragments]
+    # moves of each fragment as (activity or None, transition name or None)
+    queues = [deque((move[1][0] if move[0][0] != utils.SKIP else None,
+                     move[0][1] if move[0][1] != utils.SKIP else None) for move in alignment["alignment"])
+              for alignment in fragment_alignments]
+
+    marking = copy(initial_marking)
+    position = 0
+    moves = []
+    # a move altering a fragment that does not expect it is only taken when nothing else can be fired (e.g. a
+    # subprocess entered and aborted in the run of its parent, but left out by the optimal alignment of its fragment)
+    lenient = False
+    while True:
+        progress = False
+        for i, queue in enumerate(queues):
+            while queue:
+                activity, name = queue[0]
+                if activity is not None and (position == len(activities) or activities[position] != activity):
+                    break
+                if name is None:
+                    moves.append((("t_%s_%d" % (activity, position), utils.SKIP), (activity, utils.SKIP)))
+                    position += 1
+                    queue.popleft()
+                    progress = True
+                    continue
+                t = transitions[name]
+                if decomposition.home[name] != i or not semantics.is_enabled(t, net, marking):
+                    break
+                new_marking = semantics.execute(t, net, marking)
+                # the other copies are fired with it, unless they do not alter their fragment at this point; a
+                # free copy of another transition with the same effect on the fragment stands in for it
+                consumed = []
+                blocked = False
+                for j in decomposition.members[name]:
+                    if j == i:
+                        continue
+                    effect = {p: new_marking[p] for p in fragment_places[j]}
+                    head = queues[j][0][1] if queues[j] else None
+                    if head == name or (head is not None and decomposition.home[head] != j and
+                                        __effect(transitions[head], marking, fragment_places[j]) == effect):
+                        consumed.append(j)
+                    elif not lenient and any(marking[p] != effect[p] for p in effect):
+                        blocked = True
+                        break
+                if blocked:
+                    break
+                for j in consumed:
+                    queues[j].popleft()
+                queue.popleft()
+                marking = new_marking
+                if activity is not None:
+                    moves.append((("t_%s_%d" % (activity, position), name), (activity, t.label)))
+                    position += 1
+                else:
+                    moves.append(((utils.SKIP, name), (utils.SKIP, t.label)))
+                progress = True
+                lenient = False
+        if not progress:
+            if lenient or not any(queues):
+                break
+            lenient = True
+    if any(queues) or position < len(activities) or marking != final_marking:
+        return None
+
+    cost = sum(alignment["cost"] for alignment in fragment_alignments)
+    bwc = len(activities) * utils.STD_MODEL_LOG_MOVE_COST + best_worst_cost
+    fitness = 1 - (cost // utils.STD_MODEL_LOG_MOVE_COST) / (
+            bwc // utils.STD_MODEL_LOG_MOVE_COST) if bwc > 0 else 0
+    alignment = {'alignment': moves if ret_tuple_as_trans_desc else [move[1] for move in moves], 'cost': cost,
+                 'fitness': fitness, 'bwc': bwc, 'search_variant': DECOMPOSED_SEARCH_VARIANT}
+    for key in ['visited_states', 'queued_states', 'traversed_arcs', 'lp_solved']:
+        alignment[key] = sum(fragment_alignment.get(key, 0) for fragment_alignment in fragment_alignments)
+    return alignment
+
+
+def __effect(t, marking, places):
+    """
+    Tokens of the given places after firing a transition (enabled or not) in a marking
+    """
+    effect = {p: marking[p] for p in places}
+    for a in t.in_arcs:
+        if a.source in effect:
+            if is_reset_arc(a):
+                effect[a.source] = 0
+            elif not is_inhibitor_arc(a):
+                effect[a.source] -= a.weight
+    for a in t.out_arcs:
+        if a.target in effect:
+            effect[a.target] += a.weight
+    return effect
+
+
+def apply_trace(trace, decomposition, net, initial_marking, final_marking, parameters=None):
+    """
+    Aligns a trace by aligning its projections on the fragments of a decomposition and recombining them
+
+    Parameters
+    ------------
+    trace
+        Trace
+    decomposition
+        Decomposition of the net (see decompose)
+    net
+        Net
+    initial_marking
+        Initial marking
+    final_marking
+        Final marking
+    parameters
+        Parameters of the alignments (see a_star.apply)
+
+    Returns
+    ------------
+    alignment
+        Alignment of the trace, None if the decomposition does not work out for the trace (the trace is then to be
+        aligned against the whole net)
+    """
+    if parameters is None:
+        parameters = {}
+
+    activity_key = exec_utils.get_param_value(Parameters.ACTIVITY_KEY, parameters, DEFAULT_NAME_KEY)
+    projections = decomposition.project([event[activity_key] for event in trace])
+    fragment_alignments = [align_projections(fragment, [projection], parameters=parameters)[0]
+                           for fragment, projection in zip(decomposition.fragments, projections)]
+    return recombine(trace, decomposition, fragment_alignments, net, initial_marking, final_marking,
+                     parameters=parameters)
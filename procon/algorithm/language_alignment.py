@@ -0,0 +1,192 @@
+'''
+    The following code owned by procon and its author (More Info: https://github.com/require-gio/procon).
+
+    Procon is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    Procon is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with Procon.  If not, see <https://www.gnu.org/licenses/>.
+'''
+from enum import Enum
+
+import numpy as np
+from pm4py.util import exec_utils
+from pm4py.util.constants import PARAMETER_CONSTANT_ACTIVITY_KEY
+from pm4py.util.xes_constants import DEFAULT_NAME_KEY
+
+from procon.objects.petri_net import align_utils as utils
+from procon.objects.petri_net.utils import acyclic_net_runs
+
+DEFAULT_MAX_VARIANTS = 500
+DEFAULT_MAX_STATES = 20000
+# label of the padding of the encoded model variants, matches nothing
+PADDING = -1
+
+
+class Parameters(Enum):
+    ACTIVITY_KEY = PARAMETER_CONSTANT_ACTIVITY_KEY
+    PARAM_ALIGNMENT_RESULT_IS_SYNC_PROD_AWARE = 'ret_tuple_as_trans_desc'
+    PARAM_MODEL_COST_FUNCTION = 'model_cost_function'
+    MAX_VARIANTS = "language_max_variants"
+    MAX_STATES = "language_max_states"
+
+
+class ModelLanguage(object):
+    """
+    Language of an acyclic model: its variants with the cheapest run producing each of them, and the variants encoded
+    as a matrix of integer labels (one variant per row, padded with PADDING) with their match masks for the batched
+    bit-parallel edit distance
+    """
+
+    def __init__(self, runs):
+        self.variants = sorted(runs)
+        self.costs = np.array([runs[variant][0] for variant in self.variants], dtype=np.int64)
+        self.runs = [runs[variant][1] for variant in self.variants]
+        self.label_index = {}
+        for variant in self.variants:
+            for label in variant:
+                self.label_index.setdefault(label, len(self.label_index))
+        self.lengths = np.array([len(variant) for variant in self.variants], dtype=np.int64)
+        self.encoded = np.full((len(self.variants), max(self.lengths, default=0)), PADDING, dtype=np.int64)
+        for k, variant in enumerate(self.variants):
+            self.encoded[k, :len(variant)] = [self.label_index[label] for label in variant]
+        self.masks = utils.bitparallel_masks(self.encoded, self.lengths, len(self.label_index))
+        # cost of aligning the empty trace, i.e. of the cheapest run of the model
+        self.best_worst_cost = int((self.lengths * utils.STD_MODEL_LOG_MOVE_COST + self.costs).min())
+
+    def encode(self, activities):
+        # activities that are not in the model match nothing
+        return [self.label_index.get(activity, PADDING - 1) for activity in activities]
+
+
+def build(net, initial_marking, final_marking, parameters=None):
+    """
+    Enumerates the language of an acyclic model (see utils.acyclic_net_runs)
+
+    Parameters
+    -------------
+    net
+        Petri net
+    initial_marking
+        Initial marking
+    final_marking
+        Final marking
+    parameters
+        Parameters.PARAM_MODEL_COST_FUNCTION -> costs of the model moves, only the ones of the silent transitions are
+        used (default: align_utils.STD_TAU_COST)
+        Parameters.MAX_VARIANTS -> maximum number of variants of the model (default: 500)
+        Parameters.MAX_STATES -> maximum number of explored (marking, partial trace) pairs (default: 20000)
+
+    Returns
+    -------------
+    model_language
+        :class:`ModelLanguage`, None if the model has too many variants (or loops), or no run reaching the final
+        marking
+    """
+    if parameters is None:
+        parameters = {}
+
+    model_cost_function = exec_utils.get_param_value(Parameters.PARAM_MODEL_COST_FUNCTION, parameters, None)
+    max_variants = exec_utils.get_param_value(Parameters.MAX_VARIANTS, parameters, DEFAULT_MAX_VARIANTS)
+    max_states = exec_utils.get_param_value(Parameters.MAX_STATES, parameters, DEFAULT_MAX_STATES)
+    runs = acyclic_net_runs(net, initial_marking, final_marking, model_cost_function=model_cost_function,
+                            max_variants=max_variants, max_states=max_states)
+    if not runs:
+        return None
+    return ModelLanguage(runs)
+
+
+def apply_variants(model_language, traces, parameters=None):
+    """
+    Aligns traces against the language of an acyclic model without building the synchronous product: the edit
+    distance (without substitution) of a trace to all the variants of the model is computed at once, an optimal
+    alignment is built on the variant minimizing the cost of the log and model moves plus the cost of the silent
+    transitions of its run. With the standard costs, the alignment is optimal.
+
+    Parameters
+    -------------
+    model_language
+        :class:`ModelLanguage` language of the model
+    traces
+        list of traces (:class:`pm4py.objects.log.obj.Trace`)
+    parameters
+        Parameters.ACTIVITY_KEY -> attribute of the events containing the activity
+        Parameters.PARAM_ALIGNMENT_RESULT_IS_SYNC_PROD_AWARE -> return the alignment as transition descriptions
+
+    Returns
+    -------------
+    alignments
+        list of alignments in the order of the traces, :class:`dict` with keys **alignment**, **cost**,
+        **visited_states**, **queued_states**, **traversed_arcs**, **lp_solved**, **fitness** and **bwc**
+    """
+    if parameters is None:
+        parameters = {}
+
+    activity_key = exec_utils.get_param_value(Parameters.ACTIVITY_KEY, parameters, DEFAULT_NAME_KEY)
+    ret_tuple_as_trans_desc = exec_utils.get_param_value(Parameters.PARAM_ALIGNMENT_RESULT_IS_SYNC_PROD_AWARE,
+                                                         parameters, False)
+
+    results = []
+    for trace in traces:
+        variant = [event[activity_key] for event in trace]
+        encoded = model_language.encode(variant)
+        distances = utils.levenshtein_batch_bitparallel(encoded, model_language.masks, model_language.lengths)
+        costs = distances * utils.STD_MODEL_LOG_MOVE_COST + model_language.costs
+        k = int(np.argmin(costs))
+        cost = int(costs[k])
+        moves = __backtrack(model_language, k, variant, encoded, ret_tuple_as_trans_desc)
+        bwc = len(variant) * utils.STD_MODEL_LOG_MOVE_COST + model_language.best_worst_cost
+        fitness = 1 - (cost // utils.STD_MODEL_LOG_MOVE_COST) / (
+                bwc // utils.STD_MODEL_LOG_MOVE_COST) if bwc > 0 else 0
+        results.append({'alignment': moves, 'cost': cost, 'visited_states': len(model_language.variants),
+                        'queued_states': 0, 'traversed_arcs': 0, 'lp_solved': 0, 'fitness': fitness, 'bwc': bwc})
+    return results
+
+
+def __backtrack(model_language, k, variant, encoded, ret_tuple_as_trans_desc):
+    # LCS table of the trace and the k-th variant of the model, then the moves along a longest common subsequence
+    model_variant = model_language.encoded[k, :model_language.lengths[k]]
+    table = np.zeros((len(encoded) + 1, len(model_variant) + 1), dtype=np.int64)
+    for i, label in enumerate(encoded):
+        candidates = np.maximum(table[i, 1:], table[i, :-1] + (model_variant == label))
+        np.maximum.accumulate(candidates, out=table[i + 1, 1:])
+    steps = []
+    i, j = len(encoded), len(model_variant)
+    while i > 0 or j > 0:
+        if i > 0 and j > 0 and encoded[i - 1] == model_variant[j - 1] and table[i, j] == table[i - 1, j - 1] + 1:
+            i, j = i - 1, j - 1
+            steps.append((i, j))
+        elif i > 0 and table[i, j] == table[i - 1, j]:
+            i -= 1
+            steps.append((i, None))
+        else:
+            j -= 1
+            steps.append((None, j))
+    steps.reverse()
+
+    # the silent transitions of the run are placed right before the next visible transition
+    skip = utils.SKIP
+    run = model_language.runs[k]
+    visible = [position for position, t in enumerate(run) if t.label is not None]
+    moves = []
+    next_position = 0
+    for i, j in steps:
+        if j is not None:
+            for t in run[next_position:visible[j]]:
+                moves.append(((skip, t.name), (skip, t.label)))
+            next_position = visible[j] + 1
+        # names of the transitions of the trace net, see utils.construct_trace_net_cost_aware
+        trace_name = 't_' + variant[i] + '_' + str(i) if i is not None else skip
+        t = run[visible[j]] if j is not None else None
+        moves.append(((trace_name, t.name if t is not None else skip),
+                      (variant[i] if i is not None else skip, t.label if t is not None else skip)))
+    for t in run[next_position:]:
+        moves.append(((skip, t.name), (skip, t.label)))
+    return moves if ret_tuple_as_trans_desc else [move[1] for move in moves]
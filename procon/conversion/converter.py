@@ -19,6 +19,7 @@ from enum import Enum
 
 from procon.conversion.reduction import apply_reset_inhibitor_net_reduction
 from procon.objects.petri_net.obj import PetriNet, Marking
+from procon.objects.petri_net.properties import SUBPROCESS, SUBPROCESS_PARENTS
 from procon.objects.petri_net.utils import add_arc_from_to, get_place_by_name, remove_arc, remove_place, get_transition_by_name, \
     add_reset_arc_from_to, get_place_by_prefix_postfix, is_reset_arc, is_normal_arc
 from procon.objects.bpmn.utils import get_boundary_events_of_activity, get_all_nodes_inside_process, get_subprocesses_sorted_by_depth, \
@@ -343,11 +344,15 @@ def apply(bpmn_graph, parameters=None):
         # TODO: rename all places and transitions inside the subprocess so they refer to the subprocess that is higher in hierarchy --> makes it possible to handle subs in subs
         # on the other hand, the termination event handling on global scale could have a problem with ambiguous names, ideally, we remove the prefix on the already handled
         # subprocess end activities
+        # the innermost subprocess is kept as SUBPROCESS property (used by the decomposed alignments)
+        net.properties.setdefault(SUBPROCESS_PARENTS, {})[activity_id] = subprocess.get_process()
         for place in net.places:
             if "process" in place.properties and place.properties["process"] == activity_id:
+                place.properties.setdefault(SUBPROCESS, activity_id)
                 place.properties["process"] = subprocess.get_process()
         for transition in net.transitions:
             if "process" in transition.properties and transition.properties["process"] == activity_id:
+                transition.properties.setdefault(SUBPROCESS, activity_id)
                 transition.properties["process"] = subprocess.get_process()
                 
 
@@ -1 +1 @@
-from procon.objects.petri_net import obj, utils, semantics, properties, synchronous_product, align_utils
\ No newline at end of file
+from procon.objects.petri_net import obj, utils, semantics, properties, synchronous_product, align_utils, automaton
\ No newline at end of file
@@ -17,6 +17,7 @@
 '''
 import heapq
 import sys
+from array import array
 from copy import copy
 from typing import List, Tuple
 
@@ -25,11 +26,18 @@ import numpy as np
 from pm4py.objects.petri_net import semantics, properties
 from pm4py.objects.petri_net.obj import Marking, PetriNet
 from pm4py.util.lp import solver as lp_solver
+from procon.objects.petri_net.utils import is_reset_arc, is_inhibitor_arc
+from procon.objects.petri_net.semantics import enabled_transitions_indexed, transitions_without_normal_preset
+from procon.objects.petri_net import semantics as reset_semantics
+from collections import OrderedDict, deque
 
 SKIP = '>>'
 STD_MODEL_LOG_MOVE_COST = 10000
 STD_TAU_COST = 1
 STD_SYNC_COST = 0
+DEFAULT_SUCCESSOR_CACHE_SIZE = 10000
+DEFAULT_CLOSURE_INDEX_SIZE = 10000
+DEFAULT_REACHABILITY_MAX_STATES = 10000
 
 
 def search_path_among_sol(sync_net: PetriNet, ini: Marking, fin: Marking,
@@ -200,6 +208,289 @@ def add_markings(curr, add):
     return m
 
 
+class CompactMarkingEncoding(object):
+    """
+    Encodes the markings of a net as fixed-length vectors of token counts, indexed by the place order of its
+    incidence matrix and stored as bytes. Bytes are immutable and cache their hash, so that the encoded markings
+    can be stored directly in the open and closed sets of the search.
+    Firing a transition is a vector addition on top of a mask that empties the places connected by reset arcs.
+    The token count of a place must fit into the chosen dtype (by default, at most 127 tokens per place).
+    """
+
+    def __init__(self, net, place_indices, dtype=np.int8):
+        self.dtype = np.dtype(dtype)
+        self.place_indices = place_indices
+        self.places = sorted(place_indices, key=lambda p: place_indices[p])
+        self.transitions = sorted(net.transitions, key=lambda t: str(t.name))
+        self.pre = np.zeros((len(self.transitions), len(self.places)), dtype=self.dtype)
+        self.keep = np.ones((len(self.transitions), len(self.places)), dtype=self.dtype)
+        self.effect = np.zeros((len(self.transitions), len(self.places)), dtype=self.dtype)
+        self.inhibitor = np.zeros((len(self.transitions), len(self.places)), dtype=bool)
+        for i, t in enumerate(self.transitions):
+            for a in t.in_arcs:
+                j = place_indices[a.source]
+                if is_reset_arc(a):
+                    self.keep[i, j] = 0
+                elif is_inhibitor_arc(a):
+                    self.inhibitor[i, j] = True
+                else:
+                    self.pre[i, j] += a.weight
+                    self.effect[i, j] -= a.weight
+            for a in t.out_arcs:
+                self.effect[i, place_indices[a.target]] += a.weight
+        self.has_inhibitor_arcs = bool(self.inhibitor.any())
+
+    def encode(self, marking):
+        vec = np.zeros(len(self.places), dtype=self.dtype)
+        for p in marking:
+            vec[self.place_indices[p]] = marking[p]
+        return vec.tobytes()
+
+    def decode(self, state):
+        vec = self.vector(state)
+        return Marking({self.places[j]: int(vec[j]) for j in np.flatnonzero(vec)})
+
+    def vector(self, state):
+        return np.frombuffer(state, dtype=self.dtype)
+
+    def enabled_transitions(self, state):
+        """
+        Returns the indices of the transitions enabled in the (encoded) marking
+        """
+        vec = self.vector(state)
+        enabled = np.all(vec >= self.pre, axis=1)
+        if self.has_inhibitor_arcs:
+            enabled &= ~np.any(self.inhibitor & (vec > 0), axis=1)
+        return np.flatnonzero(enabled)
+
+    def fire(self, state, indices):
+        """
+        Returns the (encoded) markings reached by firing each of the given transitions in the (encoded) marking
+        """
+        new_vecs = self.vector(state) * self.keep[indices] + self.effect[indices]
+        return [row.tobytes() for row in new_vecs]
+
+
+class ModelSuccessorCache(object):
+    """
+    Bounded LRU cache mapping markings of the model half of a synchronous product to their model-side successors,
+    i.e. the enabled model moves and the model markings they lead to. Model moves only touch model places, hence the
+    successors can be shared by the synchronous products of all variants built from the same template.
+    """
+
+    def __init__(self, model_net, max_size=DEFAULT_SUCCESSOR_CACHE_SIZE):
+        self.model_places = frozenset(model_net.places)
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        # tau-closure and label reachability of the model markings, built on these successors (see TauClosureIndex)
+        self.closure_index = None
+        self.__trans_wo_normal_preset = transitions_without_normal_preset(model_net)
+        self.__successors = OrderedDict()
+
+    def split(self, marking):
+        """
+        Splits a marking of the synchronous product into its model and its trace part
+        """
+        model_marking = Marking()
+        trace_marking = Marking()
+        for p, n in marking.items():
+            if p in self.model_places:
+                model_marking[p] = n
+            else:
+                trace_marking[p] = n
+        return model_marking, trace_marking
+
+    def successors(self, model_marking):
+        """
+        Returns the list of (model move, model marking reached by firing it) enabled in a model marking
+        """
+        successors = self.__successors.get(model_marking)
+        if successors is not None:
+            self.hits += 1
+            self.__successors.move_to_end(model_marking)
+            return successors
+        self.misses += 1
+        successors = [(t, add_markings(model_marking, t.add_marking))
+                      for t in enabled_transitions_indexed(model_marking, self.__trans_wo_normal_preset)]
+        self.__successors[model_marking] = successors
+        if len(self.__successors) > self.max_size:
+            self.__successors.popitem(last=False)
+        return successors
+
+
+def model_move_label(t):
+    """
+    Label of a model move of a synchronous product in the model, None for silent transitions
+    """
+    return t.label[1]
+
+
+class TauClosureIndex(object):
+    """
+    Bounded LRU index over the markings of a model: the tau-closure of a marking, i.e. the visible transitions
+    enabled after silent transitions only with the cheapest silent path to each of them, and the visible labels
+    reachable from a marking at all. Both are computed on demand from the successors of the markings and memoized;
+    the exploration of the reachable labels is bounded, beyond the bound the labels are unknown (None).
+    """
+
+    def __init__(self, successors, costs=None, label_function=None, max_size=DEFAULT_CLOSURE_INDEX_SIZE,
+                 max_reachability_states=DEFAULT_REACHABILITY_MAX_STATES):
+        """
+        Parameters
+        ------------
+        successors
+            function returning the list of (transition, marking reached by firing it) enabled in a marking
+        costs
+            costs of the silent transitions (STD_TAU_COST if not provided)
+        label_function
+            label of a transition, None for silent transitions (default: the label of the transition)
+        max_size
+            maximum number of markings kept in each memo
+        max_reachability_states
+            maximum number of markings explored for the reachable labels of a marking
+        """
+        self.successors = successors
+        self.costs = costs
+        self.label_function = label_function if label_function is not None else lambda t: t.label
+        self.max_size = max_size
+        self.max_reachability_states = max_reachability_states
+        self.pruned = 0
+        self.__closures = OrderedDict()
+        self.__reachable_labels = OrderedDict()
+
+    def closure(self, marking):
+        """
+        Returns the tau-closure of a marking as a dict visible transition -> (cost of the cheapest silent path
+        enabling it, silent path as tuple of transitions, marking reached by the path)
+        """
+        closure = self.__lookup(self.__closures, marking)
+        if closure is not None:
+            return closure
+        best = {marking: (0, ())}
+        open_set = [(0, 0, marking)]
+        counter = 1
+        closed = set()
+        closure = {}
+        while open_set:
+            cost, _, current = heapq.heappop(open_set)
+            if current in closed:
+                continue
+            closed.add(current)
+            path = best[current][1]
+            for t, new_marking in self.successors(current):
+                if self.label_function(t) is not None:
+                    if t not in closure or cost < closure[t][0]:
+                        closure[t] = (cost, path, current)
+                    continue
+                new_cost = cost + (self.costs[t] if self.costs is not None else STD_TAU_COST)
+                if new_marking not in best or new_cost < best[new_marking][0]:
+                    best[new_marking] = (new_cost, path + (t,))
+                    heapq.heappush(open_set, (new_cost, counter, new_marking))
+                    counter += 1
+        self.__store(self.__closures, marking, closure)
+        return closure
+
+    def labels(self, marking):
+        """
+        Returns the visible labels enabled after silent transitions only
+        """
+        return set(self.label_function(t) for t in self.closure(marking))
+
+    def reachable_labels(self, marking):
+        """
+        Returns the frozenset of the visible labels reachable from a marking, None if more than
+        max_reachability_states markings are reachable. The reachable markings are explored once (markings whose
+        labels are known are not explored again) and the labels of all of them are memoized: the labels of a
+        strongly connected component are the labels of its transitions and of the components it reaches.
+        """
+        labels = self.__lookup(self.__reachable_labels, marking)
+        if labels is not None:
+            return labels if labels is not False else None
+        # iterative Tarjan over the unknown markings (numbered in the order of discovery, as markings are costly
+        # to hash)
+        markings = [marking]
+        numbers = {marking: 0}
+        lowlink = [0]
+        on_stack = [True]
+        stack = [0]
+        own_labels = [set()]
+        completed = {}
+        work = [(0, iter(self.successors(marking)))]
+        while work:
+            node, successors = work[-1]
+            descended = False
+            for t, target in successors:
+                label = self.label_function(t)
+                if label is not None:
+                    own_labels[node].add(label)
+                number = numbers.get(target)
+                if number is not None:
+                    if number in completed:
+                        own_labels[node] |= completed[number]
+                    elif on_stack[number]:
+                        lowlink[node] = min(lowlink[node], number)
+                    continue
+                known = self.__reachable_labels.get(target)
+                if known is not None and known is not False:
+                    own_labels[node] |= known
+                    continue
+                if len(markings) >= self.max_reachability_states:
+                    self.__store(self.__reachable_labels, marking, False)
+                    return None
+                number = len(markings)
+                markings.append(target)
+                numbers[target] = number
+                lowlink.append(number)
+                on_stack.append(True)
+                stack.append(number)
+                own_labels.append(set())
+                work.append((number, iter(self.successors(target))))
+                descended = True
+                break
+            if descended:
+                continue
+            work.pop()
+            if lowlink[node] == node:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    component.append(member)
+                    if member == node:
+                        break
+                labels = frozenset().union(*(own_labels[member] for member in component))
+                for member in component:
+                    completed[member] = labels
+            if work:
+                parent = work[-1][0]
+                if node in completed:
+                    own_labels[parent] |= completed[node]
+                else:
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+        for member, labels in completed.items():
+            self.__store(self.__reachable_labels, markings[member], labels)
+        return completed[0]
+
+    def can_reach(self, marking, label):
+        """
+        Returns False if the label can certainly not be fired any more from the marking
+        """
+        labels = self.reachable_labels(marking)
+        return labels is None or label in labels
+
+    def __lookup(self, memo, marking):
+        value = memo.get(marking)
+        if value is not None:
+            memo.move_to_end(marking)
+        return value
+
+    def __store(self, memo, marking, value):
+        memo[marking] = value
+        if len(memo) > self.max_size:
+            memo.popitem(last=False)
+
+
 def __get_alt(open_set, new_marking):
     for item in open_set:
         if item.m == new_marking:
@@ -208,22 +499,26 @@ def __get_alt(open_set, new_marking):
 
 def __reconstruct_alignment(state, visited, queued, traversed, ret_tuple_as_trans_desc=False, lp_solved=0):
     alignment = list()
-    if state.p is not None and state.t is not None:
-        parent = state.p
-        if ret_tuple_as_trans_desc:
-            alignment = [(state.t.name, state.t.label)]
-            while parent.p is not None:
-                alignment = [(parent.t.name, parent.t.label)] + alignment
-                parent = parent.p
-        else:
-            alignment = [state.t.label]
-            while parent.p is not None:
-                alignment = [parent.t.label] + alignment
-                parent = parent.p
+    # collected from the last move backwards and reversed once
+    node = state
+    while node.p is not None and node.t is not None:
+        alignment.append((node.t.name, node.t.label) if ret_tuple_as_trans_desc else node.t.label)
+        node = node.p
+    alignment.reverse()
     return {'alignment': alignment, 'cost': state.g, 'visited_states': visited, 'queued_states': queued,
             'traversed_arcs': traversed, 'lp_solved': lp_solved}
 
 
+def __reconstruct_alignment_from_store(store, node, visited, queued, traversed, ret_tuple_as_trans_desc=False,
+                                       lp_solved=0):
+    alignment = [(t.name, t.label) if ret_tuple_as_trans_desc else t.label for t in store.path(node)]
+    # costs are stored as floats, integer costs are returned as such
+    cost = store.g[node]
+    cost = int(cost) if cost.is_integer() else cost
+    return {'alignment': alignment, 'cost': cost, 'visited_states': visited, 'queued_states': queued,
+            'traversed_arcs': traversed, 'lp_solved': lp_solved}
+
+
 def __derive_heuristic(incidence_matrix, cost_vec, x, t, h):
     x_prime = x.copy()
     x_prime[incidence_matrix.transitions[t]] -= 1
@@ -246,8 +541,8 @@ def __trust_solution(x):
 
 
 def __compute_exact_heuristic_new_version(sync_net, a_matrix, h_cvx, g_matrix, cost_vec, incidence_matrix,
-                                          marking, fin_vec, variant, use_cvxopt=False, strict=True):
-    m_vec = incidence_matrix.encode_marking(marking)
+                                          marking, fin_vec, variant, use_cvxopt=False, strict=True, encoding=None):
+    m_vec = incidence_matrix.encode_marking(marking) if encoding is None else encoding.vector(marking)
     b_term = [i - j for i, j in zip(fin_vec, m_vec)]
     b_term = np.matrix([x * 1.0 for x in b_term]).transpose()
 
@@ -292,6 +587,92 @@ def __vectorize_initial_final_cost(incidence_matrix, ini, fin, cost_function):
     return ini_vec, fini_vec, cost_vec
 
 
+class SearchNodeStore:
+    """
+    Struct-of-arrays store of the nodes of the A* search. A node is an index into parallel arrays holding the cost so
+    far, the heuristic, the parent node and the column of the transition leading to it; the open set only holds
+    plain tuples of priorities and node.
+
+    The solution vector of the heuristic is kept only for trusted nodes: for a successor, it is the solution of its
+    parent with one firing of the transition less, and it is materialized when the node is expanded or when its
+    heuristic has to be recomputed.
+    """
+
+    def __init__(self, incidence_matrix):
+        """
+        Parameters
+        -----------
+        incidence_matrix
+            incidence matrix of the (estimation) net, mapping each transition to its column
+        """
+        self.transitions = [None] * len(incidence_matrix.transitions)
+        for t, col in incidence_matrix.transitions.items():
+            self.transitions[col] = t
+        self.g = array('d')
+        self.h = array('d')
+        self.parent = array('q')
+        self.transition = array('q')
+        self.trust = bytearray()
+        self.markings = []
+        self.x = {}
+
+    def __len__(self):
+        return len(self.markings)
+
+    def add(self, g, h, marking, parent=-1, col=-1, trust=False, x=None):
+        """
+        Stores a node and returns its index; the solution vector x is stored only if given (trusted node solved by
+        the LP)
+        """
+        node = len(self.markings)
+        self.g.append(g)
+        self.h.append(h)
+        self.parent.append(parent)
+        self.transition.append(col)
+        self.trust.append(1 if trust else 0)
+        self.markings.append(marking)
+        if x is not None:
+            self.x[node] = x
+        return node
+
+    def solution(self, node):
+        """
+        Solution vector of the heuristic of the node (derived from the one of its parent if not stored)
+        """
+        if node in self.x:
+            return self.x[node]
+        x = copy(self.x[self.parent[node]])
+        x[self.transition[node]] -= 1
+        return x
+
+    def update(self, node, h, x):
+        """
+        Stores the exact heuristic of a node, which becomes trusted
+        """
+        self.h[node] = h
+        self.trust[node] = 1
+        self.x[node] = x
+
+    def expand(self, node):
+        """
+        Materializes and keeps the solution vector of a trusted node, which is needed to derive its successors
+        """
+        x = self.solution(node)
+        self.x[node] = x
+        return x
+
+    def path(self, node):
+        """
+        Transitions leading from the initial node to the given one
+        """
+        path = []
+        while self.parent[node] >= 0:
+            path.append(self.transitions[self.transition[node]])
+            node = self.parent[node]
+        path.reverse()
+        return path
+
+
 class SearchTuple:
     def __init__(self, f, g, h, m, p, t, x, trust):
         self.f = f
@@ -419,75 +800,62 @@ class TweakedSearchTuple:
         return " ".join(string_build)
 
 
-def get_visible_transitions_eventually_enabled_by_marking(net, marking):
+def get_visible_transitions_eventually_enabled_by_marking(net, marking, closure_index=None):
     """
     Get visible transitions eventually enabled by marking (passing possibly through hidden transitions)
     Parameters
     ----------
     net
-        Petri net
+        Petri net (reset and inhibitor arcs are respected)
     marking
         Current marking
+    closure_index
+        TauClosureIndex of the net, memoizing the tau-closures over the calls (a throwaway index is used if not
+        provided)
     """
-    all_enabled_transitions = sorted(list(semantics.enabled_transitions(net, marking)),
-                                     key=lambda x: (str(x.name), id(x)))
-    initial_all_enabled_transitions_marking_dictio = {}
-    all_enabled_transitions_marking_dictio = {}
-    for trans in all_enabled_transitions:
-        all_enabled_transitions_marking_dictio[trans] = marking
-        initial_all_enabled_transitions_marking_dictio[trans] = marking
-    visible_transitions = set()
-    visited_transitions = set()
-
-    i = 0
-    while i < len(all_enabled_transitions):
-        t = all_enabled_transitions[i]
-        marking_copy = copy(all_enabled_transitions_marking_dictio[t])
-
-        if repr([t, marking_copy]) not in visited_transitions:
-            if t.label is not None:
-                visible_transitions.add(t)
-            else:
-                if semantics.is_enabled(t, net, marking_copy):
-                    new_marking = semantics.execute(t, net, marking_copy)
-                    new_enabled_transitions = sorted(list(semantics.enabled_transitions(net, new_marking)),
-                                                     key=lambda x: (str(x.name), id(x)))
-                    for t2 in new_enabled_transitions:
-                        all_enabled_transitions.append(t2)
-                        all_enabled_transitions_marking_dictio[t2] = new_marking
-            visited_transitions.add(repr([t, marking_copy]))
-        i = i + 1
-
-    return visible_transitions
+    if closure_index is None:
+        closure_index = TauClosureIndex(
+            lambda m: [(t, reset_semantics.execute(t, net, m)) for t in reset_semantics.enabled_transitions(net, m)])
+    return set(closure_index.closure(marking))
+
+
+def __is_silent_label(label, skip=False):
+    # labels standing for silent steps in the sequences compared by the edit distances
+    return label in ["tau", None] or label[0] == "n" or (skip and ("skip" in label or "tau" in label))
+
 
 def discountedEditDistance(s1,s2,exponent=2, modeled=True):
     '''
     Fast implementation of the discounted distance
     Inspired from the faster version of the edit distance
+    (the discounts and the silent labels are computed once, the discounted length of the prefixes incrementally)
     '''
-    #print(s1,s2)
     if len(s1) < len(s2):
         return discountedEditDistance(s2, s1,exponent=exponent,modeled=False)
 
+    discounts = [exponent**(-(a)) for a in range(len(s1) + len(s2) + 1)]
+    # the silent labels are only looked for in the modeled sequence
+    silent1 = [__is_silent_label(c1) for c1 in s1] if modeled else None
+    silent1_skip = [silent or "skip" in c1 for silent, c1 in zip(silent1, s1)] if modeled else None
+    silent2 = [__is_silent_label(c2) for c2 in s2] if not modeled else None
     previous_row = [0]
     for a in range(len(s2)):
-        if not modeled and (s2[a]=="tau" or s2[a]==None or s2[a][0]=="n"):
+        if not modeled and silent2[a]:
             previous_row.append(previous_row[-1])
         else :
-            previous_row.append(previous_row[-1]+exponent**(-(a)))
+            previous_row.append(previous_row[-1]+discounts[a])
+    exp1 = 0
     for i, c1 in enumerate(s1):
-        if modeled:
-            exp1 = sum(exponent**(-(a))  for a in range(i+1) if s1[a]!="tau" and s1[a]!=None and s1[a][0]!="n")
-        else :
-            exp1 = sum(exponent**(-(a))  for a in range(i+1))
+        if not modeled or not silent1[i]:
+            exp1 = exp1 + discounts[i]
         current_row =  [exp1]
         for j, c2 in enumerate(s2):
 
-            exp2 = exponent**(-(i+1 + j))
-            if modeled and  (c1 in ["tau", None] or c1[0]=="n" or "skip" in c1):
+            exp2 = discounts[i+1 + j]
+            if modeled and silent1_skip[i]:
                 insertions = previous_row[j +1 ]  # j+1 instead of j since previous_row and current_row are one character longer
                 deletions = current_row[j] + exp2    # than s2
-            elif not modeled and (c2 in ["tau", None] or c2[0]=="n"):
+            elif not modeled and silent2[j]:
                 insertions = previous_row[j +1 ] + exp2 # j+1 instead of j since previous_row and current_row are one character longer
                 deletions = current_row[j]
             else :
@@ -506,32 +874,164 @@ def discountedEditDistance(s1,s2,exponent=2, modeled=True):
 def levenshtein(seq1, seq2):
     '''
     Edit distance without substitution
+    (row by row: a cell is reached from the cell above or diagonally, then the row is a running minimum along the
+    insertions)
     '''
-    size_x = len(seq1) + 1
-    size_y = len(seq2) + 1
-    matrix = np.zeros ((size_x, size_y))
-    for x in range(size_x):
-        matrix [x, 0] = x
-    for y in range(size_y):
-        matrix [0, y] = y
-
-    for x in range(1, size_x):
-        for y in range(1, size_y):
-            if seq1[x-1] in [None,"tau"] or seq1[x-1][0]=='n' or "skip" in seq1[x-1] or "tau" in seq1[x-1] :
-                matrix [x,y] = min(
-                    matrix[x-1, y],
-                    matrix[x,y-1] + 1
-                )
-            elif seq1[x-1] == seq2[y-1]:
-                matrix [x,y] = min(
-                    matrix[x-1, y] + 1,
-                    matrix[x-1, y-1],
-                    matrix[x, y-1] + 1
-                )
-            else:
-                matrix [x,y] = min(
-                    matrix[x-1,y] + 1,
-                    matrix[x,y-1] + 1
-                )
-    return (matrix[size_x - 1, size_y - 1])
+    label_index = {}
+    encoded2 = np.array([label_index.setdefault(label, len(label_index)) for label in seq2], dtype=np.int64)
+    offsets = np.arange(len(seq2) + 1, dtype=np.float64)
+    row = offsets.copy()
+    for x, label in enumerate(seq1, start=1):
+        candidates = np.empty_like(row)
+        candidates[0] = x
+        if __is_silent_label(label, skip=True):
+            candidates[1:] = row[1:]
+        else:
+            candidates[1:] = row[1:] + 1
+            matches = encoded2 == label_index.get(label, -1)
+            candidates[1:][matches] = np.minimum(candidates[1:][matches], row[:-1][matches])
+        row = np.minimum.accumulate(candidates - offsets) + offsets
+    return row[-1]
+
+
+
+def levenshtein_batch(seq, sequences, lengths):
+    '''
+    Edit distance without substitution between a sequence and a batch of sequences, all encoded as integer labels:
+    the batch is a matrix (one sequence per row, padded with negative labels) of which only the first lengths[k]
+    entries of row k are used. Negative labels match nothing. The longest common subsequences of all the rows are
+    computed together, one event of seq at a time (a row of the LCS table is a running maximum), and the distance is
+    len(seq) + lengths - 2 * LCS
+    '''
+    sequences = np.asarray(sequences, dtype=np.int64).reshape(len(lengths), -1)
+    lengths = np.asarray(lengths, dtype=np.int64)
+    lcs = np.zeros((sequences.shape[0], sequences.shape[1] + 1), dtype=np.int64)
+    for label in seq:
+        if label < 0:
+            continue
+        # lcs[k, j] = max(lcs[k, j - 1], previous lcs[k, j], previous lcs[k, j - 1] + match)
+        candidates = np.maximum(lcs[:, 1:], lcs[:, :-1] + (sequences == label))
+        np.maximum.accumulate(candidates, axis=1, out=lcs[:, 1:])
+    return len(seq) + lengths - 2 * lcs[np.arange(len(lengths)), lengths]
+
+
+def encode_labels(sequences, label_index=None):
+    '''
+    Encodes sequences of labels as integer labels for the edit distances: returns the matrix of the encoded
+    sequences (one per row, padded with -1), their lengths and the label index (extended with the new labels)
+    '''
+    if label_index is None:
+        label_index = {}
+    lengths = np.array([len(sequence) for sequence in sequences], dtype=np.int64)
+    encoded = np.full((len(sequences), max(lengths, default=0)), -1, dtype=np.int64)
+    for k, sequence in enumerate(sequences):
+        encoded[k, :len(sequence)] = [label_index.setdefault(label, len(label_index)) for label in sequence]
+    return encoded, lengths, label_index
 
+
+def levenshtein_bitparallel(seq1, seq2):
+    '''
+    Edit distance without substitution computed bit-parallel (Allison-Dix/Hyyro, the LCS counterpart of Myers'
+    algorithm): the LCS row against seq2 is a bit vector (a Python integer of len(seq2) bits) updated by a few word
+    operations per event of seq1
+    '''
+    masks = {}
+    for j, label in enumerate(seq2):
+        masks[label] = masks.get(label, 0) | (1 << j)
+    full = (1 << len(seq2)) - 1
+    v = full
+    for label in seq1:
+        u = v & masks.get(label, 0)
+        v = ((v + u) | (v - u)) & full
+    lcs = len(seq2) - bin(v).count("1")
+    return len(seq1) + len(seq2) - 2 * lcs
+
+
+def levenshtein_antidiagonal(seq1, seq2):
+    '''
+    Edit distance without substitution computed by anti-diagonals: the cells i + j = k only depend on the
+    anti-diagonals k - 1 and k - 2, so that each anti-diagonal is one vector operation (cells indexed by i)
+    '''
+    a = np.asarray(seq1)
+    b = np.asarray(seq2)
+    n, m = len(a), len(b)
+    if n == 0 or m == 0:
+        return n + m
+    unreachable = n + m + 1
+    # anti-diagonals 0 and 1
+    previous2 = np.full(n + 1, unreachable, dtype=np.int64)
+    previous2[0] = 0
+    previous = np.full(n + 1, unreachable, dtype=np.int64)
+    previous[:2] = 1
+    for k in range(2, n + m + 1):
+        current = np.full(n + 1, unreachable, dtype=np.int64)
+        if k <= m:
+            current[0] = k
+        if k <= n:
+            current[k] = k
+        i = np.arange(max(1, k - m), min(n, k - 1) + 1)
+        if len(i) > 0:
+            cells = np.minimum(previous[i - 1], previous[i]) + 1
+            matches = a[i - 1] == b[k - i - 1]
+            cells[matches] = np.minimum(cells[matches], previous2[i - 1][matches])
+            current[i] = cells
+        previous2, previous = previous, current
+    return int(previous[n])
+
+
+def bitparallel_masks(sequences, lengths, n_labels):
+    '''
+    Match masks of a batch of encoded sequences (see encode_labels) for levenshtein_batch_bitparallel: bit b of word w
+    of masks[label, k] is set iff sequences[k, 64 * w + b] == label
+    '''
+    sequences = np.asarray(sequences, dtype=np.int64).reshape(len(lengths), -1)
+    words = max(1, (sequences.shape[1] + 63) // 64)
+    masks = np.zeros((n_labels, sequences.shape[0], words), dtype=np.uint64)
+    rows, columns = np.nonzero((sequences >= 0) & (sequences < n_labels))
+    bits = np.left_shift(np.uint64(1), (columns % 64).astype(np.uint64))
+    np.bitwise_or.at(masks, (sequences[rows, columns], rows, columns // 64), bits)
+    return masks
+
+
+# number of set bits of each byte
+__POPCOUNT = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.int64)
+
+
+def levenshtein_batch_bitparallel(seq, masks, lengths):
+    '''
+    Edit distance without substitution between an encoded sequence and a batch of encoded sequences given by their
+    match masks (see bitparallel_masks): the bit-parallel LCS of levenshtein_bitparallel, on vectors of 64 bit words
+    (one row of words per sequence of the batch, the carries of the additions are propagated from word to word).
+    Labels of seq without mask match nothing.
+    '''
+    n_labels, n_sequences, words = masks.shape
+    lengths = np.asarray(lengths, dtype=np.int64)
+    # bits of the sequences in each word
+    bits = np.clip(lengths[:, None] - 64 * np.arange(words)[None, :], 0, 64).astype(np.uint64)
+    valid = np.where(bits == 64, np.uint64(0xFFFFFFFFFFFFFFFF),
+                     np.left_shift(np.uint64(1), np.minimum(bits, 63)) - np.uint64(1))
+    v = valid.copy()
+    for label in seq:
+        if label < 0 or label >= n_labels:
+            continue
+        u = v & masks[label]
+        # v - u does not borrow since u is a subset of v
+        v = (__add_words(v, u) | (v & ~u)) & valid
+    ones = __POPCOUNT[v.view(np.uint8)].reshape(n_sequences, -1).sum(axis=1)
+    lcs = lengths - ones
+    return len(seq) + lengths - 2 * lcs
+
+
+
+def __add_words(a, b):
+    # sum of multi-word integers (rows of 64 bit words, least significant word first)
+    if a.shape[1] == 1:
+        return a + b
+    total = np.empty_like(a)
+    carry = np.zeros(a.shape[0], dtype=np.uint64)
+    for w in range(a.shape[1]):
+        partial = a[:, w] + b[:, w]
+        word = partial + carry
+        carry = ((partial < a[:, w]) | (word < partial)).astype(np.uint64)
+        total[:, w] = word
+    return total
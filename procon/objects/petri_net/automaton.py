@@ -0,0 +1,156 @@
+'''
+    The following code owned by procon and its author (More Info: https://github.com/require-gio/procon).
+
+    Procon is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    Procon is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with Procon.  If not, see <https://www.gnu.org/licenses/>.
+'''
+import heapq
+from collections import deque
+
+import numpy as np
+
+from procon.objects.petri_net import semantics
+from procon.objects.petri_net.align_utils import STD_MODEL_LOG_MOVE_COST, STD_SYNC_COST, STD_TAU_COST
+
+DEFAULT_MAX_STATES = 10000
+TAU = -1
+
+
+class ModelAutomaton(object):
+    """
+    Reachability graph of a (reset/inhibitor) net, explored once and stored as arrays: the outgoing edges of state s
+    are the positions offsets[s] to offsets[s + 1] of the edge arrays, which hold the target state, the transition
+    of the net, the label (index into labels, TAU for silent transitions), the cost of the transition as a model move
+    and the cost of its sync move (-1 if it cannot be synchronized). State 0 is the initial marking.
+    """
+
+    def __init__(self, transitions, labels, offsets, targets, edge_transitions, edge_labels, model_costs, sync_costs,
+                 final):
+        self.transitions = transitions
+        self.labels = labels
+        self.label_index = {label: i for i, label in enumerate(labels)}
+        self.offsets = offsets
+        self.targets = targets
+        self.edge_transitions = edge_transitions
+        self.edge_labels = edge_labels
+        self.model_costs = model_costs
+        self.sync_costs = sync_costs
+        self.final = final
+        self.initial = 0
+        self.__tau_closures = {}
+
+    @property
+    def n_states(self):
+        return len(self.final)
+
+    def edges(self, state):
+        return range(self.offsets[state], self.offsets[state + 1])
+
+    def tau_closure(self, state):
+        """
+        States reachable from a state by silent transitions only, with the cheapest cost and the edges leading to
+        them (the state itself is included with cost 0). Computed on demand and memoized.
+
+        Parameters
+        ------------
+        state
+            State of the automaton
+
+        Returns
+        ------------
+        closure
+            List of (state, cost, tuple of edges)
+        """
+        closure = self.__tau_closures.get(state)
+        if closure is not None:
+            return closure
+        best = {state: (0, ())}
+        open_set = [(0, state)]
+        closed = set()
+        while open_set:
+            cost, s = heapq.heappop(open_set)
+            if s in closed:
+                continue
+            closed.add(s)
+            path = best[s][1]
+            for e in self.edges(s):
+                if self.edge_labels[e] != TAU:
+                    continue
+                target = int(self.targets[e])
+                new_cost = cost + int(self.model_costs[e])
+                if target not in best or new_cost < best[target][0]:
+                    best[target] = (new_cost, path + (e,))
+                    heapq.heappush(open_set, (new_cost, target))
+        closure = [(s, cost, path) for s, (cost, path) in best.items()]
+        self.__tau_closures[state] = closure
+        return closure
+
+
+def build(net, initial_marking, final_marking, model_cost_function=None, sync_cost_function=None,
+          max_states=DEFAULT_MAX_STATES):
+    """
+    Explores the reachability graph of a net with the reset/inhibitor semantics and stores it as a ModelAutomaton
+
+    Parameters
+    ------------
+    net
+        Reset/inhibitor net (e.g. from converter.apply)
+    initial_marking
+        Initial marking
+    final_marking
+        Final marking
+    model_cost_function
+        Costs of the transitions as model moves (standard costs if not provided)
+    sync_cost_function
+        Costs of the sync moves of the labelled transitions (standard costs if not provided)
+    max_states
+        Maximum number of states explored
+
+    Returns
+    ------------
+    automaton
+        Automaton of the net, None if the reachability graph has more than max_states states
+    """
+    if model_cost_function is None or sync_cost_function is None:
+        model_cost_function = {t: STD_MODEL_LOG_MOVE_COST if t.label is not None else STD_TAU_COST
+                               for t in net.transitions}
+        sync_cost_function = {t: STD_SYNC_COST for t in net.transitions if t.label is not None}
+
+    transitions = sorted(net.transitions, key=lambda t: str(t.name))
+    transition_index = {t: i for i, t in enumerate(transitions)}
+    labels = sorted(set(t.label for t in transitions if t.label is not None))
+    label_index = {label: i for i, label in enumerate(labels)}
+
+    states = {initial_marking: 0}
+    queue = deque([initial_marking])
+    edges = []
+    offsets = [0]
+    final = []
+    while queue:
+        marking = queue.popleft()
+        final.append(marking == final_marking)
+        for t in sorted(semantics.enabled_transitions(net, marking), key=transition_index.get):
+            new_marking = semantics.execute(t, net, marking)
+            if new_marking not in states:
+                if len(states) >= max_states:
+                    return None
+                states[new_marking] = len(states)
+                queue.append(new_marking)
+            edges.append((states[new_marking], transition_index[t],
+                          label_index[t.label] if t.label is not None else TAU,
+                          model_cost_function[t], sync_cost_function.get(t, -1) if t.label is not None else -1))
+        offsets.append(len(edges))
+
+    edges = np.array(edges, dtype=np.int64).reshape((len(edges), 5))
+    return ModelAutomaton(transitions, labels, np.array(offsets, dtype=np.int64), edges[:, 0], edges[:, 1],
+                          edges[:, 2], edges[:, 3], edges[:, 4], np.array(final, dtype=bool))
@@ -0,0 +1,405 @@
+'''
+    The following code owned by procon and its author (More Info: https://github.com/require-gio/procon).
+
+    Procon is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    Procon is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with Procon.  If not, see <https://www.gnu.org/licenses/>.
+'''
+import sys
+from collections import OrderedDict
+from enum import Enum
+
+import numpy as np
+from pm4py.util.lp import solver as lp_solver
+from scipy import sparse
+
+from procon.objects.petri_net import properties
+
+
+class HeuristicSolver(object):
+    """
+    Solver of the marking equation heuristic of a single synchronous product:
+
+        min c x  s.t.  A x = fin - m,  x >= 0
+
+    The incidence matrix A and the cost vector c are fixed when the solver is created, between two calls only the
+    right hand side changes. A solver is therefore created once per synchronous product and reused for all the
+    markings of the search.
+    """
+
+    def __init__(self, a_matrix, cost_vec, fin_vec):
+        # pm4py's incidence matrix is a list of lists, the one of the template a numpy array
+        a_matrix = np.asarray(a_matrix)
+        self.n_transitions = a_matrix.shape[1]
+        self.fin_vec = np.asarray(fin_vec, dtype=np.float64)
+        self.solved = 0
+
+    def solve(self, m_vec):
+        """
+        Computes the heuristic of a marking
+
+        Parameters
+        ------------
+        m_vec
+            Marking, encoded as a vector over the places of the incidence matrix
+
+        Returns
+        ------------
+        h
+            Value of the heuristic (sys.maxsize if the marking equation has no solution)
+        x
+            Solution vector
+        """
+        raise NotImplementedError()
+
+    def _b_term(self, m_vec):
+        self.solved += 1
+        return self.fin_vec - np.asarray(m_vec, dtype=np.float64)
+
+
+class PM4PyHeuristicSolver(HeuristicSolver):
+    """
+    Solves the heuristic with the LP solver configured in PM4Py (lp_solver.DEFAULT_LP_SOLVER_VARIANT).
+    The matrices are converted once; with the CVXOpt/GLPK variants they are kept as sparse matrices.
+    """
+
+    def __init__(self, a_matrix, cost_vec, fin_vec):
+        HeuristicSolver.__init__(self, a_matrix, cost_vec, fin_vec)
+        self.variant = lp_solver.DEFAULT_LP_SOLVER_VARIANT
+        self.use_cvxopt = self.variant == lp_solver.CVXOPT_SOLVER_CUSTOM_ALIGN or \
+            self.variant == lp_solver.CVXOPT_SOLVER_CUSTOM_ALIGN_ILP
+        a_matrix = np.asarray(a_matrix, dtype=np.float64)
+        if self.use_cvxopt:
+            # not available in the latest version of PM4Py
+            from cvxopt import matrix, spmatrix
+
+            rows, cols = np.nonzero(a_matrix)
+            self.a_matrix = spmatrix(a_matrix[rows, cols].tolist(), rows.tolist(), cols.tolist(),
+                                     size=a_matrix.shape)
+            self.g_matrix = spmatrix(-1.0, range(self.n_transitions), range(self.n_transitions))
+            self.h_cvx = matrix(0.0, (self.n_transitions, 1))
+            self.cost_vec = matrix([float(x) for x in cost_vec])
+        else:
+            self.a_matrix = np.asmatrix(a_matrix)
+            self.g_matrix = -np.eye(self.n_transitions)
+            self.h_cvx = np.matrix(np.zeros(self.n_transitions)).transpose()
+            self.cost_vec = [float(x) for x in cost_vec]
+
+    def solve(self, m_vec):
+        b_term = self._b_term(m_vec)
+        if self.use_cvxopt:
+            from cvxopt import matrix
+
+            b_term = matrix(b_term)
+        else:
+            b_term = np.matrix(b_term).transpose()
+
+        sol = lp_solver.apply(self.cost_vec, self.g_matrix, self.h_cvx, self.a_matrix, b_term,
+                              parameters={"solver": "glpk"}, variant=self.variant)
+        prim_obj = lp_solver.get_prim_obj_from_sol(sol, variant=self.variant)
+        points = lp_solver.get_points_from_sol(sol, variant=self.variant)
+
+        prim_obj = prim_obj if prim_obj is not None else sys.maxsize
+        points = points if points is not None else [0.0] * self.n_transitions
+
+        return prim_obj, points
+
+
+class ScipyHighsHeuristicSolver(HeuristicSolver):
+    """
+    Solves the heuristic with the HiGHS dual simplex shipped with SciPy. The incidence matrix is kept in CSR format
+    and x >= 0 is expressed through the variable bounds instead of a G matrix.
+    """
+
+    def __init__(self, a_matrix, cost_vec, fin_vec):
+        HeuristicSolver.__init__(self, a_matrix, cost_vec, fin_vec)
+        from scipy.optimize import linprog
+
+        self.linprog = linprog
+        self.a_matrix = sparse.csr_matrix(np.asarray(a_matrix, dtype=np.float64))
+        self.cost_vec = np.asarray(cost_vec, dtype=np.float64)
+
+    def solve(self, m_vec):
+        res = self.linprog(self.cost_vec, A_eq=self.a_matrix, b_eq=self._b_term(m_vec), bounds=(0, None),
+                           method="highs-ds")
+        if res.status != 0:
+            return sys.maxsize, np.zeros(self.n_transitions)
+        return res.fun, res.x
+
+
+class Backends(Enum):
+    PM4PY = "pm4py"
+    SCIPY_HIGHS = "scipy_highs"
+
+
+BACKEND_SOLVERS = {Backends.PM4PY: PM4PyHeuristicSolver, Backends.SCIPY_HIGHS: ScipyHighsHeuristicSolver}
+
+
+DEFAULT_BACKEND = Backends.PM4PY
+
+
+def get_solver(a_matrix, cost_vec, fin_vec, backend=DEFAULT_BACKEND):
+    """
+    Creates the heuristic solver of a synchronous product
+
+    Parameters
+    ------------
+    a_matrix
+        Incidence matrix of the estimation net
+    cost_vec
+        Costs of the transitions, in the order of the columns of the incidence matrix
+    fin_vec
+        Final marking, encoded as a vector over the rows of the incidence matrix
+    backend
+        Backend to use, a member of Backends or its value (default: Backends.PM4PY)
+
+    Returns
+    ------------
+    solver
+        Heuristic solver
+    """
+    return BACKEND_SOLVERS[Backends(backend)](a_matrix, cost_vec, fin_vec)
+
+
+DEFAULT_HEURISTIC_CACHE_SIZE = 10000
+
+
+class HeuristicCache(object):
+    """
+    Bounded LRU cache of the solutions of the marking equation heuristic, shared by the synchronous products of all
+    variants built from the same template.
+
+    In such a synchronous product, the heuristic of a marking only depends on its model part and on the events of the
+    trace that are not consumed yet: the cache is keyed by the model part of the marking vector and the remaining
+    suffix of the trace (labels and costs of the log moves). Solution vectors are stored in a layout that does not
+    depend on the variant: the model columns, followed by the log move and the sync moves of each remaining event.
+    """
+
+    def __init__(self, n_model_places, n_model_transitions, max_size=DEFAULT_HEURISTIC_CACHE_SIZE):
+        self.n_model_places = n_model_places
+        self.n_model_transitions = n_model_transitions
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.__solutions = OrderedDict()
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
+
+    def get(self, key):
+        solution = self.__solutions.get(key)
+        if solution is not None:
+            self.hits += 1
+            self.__solutions.move_to_end(key)
+        else:
+            self.misses += 1
+        return solution
+
+    def put(self, key, h, x):
+        self.__solutions[key] = (h, x)
+        if len(self.__solutions) > self.max_size:
+            self.__solutions.popitem(last=False)
+
+    def view(self, solver, incidence_matrix, cost_function, skip):
+        """
+        Wraps the heuristic solver of the synchronous product of a variant (built from the template of the cache)
+        """
+        return CachedHeuristicSolver(self, solver, incidence_matrix, cost_function, skip)
+
+
+class CachedHeuristicSolver(object):
+    """
+    Heuristic solver of the synchronous product of a variant that looks up the solutions in a HeuristicCache before
+    solving the LP. Same interface as HeuristicSolver; solved only counts the LPs actually solved.
+    """
+
+    def __init__(self, cache, solver, incidence_matrix, cost_function, skip):
+        self.cache = cache
+        self.solver = solver
+        self.n_transitions = solver.n_transitions
+        # log and sync moves of each event (log move first, sync moves by name of the model transition)
+        events = {}
+        for t in incidence_matrix.transitions:
+            if properties.TRACE_NET_TRANS_INDEX in t.properties:
+                events.setdefault(t.properties[properties.TRACE_NET_TRANS_INDEX], []).append(t)
+        self.signature = []
+        self.event_columns = []
+        for i in range(len(events)):
+            moves = sorted(events[i], key=lambda t: (t.name[1] != skip, str(t.name[1])))
+            self.signature.append((moves[0].label[0], cost_function[moves[0]]))
+            self.event_columns.append([incidence_matrix.transitions[t] for t in moves])
+        # position in the trace of the places of the trace net (the initial place carries no index)
+        self.trace_positions = {idx: p.properties.get(properties.TRACE_NET_PLACE_INDEX, 0)
+                                for p, idx in incidence_matrix.places.items() if idx >= cache.n_model_places}
+        self.__suffixes = {}
+
+    @property
+    def solved(self):
+        return self.solver.solved
+
+    def __suffix(self, position):
+        # remaining suffix of the trace and columns of the cached layout
+        suffix = self.__suffixes.get(position)
+        if suffix is None:
+            columns = [np.arange(self.cache.n_model_transitions)] + [np.asarray(cols) for cols in
+                                                                     self.event_columns[position:]]
+            suffix = (tuple(self.signature[position:]), np.concatenate(columns))
+            self.__suffixes[position] = suffix
+        return suffix
+
+    def solve(self, m_vec):
+        position = 0
+        for idx, pos in self.trace_positions.items():
+            if m_vec[idx] > 0:
+                position = pos
+                break
+        signature, columns = self.__suffix(position)
+        key = (tuple(m_vec[:self.cache.n_model_places]), signature)
+        solution = self.cache.get(key)
+        if solution is not None:
+            h, x_cached = solution
+            x = np.zeros(self.n_transitions)
+            x[columns] = x_cached
+            return h, x
+        h, x = self.solver.solve(m_vec)
+        self.cache.put(key, h, np.asarray(x, dtype=np.float64)[columns])
+        return h, x
+
+
+class ExtendedMarkingEquationSolver(object):
+    """
+    Solver of the extended marking equation heuristic used by the split-point search. The remaining part of the
+    trace is split before the events in split_points; for each split point a_i the LP gets a block y_i firing
+    exactly one transition of that event (log or sync move), preceded by a block x_{i-1} of arbitrary transitions:
+
+        min c (x_0 + y_1 + x_1 + ... + y_k + x_k)
+        s.t. A (x_0 + y_1 + ... + x_k) = fin - m
+             m + A (x_0 + ... + x_{i-1}) + A^- y_i >= 0      for every split point i
+             sum y_i = 1                                    for every split point i
+
+    where A^- is the consuming part of the incidence matrix. Without split points it equals the marking equation.
+    The LP structure of each set of split points is built once and reused for every marking.
+    """
+
+    def __init__(self, a_matrix, cost_vec, fin_vec, event_columns, backend=DEFAULT_BACKEND):
+        a_matrix = np.asarray(a_matrix, dtype=np.float64)
+        self.n_places, self.n_transitions = a_matrix.shape
+        self.a_matrix = sparse.csc_matrix(a_matrix)
+        self.consumption = sparse.csc_matrix(np.minimum(a_matrix, 0))
+        self.cost_vec = np.asarray(cost_vec, dtype=np.float64)
+        self.fin_vec = np.asarray(fin_vec, dtype=np.float64)
+        self.event_columns = {e: np.asarray(sorted(cols), dtype=int) for e, cols in event_columns.items()}
+        self.backend = Backends(backend)
+        self.variant = lp_solver.DEFAULT_LP_SOLVER_VARIANT
+        self.use_cvxopt = self.backend == Backends.PM4PY and (self.variant == lp_solver.CVXOPT_SOLVER_CUSTOM_ALIGN or
+                                                               self.variant == lp_solver.CVXOPT_SOLVER_CUSTOM_ALIGN_ILP)
+        self.structures = {}
+        self.solved = 0
+
+    def __build(self, split_points):
+        columns = [None]
+        for e in split_points:
+            columns.append(self.event_columns[e])
+            columns.append(None)
+        sizes = [self.n_transitions if cols is None else len(cols) for cols in columns]
+
+        a_eq = [[self.a_matrix if cols is None else self.a_matrix[:, cols] for cols in columns]]
+        for i in range(len(split_points)):
+            row = [None] * len(columns)
+            row[2 * i + 1] = sparse.csc_matrix(np.ones((1, sizes[2 * i + 1])))
+            a_eq.append(row)
+        a_ub = []
+        for i in range(len(split_points)):
+            row = [None] * len(columns)
+            for j in range(2 * i + 1):
+                row[j] = -self.a_matrix if columns[j] is None else -self.a_matrix[:, columns[j]]
+            row[2 * i + 1] = -self.consumption[:, columns[2 * i + 1]]
+            for j in range(2 * i + 2, len(columns)):
+                row[j] = sparse.csc_matrix((self.n_places, sizes[j]))
+            a_ub.append(row)
+        a_eq = sparse.bmat(a_eq, format="csc")
+        a_ub = sparse.bmat(a_ub, format="csc") if a_ub else None
+        c = np.concatenate([self.cost_vec if cols is None else self.cost_vec[cols] for cols in columns])
+
+        if self.use_cvxopt:
+            # not available in the latest version of PM4Py
+            from cvxopt import matrix
+
+            n_vars = len(c)
+            g_matrix = sparse.vstack([a_ub, -sparse.identity(n_vars)]) if a_ub is not None else \
+                -sparse.identity(n_vars)
+            return columns, _to_cvxopt(a_eq), _to_cvxopt(g_matrix), matrix(c.tolist())
+        return columns, a_eq, a_ub, c
+
+    def solve(self, m_vec, split_points):
+        """
+        Computes the extended marking equation heuristic of a marking
+
+        Parameters
+        ------------
+        m_vec
+            Marking, encoded as a vector over the places of the incidence matrix
+        split_points
+            Sorted tuple of the indices of the not yet explained events before which the trace is split
+
+        Returns
+        ------------
+        h
+            Value of the heuristic (sys.maxsize if the LP has no solution)
+        x
+            Solution as a matrix with a row per block (x_0, y_1, x_1, ..., y_k, x_k) and a column per transition
+        """
+        if split_points not in self.structures:
+            self.structures[split_points] = self.__build(split_points)
+        columns, a_eq, a_ub, c = self.structures[split_points]
+        self.solved += 1
+
+        m_vec = np.asarray(m_vec, dtype=np.float64)
+        b_eq = np.concatenate([self.fin_vec - m_vec, np.ones(len(split_points))])
+        b_ub = np.tile(m_vec, len(split_points))
+
+        if self.use_cvxopt:
+            from cvxopt import matrix
+
+            h_cvx = matrix(np.concatenate([b_ub, np.zeros(len(c))]).tolist())
+            sol = lp_solver.apply(c, a_ub, h_cvx, a_eq, matrix(b_eq.tolist()), parameters={"solver": "glpk"},
+                                  variant=self.variant)
+            prim_obj = lp_solver.get_prim_obj_from_sol(sol, variant=self.variant)
+            points = lp_solver.get_points_from_sol(sol, variant=self.variant)
+        else:
+            from scipy.optimize import linprog
+
+            res = linprog(c, A_ub=a_ub, b_ub=b_ub if a_ub is not None else None, A_eq=a_eq, b_eq=b_eq,
+                          bounds=(0, None), method="highs-ds")
+            prim_obj, points = (res.fun, res.x) if res.status == 0 else (None, None)
+
+        x = np.zeros((len(columns), self.n_transitions))
+        if prim_obj is None or points is None:
+            return sys.maxsize, x
+        points = np.asarray(points, dtype=np.float64).flatten()
+        offset = 0
+        for i, cols in enumerate(columns):
+            if cols is None:
+                x[i] = points[offset:offset + self.n_transitions]
+                offset += self.n_transitions
+            else:
+                x[i, cols] = points[offset:offset + len(cols)]
+                offset += len(cols)
+        return prim_obj, x
+
+
+def _to_cvxopt(matrix):
+    from cvxopt import spmatrix
+
+    matrix = sparse.coo_matrix(matrix)
+    return spmatrix(matrix.data.tolist(), matrix.row.tolist(), matrix.col.tolist(), size=matrix.shape)
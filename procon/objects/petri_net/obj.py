@@ -155,10 +155,13 @@ class PetriNet(object):
             self.__properties = dict() if properties is None else properties
             self.add_marking = Marking()
             self.sub_marking = Marking()
+            self.normal_sub_marking = Marking()
+            self.inhibitor_places = tuple()
 
         def __getstate__(self):
             # dump a tuple instead of a set so that the __hash__ function won't be called
-            return tuple([self.__name, self.__label, self.__properties, self.add_marking, self.sub_marking])
+            return tuple([self.__name, self.__label, self.__properties, self.add_marking, self.sub_marking,
+                          self.normal_sub_marking, self.inhibitor_places])
 
         def __setstate__(self, state):
             self.__name = state[0]
@@ -174,6 +177,8 @@ class PetriNet(object):
             self.__properties = state[2]
             self.add_marking = state[3]
             self.sub_marking = state[4]
+            self.normal_sub_marking = state[5]
+            self.inhibitor_places = state[6]
 
         def __set_name(self, name):
             self.__name = name
@@ -22,6 +22,11 @@ IS_SYNC_NET = "is_sync_net"
 TRACE_NET_TRANS_INDEX = "trace_net_trans_index"
 TRACE_NET_PLACE_INDEX = "trace_net_place_index"
 
+# innermost BPMN subprocess of a place/transition of a converted model (absent for the main process)
+SUBPROCESS = "subprocess"
+# parent process of each BPMN subprocess, as property of a converted net
+SUBPROCESS_PARENTS = "subprocess_parents"
+
 ARCTYPE = "arctype"
 INHIBITOR_ARC = "inhibitor"
 RESET_ARC = "reset"
@@ -134,3 +134,68 @@ def enabled_transitions(pn, m):
         if is_enabled(t, pn, m):
             enabled.add(t)
     return enabled
+
+
+def is_enabled_decorated(t, m):
+    """
+    Verifies whether a decorated transition is enabled in a given marking, using the normal preset and the
+    inhibitor places resolved by decorate_transition_prepostset instead of the arcs of the transition
+
+    Parameters
+    ----------
+    :param t: transition to check
+    :param m: marking to check
+
+    Returns
+    -------
+    :return: true if enabled, false otherwise
+    """
+    for p in t.inhibitor_places:
+        if m[p] > 0:
+            return False
+    for p, weight in t.normal_sub_marking.items():
+        if m[p] < weight:
+            return False
+    return True
+
+
+def transitions_without_normal_preset(pn):
+    """
+    Returns the transitions of a decorated Petri net that do not consume tokens, i.e. that have no input arcs
+    or only reset/inhibitor input arcs. These are not reachable from the place index of the net.
+
+    Parameters
+    ----------
+    :param pn: Petri net
+
+    Returns
+    -------
+    :return: set of transitions without normal input arcs
+    """
+    return set(t for t in pn.transitions if len(t.normal_sub_marking) == 0)
+
+
+def enabled_transitions_indexed(m, trans_wo_normal_preset):
+    """
+    Returns the set of enabled transitions in a given marking, only testing the transitions that consume from a
+    marked place (looked up in the ass_trans decoration of the places) and those without a normal preset.
+    The transitions must be decorated by decorate_transitions_prepostset and the places by
+    decorate_places_preset_trans
+
+    Parameters
+    ----------
+    :param m: marking
+    :param trans_wo_normal_preset: transitions without normal input arcs, see transitions_without_normal_preset
+
+    Returns
+    -------
+    :return: set of enabled transitions
+    """
+    candidates = set(trans_wo_normal_preset)
+    for p in m:
+        candidates.update(p.ass_trans)
+    enabled = set()
+    for t in candidates:
+        if is_enabled_decorated(t, m):
+            enabled.add(t)
+    return enabled
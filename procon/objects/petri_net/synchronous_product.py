@@ -16,8 +16,12 @@
     along with PM4Py.  If not, see <https://www.gnu.org/licenses/>.
 '''
 from copy import deepcopy
+
+import numpy as np
+
 from procon.objects.petri_net.obj import PetriNet, Marking
-from procon.objects.petri_net.utils import add_arc_from_to, remove_arc, is_reset_arc, is_inhibitor_arc, is_petri_net
+from procon.objects.petri_net.utils import add_arc_from_to, remove_arc, is_reset_arc, is_inhibitor_arc, is_petri_net, \
+    is_normal_arc, decorate_transitions_prepostset, decorate_transition_prepostset, decorate_places_preset_trans
 from procon.objects.petri_net import properties
 
 
@@ -146,6 +150,246 @@ def construct_cost_aware(pn1, im1, fm1, pn2, im2, fm2, skip, pn1_costs, pn2_cost
     return sync_net, sync_im, sync_fm, costs
 
 
+class SyncProductTemplate(object):
+    """
+    Model half of a synchronous product net. It is compiled once per model and shared by the synchronous products
+    of all traces aligned against that model, see :func:`construct_template` and :func:`construct_from_template`.
+    """
+
+    def __init__(self, net, initial_marking, final_marking, skip):
+        self.net = net
+        self.initial_marking = initial_marking
+        self.final_marking = final_marking
+        self.skip = skip
+        # model half of the synchronous product (places, model moves and their arcs)
+        self.model_net = PetriNet()
+        self.t_map = {}
+        self.p_map = {}
+        self.sync_im = Marking()
+        self.sync_fm = Marking()
+        # costs of the model moves (and of the reset transitions of the estimation net)
+        self.costs = {}
+        # costs of the model and sync moves, keyed by the transition of the model
+        self.model_costs = {}
+        self.sync_costs = {}
+        # hash index from labels to the transitions of the model carrying that label
+        self.label_index = {}
+        # incidence columns of the model half of the estimation net
+        self.place_index = {}
+        self.transition_index = {}
+        self.a_matrix = None
+        # cost of aligning the empty trace, only depends on the model (computed lazily)
+        self.best_worst_cost = None
+        # cache of the model-side successors of model markings, shared by all variants (see align_utils)
+        self.successor_cache = None
+        # cache of the solutions of the marking equation heuristic, shared by all variants (see lp_heuristic)
+        self.heuristic_cache = None
+        # reachability graph of the model (SearchVariants.AUTOMATON), False if it exceeds the bound (built lazily)
+        self.automaton = None
+
+
+class SyncProductIncidenceMatrix(object):
+    """
+    Incidence matrix of the estimation net of a synchronous product constructed from a template.
+    Offers the same interface as the incidence matrix of PM4Py.
+    """
+
+    def __init__(self, a_matrix, place_indices, transition_indices):
+        self.__A = a_matrix
+        self.__place_indices = place_indices
+        self.__transition_indices = transition_indices
+
+    def encode_marking(self, marking):
+        x = [0 for i in range(len(self.__place_indices))]
+        for p in marking:
+            x[self.__place_indices[p]] = marking[p]
+        return x
+
+    def __get_a_matrix(self):
+        return self.__A
+
+    def __get_transition_indices(self):
+        return self.__transition_indices
+
+    def __get_place_indices(self):
+        return self.__place_indices
+
+    a_matrix = property(__get_a_matrix)
+    places = property(__get_place_indices)
+    transitions = property(__get_transition_indices)
+
+
+def construct_template(pn2, im2, fm2, skip, pn2_costs, sync_costs):
+    """
+    Compiles the model half of the synchronous product net of a model, i.e. its places, model moves, incidence
+    columns and costs, so that the synchronous product of each trace only needs to add its trace part.
+
+    :param pn2: Petri net (model)
+    :param im2: Initial marking of the model
+    :param fm2: Final marking of the model
+    :param skip: Symbol to be used as skip
+    :param pn2_costs: dictionary mapping transitions of pn2 to corresponding costs
+    :param sync_costs: dictionary mapping transitions of pn2 to the costs of the corresponding sync moves
+
+    Returns
+    -------
+    :return: Template of the synchronous product net
+    """
+    template = SyncProductTemplate(pn2, im2, fm2, skip)
+    template.t_map, template.p_map = __copy_into(pn2, template.model_net, False, skip)
+    decorate_transitions_prepostset(template.model_net)
+    decorate_places_preset_trans(template.model_net)
+
+    for t2 in pn2.transitions:
+        template.costs[template.t_map[t2]] = pn2_costs[t2]
+        template.model_costs[t2] = pn2_costs[t2]
+        if t2 in sync_costs:
+            template.sync_costs[t2] = sync_costs[t2]
+        if t2.label not in template.label_index:
+            template.label_index[t2.label] = []
+        template.label_index[t2.label].append(t2)
+
+    for p in im2:
+        template.sync_im[template.p_map[p]] = im2[p]
+    for p in fm2:
+        template.sync_fm[template.p_map[p]] = fm2[p]
+
+    # the estimation net replaces reset arcs by a transition emptying the place at no cost and drops inhibitor arcs,
+    # see construct_estimation_net
+    places = sorted(template.model_net.places, key=lambda x: str(x.name))
+    transitions = sorted(template.model_net.transitions, key=lambda x: str(x.name))
+    reset_places = [place for place in places if len([arc for arc in place.out_arcs if is_reset_arc(arc)]) > 0]
+    reset_transitions = []
+    for place in reset_places:
+        t = PetriNet.Transition("t-reset-" + str(place.name), label=None)
+        template.costs[t] = 0
+        transitions.append(t)
+        reset_transitions.append((place, t))
+    for p in places:
+        template.place_index[p] = len(template.place_index)
+    for t in transitions:
+        template.transition_index[t] = len(template.transition_index)
+
+    template.a_matrix = np.zeros((len(places), len(transitions)), dtype=int)
+    for arc in template.model_net.arcs:
+        if type(arc.source) is PetriNet.Place:
+            if is_normal_arc(arc):
+                template.a_matrix[template.place_index[arc.source], template.transition_index[arc.target]] -= 1
+        else:
+            template.a_matrix[template.place_index[arc.target], template.transition_index[arc.source]] += 1
+    for place, t in reset_transitions:
+        template.a_matrix[template.place_index[place], template.transition_index[t]] -= 1
+
+    return template
+
+
+def construct_from_template(template, pn1, im1, fm1, pn1_costs):
+    """
+    Constructs the synchronous product net of a trace net and a compiled model.
+    The places and model moves of the model half are shared with the template: the arcs of the sync moves are
+    registered on the sync moves and on the net, but not on the shared places of the model.
+
+    :param template: Template of the model half, see :func:`construct_template`
+    :param pn1: Petri net 1 (trace net)
+    :param im1: Initial marking of Petri net 1
+    :param fm1: Final marking of Petri net 1
+    :param pn1_costs: dictionary mapping transitions of pn1 to corresponding costs
+
+    Returns
+    -------
+    :return: Synchronous product net, its initial and final marking, the costs of its transitions and the incidence
+    matrix of its estimation net
+    """
+    skip = template.skip
+    sync_net = PetriNet('synchronous_product_net of %s and %s' % (pn1.name, template.net.name),
+                        places=set(template.model_net.places), transitions=set(template.model_net.transitions),
+                        arcs=set(template.model_net.arcs))
+    t1_map, p1_map = __copy_into(pn1, sync_net, True, skip)
+    costs = dict(template.costs)
+
+    place_index = dict(template.place_index)
+    for p in sorted(p1_map.values(), key=lambda x: str(x.name)):
+        place_index[p] = len(place_index)
+    transition_index = dict(template.transition_index)
+    for t1 in sorted(pn1.transitions, key=lambda x: str(x.name)):
+        costs[t1_map[t1]] = pn1_costs[t1]
+        transition_index[t1_map[t1]] = len(transition_index)
+        decorate_transition_prepostset(t1_map[t1])
+
+    syncs = []
+    for t1 in pn1.transitions:
+        for t2 in template.label_index.get(t1.label, []):
+            sync = PetriNet.Transition((t1.name, t2.name), (t1.label, t2.label))
+            sync_net.transitions.add(sync)
+            costs[sync] = template.sync_costs[t2]
+            # copy the properties of the transitions inside the transition of the sync net
+            for p1 in t1.properties:
+                sync.properties[p1] = t1.properties[p1]
+            for p2 in t2.properties:
+                sync.properties[p2] = t2.properties[p2]
+            for a in t1.in_arcs:
+                add_arc_from_to(p1_map[a.source], sync, sync_net, properties=a.properties)
+            for a in t2.in_arcs:
+                __add_arc_to_shared_place(template.p_map[a.source], sync, sync_net, properties=a.properties)
+            for a in t1.out_arcs:
+                add_arc_from_to(sync, p1_map[a.target], sync_net, properties=a.properties)
+            for a in t2.out_arcs:
+                __add_arc_to_shared_place(sync, template.p_map[a.target], sync_net, properties=a.properties)
+            decorate_transition_prepostset(sync)
+            syncs.append((t1, t2, sync))
+    for t1, t2, sync in syncs:
+        transition_index[sync] = len(transition_index)
+
+    for p in p1_map.values():
+        p.ass_trans = set()
+    for t in t1_map.values():
+        for p in t.sub_marking:
+            p.ass_trans.add(t)
+    for t1, t2, sync in syncs:
+        for a in t1.in_arcs:
+            p1_map[a.source].ass_trans.add(sync)
+
+    # the model columns are shared with the template, the trace part is added on top of them
+    n_model_places, n_model_trans = template.a_matrix.shape
+    a_matrix = np.zeros((len(place_index), len(transition_index)), dtype=int)
+    a_matrix[:n_model_places, :n_model_trans] = template.a_matrix
+    for t1 in pn1.transitions:
+        __add_trace_column(a_matrix, place_index, transition_index[t1_map[t1]], t1, p1_map)
+    for t1, t2, sync in syncs:
+        col = transition_index[sync]
+        a_matrix[:n_model_places, col] = template.a_matrix[:, template.transition_index[template.t_map[t2]]]
+        __add_trace_column(a_matrix, place_index, col, t1, p1_map)
+
+    sync_im = Marking(template.sync_im)
+    sync_fm = Marking(template.sync_fm)
+    for p in im1:
+        sync_im[p1_map[p]] = im1[p]
+    for p in fm1:
+        sync_fm[p1_map[p]] = fm1[p]
+
+    sync_net.properties[properties.IS_SYNC_NET] = True
+
+    return sync_net, sync_im, sync_fm, costs, SyncProductIncidenceMatrix(a_matrix, place_index, transition_index)
+
+
+def __add_arc_to_shared_place(fr, to, net, properties=None):
+    a = PetriNet.Arc(fr, to, properties=properties)
+    net.arcs.add(a)
+    if type(fr) is PetriNet.Transition:
+        fr.out_arcs.add(a)
+    else:
+        to.in_arcs.add(a)
+    return a
+
+
+def __add_trace_column(a_matrix, place_index, col, t1, p1_map):
+    for a in t1.in_arcs:
+        if is_normal_arc(a):
+            a_matrix[place_index[p1_map[a.source]], col] -= 1
+    for a in t1.out_arcs:
+        a_matrix[place_index[p1_map[a.target]], col] += 1
+
+
 def __copy_into(source_net, target_net, upper, skip):
     t_map = {}
     p_map = {}
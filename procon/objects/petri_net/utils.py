@@ -406,6 +406,76 @@ def acyclic_net_variants(net, initial_marking, final_marking, activity_key=xes_u
     return trace_variants
 
 
+def acyclic_net_runs(net, initial_marking, final_marking, model_cost_function=None, max_variants=None,
+                     max_states=None):
+    """
+    Given an acyclic accepting Petri net, initial and final marking extracts the variants replayable on the net
+    together with the cheapest run producing each of them (the cost of a run is the cost of its silent transitions).
+    Like acyclic_net_variants, this function is based on a marking exploration (here ordered by the cost of the
+    silent transitions); on a net with loops, the bounds stop it.
+
+    Parameters
+    ----------
+    :param net: An acyclic workflow net
+    :param initial_marking: The initial marking of the net.
+    :param final_marking: The final marking of the net.
+    :param model_cost_function: cost of the silent transitions (default: align_utils.STD_TAU_COST)
+    :param max_variants: maximum number of variants (default: no bound)
+    :param max_states: maximum number of explored (marking, partial trace) pairs (default: no bound)
+
+    Returns
+    -------
+    :return: runs: :class:`dict` variant (tuple of labels) -> (cost, list of the transitions of the run); None if a
+        bound is exceeded
+    """
+    import heapq
+    from procon.objects.petri_net import semantics
+    from procon.objects.petri_net.align_utils import STD_TAU_COST
+
+    initial_pair = (initial_marking, ())
+    costs = {initial_pair: 0}
+    previous = {initial_pair: None}
+    runs = {}
+    explored = 0
+    counter = 0
+    active = [(0, counter, initial_pair)]
+    while active:
+        curr_cost, _, curr_pair = heapq.heappop(active)
+        if curr_cost > costs[curr_pair]:
+            continue
+        curr_marking, curr_partial_trace = curr_pair
+        if curr_marking == final_marking and curr_pair != initial_pair:
+            # the first time a final pair is taken from the queue, it has been reached by its cheapest run
+            run = []
+            pair = curr_pair
+            while previous[pair] is not None:
+                pair, transition = previous[pair]
+                run.append(transition)
+            run.reverse()
+            runs[curr_partial_trace] = (curr_cost, run)
+            if max_variants is not None and len(runs) > max_variants:
+                return None
+            continue
+        explored += 1
+        if max_states is not None and explored > max_states:
+            return None
+        for transition in semantics.enabled_transitions(net, curr_marking):
+            if transition.label is not None:
+                next_partial_trace = curr_partial_trace + (transition.label,)
+                next_cost = curr_cost
+            else:
+                next_partial_trace = curr_partial_trace
+                next_cost = curr_cost + (model_cost_function[transition] if model_cost_function is not None
+                                         else STD_TAU_COST)
+            next_pair = (semantics.execute(transition, net, curr_marking), next_partial_trace)
+            if next_pair not in costs or next_cost < costs[next_pair]:
+                costs[next_pair] = next_cost
+                previous[next_pair] = (curr_pair, transition)
+                counter += 1
+                heapq.heappush(active, (next_cost, counter, next_pair))
+    return runs
+
+
 def get_transition_by_name(net, transition_name):
     """
     Get a transition by its name
@@ -552,33 +622,51 @@ def decorate_transitions_prepostset(net):
     net
         Petri net
     """
-    from procon.objects.petri_net.obj import Marking
-
     for trans in net.transitions:
-        sub_marking = Marking()
-        add_marking = Marking()
-        reset_places = []
-
-        for arc in trans.in_arcs:
-            sub_marking[arc.source] = arc.weight
-            if is_reset_arc(arc):
-                add_marking[arc.source] = -math.inf
-                reset_places.append(arc.source)
-            elif is_inhibitor_arc(arc):
-                add_marking[arc.source] = 0
-            else:
-                add_marking[arc.source] = -arc.weight
-
-        for arc in trans.out_arcs:
-            if arc.target in add_marking:
-                if arc.target in reset_places:
-                    add_marking[arc.target] = arc.weight
-                else:
-                    add_marking[arc.target] = arc.weight + add_marking[arc.target]
-            else:
+        decorate_transition_prepostset(trans)
+
+
+def decorate_transition_prepostset(trans):
+    """
+    Decorate a single transition with its sub and addition markings, the tokens consumed by its normal arcs and
+    the places inhibiting it
+
+    Parameters
+    -------------
+    trans
+        Transition
+    """
+    sub_marking = Marking()
+    add_marking = Marking()
+    normal_sub_marking = Marking()
+    inhibitor_places = []
+    reset_places = []
+
+    for arc in trans.in_arcs:
+        sub_marking[arc.source] = arc.weight
+        if is_reset_arc(arc):
+            add_marking[arc.source] = -math.inf
+            reset_places.append(arc.source)
+        elif is_inhibitor_arc(arc):
+            add_marking[arc.source] = 0
+            inhibitor_places.append(arc.source)
+        else:
+            add_marking[arc.source] = -arc.weight
+            normal_sub_marking[arc.source] = arc.weight
+
+    for arc in trans.out_arcs:
+        if arc.target in add_marking:
+            if arc.target in reset_places:
                 add_marking[arc.target] = arc.weight
-        trans.sub_marking = sub_marking
-        trans.add_marking = add_marking
+            else:
+                add_marking[arc.target] = arc.weight + add_marking[arc.target]
+        else:
+            add_marking[arc.target] = arc.weight
+    trans.sub_marking = sub_marking
+    trans.add_marking = add_marking
+    # the arc types are resolved here once, so that the enabling test does not look at the arcs anymore
+    trans.normal_sub_marking = normal_sub_marking
+    trans.inhibitor_places = tuple(inhibitor_places)
 
 
 @deprecation.deprecated('2.2.7', '3.0.0')